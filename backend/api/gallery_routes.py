@@ -1,10 +1,21 @@
 """
 Gallery API 路由
 """
-from flask import Blueprint, render_template, jsonify, request, send_file, abort
-from backend.services.gallery_service import GalleryService
+from flask import Blueprint, Response, render_template, jsonify, request, abort
+from backend.services.gallery_service import (
+    DEDUPE_MODE_FULL,
+    DEDUPE_MODE_KEPT_ONLY,
+    GalleryService,
+    SEARCH_MODES,
+)
 from backend.services.auth_service import AuthService
+from backend.services.thumbnail_service import (
+    THUMBNAIL_PREFETCH_PAGES,
+    get_thumbnail_service,
+)
 from backend.utils.decorators import login_required
+from backend.utils.http_cache import is_current_version, send_cached_file
+from backend.utils.zip_stream import stream_zip
 import os
 import json
 from datetime import datetime
@@ -12,6 +23,7 @@ from datetime import datetime
 gallery_bp = Blueprint("gallery", __name__)
 gallery_service = GalleryService()
 auth_service = AuthService()
+thumbnail_service = get_thumbnail_service()
 
 
 def _get_bool_arg(arg_name: str, default: bool = False) -> bool:
@@ -22,6 +34,27 @@ def _get_bool_arg(arg_name: str, default: bool = False) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+def _schedule_thumbnail_prefetch(
+    folder_name: str, images: dict, per_page: int, cross_folders: bool
+) -> None:
+    """后台预生成当前页之后几页的预览图，翻页时直接命中缓存"""
+    next_cursor = images.get("next_cursor")
+    if THUMBNAIL_PREFETCH_PAGES <= 0 or not next_cursor:
+        return
+    prefetch_count = per_page * THUMBNAIL_PREFETCH_PAGES
+
+    def load_next_paths():
+        # 只取后续几页的相对路径，不补充图片详情，也不会触发目录扫描
+        return [
+            str(gallery_service.images_root / relative_path)
+            for relative_path in gallery_service.get_next_page_paths(
+                folder_name, next_cursor, prefetch_count, cross_folders=cross_folders
+            )
+        ]
+
+    thumbnail_service.schedule_prefetch(load_next_paths, "preview")
+
+
 @gallery_bp.route("/")
 @login_required
 def folder_list():
@@ -98,6 +131,12 @@ def gallery_page(folder_name):
         dedupe_task_id = request.args.get("dedupe_task_id") if dedupe_similar else None
         dedupe_target_kept = request.args.get("dedupe_target_kept", type=int) if dedupe_similar else None
         dedupe_continue = _get_bool_arg("dedupe_continue", False) if dedupe_similar else False
+        # 只与已保留因子比较，遇到第一个高相关因子即隐藏（结果与完整比较模式分开缓存）
+        dedupe_mode = (
+            DEDUPE_MODE_KEPT_ONLY
+            if dedupe_similar and _get_bool_arg("dedupe_kept_only", False)
+            else DEDUPE_MODE_FULL
+        )
         # 首次加载只显示前20张图片，支持懒加载
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
@@ -113,6 +152,7 @@ def gallery_page(folder_name):
                 dedupe_task_id=dedupe_task_id,
                 dedupe_target_kept=dedupe_target_kept,
                 dedupe_continue=dedupe_continue,
+                dedupe_mode=dedupe_mode,
             )
         else:
             # 否则使用原有的单文件夹排序
@@ -125,6 +165,7 @@ def gallery_page(folder_name):
                 dedupe_task_id=dedupe_task_id,
                 dedupe_target_kept=dedupe_target_kept,
                 dedupe_continue=dedupe_continue,
+                dedupe_mode=dedupe_mode,
             )
 
         return render_template(
@@ -153,14 +194,23 @@ def api_images(folder_name):
         dedupe_task_id = request.args.get("dedupe_task_id") if dedupe_similar else None
         dedupe_target_kept = request.args.get("dedupe_target_kept", type=int) if dedupe_similar else None
         dedupe_continue = _get_bool_arg("dedupe_continue", False) if dedupe_similar else False
+        # 只与已保留因子比较，遇到第一个高相关因子即隐藏（结果与完整比较模式分开缓存）
+        dedupe_mode = (
+            DEDUPE_MODE_KEPT_ONLY
+            if dedupe_similar and _get_bool_arg("dedupe_kept_only", False)
+            else DEDUPE_MODE_FULL
+        )
+        # 游标翻页：提供 cursor 时从上一页末尾继续，page 仅作为回退
+        cursor = request.args.get("cursor") or None
 
         # 检查是否是父文件夹（含有子文件夹）
         folder_info = gallery_service.get_folder_info(folder_name)
-        if (
+        cross_folders = bool(
             folder_info
             and folder_info.get("has_subfolders", False)
             and sort_by == "neu_ret"
-        ):
+        )
+        if cross_folders:
             # 如果是父文件夹且使用收益率排序，使用跨子文件夹收益率排序
             images = gallery_service.get_images_cross_folders_by_return(
                 folder_name,
@@ -170,6 +220,8 @@ def api_images(folder_name):
                 dedupe_task_id=dedupe_task_id,
                 dedupe_target_kept=dedupe_target_kept,
                 dedupe_continue=dedupe_continue,
+                dedupe_mode=dedupe_mode,
+                cursor=cursor,
             )
         else:
             # 否则使用原有的单文件夹排序
@@ -182,8 +234,14 @@ def api_images(folder_name):
                 dedupe_task_id=dedupe_task_id,
                 dedupe_target_kept=dedupe_target_kept,
                 dedupe_continue=dedupe_continue,
+                dedupe_mode=dedupe_mode,
+                cursor=cursor,
             )
 
+        # 去重结果依赖后台任务，不做预生成
+        if not dedupe_similar:
+            _schedule_thumbnail_prefetch(folder_name, images, per_page, cross_folders)
+
         return jsonify(
             {"success": True, "data": images, "page": page, "per_page": per_page}
         )
@@ -194,17 +252,42 @@ def api_images(folder_name):
 @gallery_bp.route("/serve/<path:file_path>")
 @login_required
 def serve_file(file_path):
-    """提供文件服务"""
-    try:
-        full_path = gallery_service.get_file_path(file_path)
-        if not full_path or not os.path.exists(full_path):
-            abort(404)
+    """提供文件服务，URL 带当前版本号（?v=）时按不可变资源长期缓存"""
+    full_path = gallery_service.get_file_path(file_path)
+    if not full_path or not os.path.exists(full_path):
+        abort(404)
 
-        return send_file(full_path)
+    try:
+        return send_cached_file(
+            full_path, is_current_version(full_path, request.args.get("v"))
+        )
+    except OSError:
+        abort(404)
     except Exception as e:
         abort(500)
 
 
+@gallery_bp.route("/thumb/<size>/<path:file_path>")
+@login_required
+def serve_thumbnail(size, file_path):
+    """提供缩略图服务，无法生成缩略图时回退到原图"""
+    if not thumbnail_service.has_size(size):
+        abort(404)
+
+    full_path = gallery_service.get_file_path(file_path)
+    if not full_path or not os.path.exists(full_path):
+        abort(404)
+
+    # 缩略图的版本号取原图的修改时间
+    immutable = is_current_version(full_path, request.args.get("v"))
+    thumbnail_path = thumbnail_service.get_thumbnail(full_path, size)
+    try:
+        return send_cached_file(thumbnail_path or full_path, immutable)
+    except OSError:
+        # 缩略图刚好被淘汰时回退到原图
+        return send_cached_file(full_path, immutable)
+
+
 @gallery_bp.route("/viewer/<path:file_path>")
 @login_required
 def file_viewer(file_path):
@@ -231,13 +314,22 @@ def api_search():
         query = request.args.get("q", "").strip()
         folder = request.args.get("folder", "")
         file_type = request.args.get("type", "all")
+        mode = request.args.get("mode", "name")
 
         if not query:
             return jsonify({"success": False, "message": "搜索关键词不能为空"}), 400
+        if mode not in SEARCH_MODES:
+            return jsonify({"success": False, "message": f"不支持的搜索模式: {mode}"}), 400
 
-        results = gallery_service.search_files(query, folder, file_type)
+        results = gallery_service.search_files(query, folder, file_type, mode=mode)
         return jsonify(
-            {"success": True, "data": results, "count": len(results), "query": query}
+            {
+                "success": True,
+                "data": results,
+                "count": len(results),
+                "query": query,
+                "mode": mode,
+            }
         )
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -251,15 +343,24 @@ def api_search_in_folder(folder_name):
         query = request.args.get("q", "").strip()
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
+        mode = request.args.get("mode", "name")
 
         if not query:
             return jsonify({"success": False, "message": "搜索关键词不能为空"}), 400
+        if mode not in SEARCH_MODES:
+            return jsonify({"success": False, "message": f"不支持的搜索模式: {mode}"}), 400
 
         results = gallery_service.search_images_in_folder(
-            folder_name, query, page, per_page
+            folder_name, query, page, per_page, mode=mode
         )
         return jsonify(
-            {"success": True, "data": results, "query": query, "folder": folder_name}
+            {
+                "success": True,
+                "data": results,
+                "query": query,
+                "folder": folder_name,
+                "mode": mode,
+            }
         )
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -282,6 +383,31 @@ def api_delete_files(folder_name):
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@gallery_bp.route("/api/folder/<path:folder_name>/export", methods=["POST"])
+@login_required
+def api_export_files(folder_name):
+    """API: 把选中的文件流式打包成 ZIP 下载"""
+    try:
+        data = request.get_json(silent=True) or {}
+        file_paths = data.get("files", [])
+        include_manifest = bool(data.get("include_manifest", False))
+
+        if not file_paths:
+            return jsonify({"success": False, "message": "没有选择要导出的文件"}), 400
+
+        export = gallery_service.prepare_export(folder_name, file_paths, include_manifest)
+        if not export["success"]:
+            return jsonify(export), 404
+
+        response = Response(stream_zip(export["entries"]), mimetype="application/zip")
+        archive_name = f"{os.path.basename(folder_name.rstrip('/')) or 'export'}.zip"
+        response.headers.set("Content-Disposition", "attachment", filename=archive_name)
+        response.headers["X-Export-Failed-Count"] = str(len(export["failed_files"]))
+        return response
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
 @gallery_bp.route("/api/backup/query")
 @login_required
 def api_backup_query():
@@ -380,12 +506,15 @@ def api_search_in_subfolders(parent_folder):
         query = request.args.get("q", "").strip()
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
+        mode = request.args.get("mode", "name")
 
         if not query:
             return jsonify({"success": False, "message": "搜索关键词不能为空"}), 400
+        if mode not in SEARCH_MODES:
+            return jsonify({"success": False, "message": f"不支持的搜索模式: {mode}"}), 400
 
         results = gallery_service.search_images_in_subfolders(
-            parent_folder, query, page, per_page
+            parent_folder, query, page, per_page, mode=mode
         )
         return jsonify(
             {
@@ -393,6 +522,7 @@ def api_search_in_subfolders(parent_folder):
                 "data": results,
                 "query": query,
                 "parent_folder": parent_folder,
+                "mode": mode,
             }
         )
     except Exception as e:
@@ -445,6 +575,38 @@ def api_find_images_by_name(parent_folder):
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@gallery_bp.route("/api/find-images-by-names/<path:parent_folder>", methods=["POST"])
+@login_required
+def api_find_images_by_names(parent_folder):
+    """API: 批量根据图片名称在所有子文件夹中查找匹配的图片"""
+    try:
+        data = request.get_json(silent=True) or {}
+        image_names = data.get("names", [])
+
+        if not isinstance(image_names, list) or not all(
+            isinstance(name, str) for name in image_names
+        ):
+            return jsonify({"success": False, "message": "names 必须是图片名称列表"}), 400
+
+        image_names = list(dict.fromkeys(name.strip() for name in image_names if name.strip()))
+        if not image_names:
+            return jsonify({"success": False, "message": "图片名称不能为空"}), 400
+
+        results = gallery_service.find_images_by_names_in_subfolders(
+            parent_folder, image_names
+        )
+        return jsonify(
+            {
+                "success": True,
+                "data": results,
+                "count": sum(len(images) for images in results.values()),
+                "parent_folder": parent_folder,
+            }
+        )
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
 @gallery_bp.route("/api/images-cross-folders-by-return/<path:parent_folder>")
 @login_required
 def api_images_cross_folders_by_return(parent_folder):
@@ -452,9 +614,10 @@ def api_images_cross_folders_by_return(parent_folder):
     try:
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 50, type=int)  # 跨文件夹查询默认更多图片
+        cursor = request.args.get("cursor") or None
 
         result = gallery_service.get_images_cross_folders_by_return(
-            parent_folder, page, per_page
+            parent_folder, page, per_page, cursor=cursor
         )
         return jsonify(
             {"success": True, "data": result, "parent_folder": parent_folder}
@@ -472,9 +635,12 @@ def api_search_in_selected_subfolders(parent_folder):
         subfolders_param = request.args.get("subfolders", "").strip()
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
+        mode = request.args.get("mode", "name")
 
         if not query:
             return jsonify({"success": False, "message": "搜索关键词不能为空"}), 400
+        if mode not in SEARCH_MODES:
+            return jsonify({"success": False, "message": f"不支持的搜索模式: {mode}"}), 400
 
         if not subfolders_param:
             return jsonify({"success": False, "message": "没有选择子文件夹"}), 400
@@ -488,7 +654,7 @@ def api_search_in_selected_subfolders(parent_folder):
             return jsonify({"success": False, "message": "没有有效的子文件夹选择"}), 400
 
         results = gallery_service.search_images_in_selected_subfolders(
-            parent_folder, query, selected_subfolders, page, per_page
+            parent_folder, query, selected_subfolders, page, per_page, mode=mode
         )
         return jsonify(
             {
@@ -497,6 +663,7 @@ def api_search_in_selected_subfolders(parent_folder):
                 "query": query,
                 "parent_folder": parent_folder,
                 "selected_subfolders": selected_subfolders,
+                "mode": mode,
             }
         )
     except Exception as e:
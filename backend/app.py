@@ -45,7 +45,11 @@ def create_app(config_name=None):
     # 加载配置
     app.config.from_object(config[config_name])
 
-    # 禁止静态文件长期缓存
+    # jsonify 使用 orjson / ujson（不可用时回退到标准库）
+    from backend.utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # 未带版本号的静态文件每次重新验证，带版本号的见 register_static_fingerprints
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
     # 初始化扩展
@@ -60,9 +64,56 @@ def create_app(config_name=None):
     
     # 注册模板过滤器
     register_template_filters(app)
+
+    # 静态资源 URL 附带文件版本号
+    register_static_fingerprints(app)
+
+    # JSON / HTML 响应按 Accept-Encoding 压缩
+    register_response_compression(app)
+
+    # 启动目录监听，保持图片索引常驻内存
+    start_folder_watcher()
+
+    # 启动收益率汇总索引的后台同步
+    start_factor_return_index()
+    start_description_index()
     
     return app, socketio
 
+def start_folder_watcher():
+    """启动目录监听服务"""
+    from backend.api.gallery_routes import gallery_service
+    from backend.services.folder_watcher_service import get_folder_watcher_service
+
+    try:
+        get_folder_watcher_service(gallery_service.images_root).start()
+    except Exception as e:
+        import logging
+
+        logging.getLogger(__name__).warning(f"启动目录监听失败: {e}")
+
+def start_factor_return_index():
+    """启动收益率汇总索引的后台同步"""
+    from backend.api.gallery_routes import gallery_service
+
+    try:
+        gallery_service.factor_return_index.start()
+    except Exception as e:
+        import logging
+
+        logging.getLogger(__name__).warning(f"启动收益率汇总索引同步失败: {e}")
+
+def start_description_index():
+    """启动描述全文索引的后台巡检"""
+    from backend.api.gallery_routes import gallery_service
+
+    try:
+        gallery_service.description_index.start()
+    except Exception as e:
+        import logging
+
+        logging.getLogger(__name__).warning(f"启动描述索引巡检失败: {e}")
+
 def register_blueprints(app):
     """注册蓝图"""
     from backend.api.gallery_routes import gallery_bp
@@ -100,6 +151,38 @@ def register_error_handlers(app):
                              title='访问被拒绝',
                              message='您没有权限访问此页面'), 403
 
+def register_static_fingerprints(app):
+    """url_for('static') 自动附带文件版本号（?v=），版本匹配时按不可变资源长期缓存"""
+    from flask import request
+    from backend.utils.http_cache import apply_cache_policy, file_version, is_current_version
+
+    @app.url_defaults
+    def add_static_version(endpoint, values):
+        if endpoint != 'static' or 'v' in values or 'filename' not in values:
+            return
+        try:
+            static_path = os.path.join(app.static_folder, values['filename'])
+            values['v'] = file_version(os.stat(static_path).st_mtime)
+        except OSError:
+            pass
+
+    @app.after_request
+    def cache_static_files(response):
+        if request.endpoint == 'static' and response.status_code in (200, 206, 304):
+            filename = (request.view_args or {}).get('filename', '')
+            static_path = os.path.join(app.static_folder, filename)
+            apply_cache_policy(response, is_current_version(static_path, request.args.get('v')))
+        return response
+
+def register_response_compression(app):
+    """超过阈值的 JSON / HTML 响应按 Accept-Encoding 使用 brotli 或 gzip 压缩"""
+    from flask import request
+    from backend.utils.compression import compress_response
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, request.accept_encodings)
+
 def register_template_filters(app):
     """注册模板过滤器"""
     
@@ -0,0 +1,139 @@
+"""
+相关性计算进程池
+高相关去重（full 模式）时每个候选因子都要与之前的全部因子比较，比较对象与保留 / 隐藏的判定无关，
+因此父进程把接下来的一批候选因子交给多个工作进程提前计算，每个候选因子一个任务；
+工作进程用 np.load(mmap_mode="r") 直接打开本地因子矩阵旁边保存的截面标准化结果，
+各进程通过操作系统页缓存共享同一份数据，不需要 pickle 大数组，也不需要每次运行重新导出；
+贪心判定、SQLite 断点和进度推送仍然由父进程按原顺序完成
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from backend.utils.correlation_kernel import prefix_mean_correlations
+
+logger = logging.getLogger(__name__)
+
+# 去重使用的工作进程数，0 或 1 表示在请求线程内计算
+DEDUPE_WORKERS = int(os.environ.get("GALLERY_DEDUPE_WORKERS", 0))
+# 每个工作进程一次分到的候选因子数，一批候选因子 = 工作进程数 × 该值；
+# 达到保留上限时最多多算一批
+DEDUPE_CANDIDATES_PER_WORKER = 2
+# 工作进程中保持打开的内存映射数量上限
+WORKER_MMAP_MAX_ENTRIES = 256
+
+# (截面标准化结果, 有效值掩码) 的 .npy 文件路径
+SharedPaths = Tuple[str, str]
+CorrelationTask = Tuple[SharedPaths, List[SharedPaths]]
+
+# 工作进程内：文件路径 -> 内存映射数组
+_worker_arrays: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+
+def _open_shared_array(path: str) -> np.ndarray:
+    array = _worker_arrays.get(path)
+    if array is not None:
+        _worker_arrays.move_to_end(path)
+        return array
+    array = np.load(path, mmap_mode="r")
+    _worker_arrays[path] = array
+    while len(_worker_arrays) > WORKER_MMAP_MAX_ENTRIES:
+        _worker_arrays.popitem(last=False)
+    return array
+
+
+def correlate_shared(candidate: SharedPaths, priors: List[SharedPaths]) -> List[float]:
+    """
+    在工作进程中计算候选因子与一组已处理因子的平均截面相关性
+
+    Args:
+        candidate: 候选因子的 (标准化截面, 有效值掩码) 文件路径
+        priors: 已处理因子的文件路径列表
+
+    Returns:
+        与 priors 一一对应的相关性，没有有效交易日时为 NaN
+    """
+    return prefix_mean_correlations(
+        _open_shared_array(candidate[0]),
+        _open_shared_array(candidate[1]),
+        [_open_shared_array(paths[0]) for paths in priors],
+        [_open_shared_array(paths[1]) for paths in priors],
+    ).tolist()
+
+
+class CorrelationPoolService:
+    """相关性计算进程池服务类"""
+
+    def __init__(self, workers: int = DEDUPE_WORKERS):
+        self.workers = max(0, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 1
+
+    @property
+    def block_size(self) -> int:
+        """一次提前计算的候选因子数"""
+        return self.workers * DEDUPE_CANDIDATES_PER_WORKER
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # 应用以多线程方式运行，fork 会复制其他线程持有的锁，工作进程用 spawn 启动
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def correlate_tasks(self, tasks: List[CorrelationTask]) -> Optional[List[List[float]]]:
+        """
+        并行计算一批候选因子各自与其已处理因子的平均截面相关性
+
+        Returns:
+            与 tasks 一一对应的结果；进程池不可用或任务失败时返回 None，由调用方在当前线程计算
+        """
+        try:
+            executor = self._get_executor()
+            futures = [
+                executor.submit(correlate_shared, candidate, priors)
+                for candidate, priors in tasks
+            ]
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # 工作进程异常退出后进程池不可再用，下次提交时重建
+            self._executor = None
+            logger.warning("去重工作进程异常退出，本批改为单进程计算")
+        except RuntimeError as e:
+            # 进程池已关闭（解释器正在退出）时不再接受任务
+            if "shutdown" not in str(e):
+                logger.warning(f"提交去重相关性任务失败，本批改为单进程计算: {e}")
+        except Exception as e:
+            logger.warning(f"去重相关性任务失败，本批改为单进程计算: {e}")
+        return None
+
+
+# 全局实例
+_correlation_pool_service: Optional[CorrelationPoolService] = None
+_correlation_pool_service_lock = threading.Lock()
+
+
+def get_correlation_pool_service() -> CorrelationPoolService:
+    """获取全局相关性计算进程池服务实例"""
+    global _correlation_pool_service
+    if _correlation_pool_service is None:
+        with _correlation_pool_service_lock:
+            if _correlation_pool_service is None:
+                _correlation_pool_service = CorrelationPoolService()
+    return _correlation_pool_service
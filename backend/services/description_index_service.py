@@ -0,0 +1,569 @@
+"""
+描述全文索引服务
+把各目录的图片描述（.descriptions.json / descriptions.json / 单图 <name>.json）和文件夹描述
+（folder_info.md、README.md 等）写入目录索引数据库中的 SQLite FTS5 表（trigram 分词，中英文都可以按子串匹配），
+支持按描述文字搜索图片并按相关度排序、生成摘要；含汉字的描述同时索引全拼和首字母，可以用拼音检索；
+描述文件的 (mtime_ns, size) 发生变化时整目录重建，设置描述后立即同步，后台线程定期巡检外部修改
+"""
+
+import html
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from backend.services.image_catalog_service import (
+    ImageCatalogService,
+    get_image_catalog_service,
+)
+from backend.utils.pinyin_utils import SEARCH_TEXT_SEPARATOR, pinyin_keys
+
+# 图片描述映射文件（按顺序取第一个存在的）
+IMAGE_DESCRIPTION_MAP_FILES = (".descriptions.json", "descriptions.json")
+# 文件夹描述文件（folder_info.md为主，README.md等为备选）
+FOLDER_DESCRIPTION_FILES = (
+    "folder_info.md",
+    "README.md",
+    "readme.md",
+    "description.txt",
+    "desc.txt",
+)
+# 后台巡检描述文件的间隔（秒）；描述文件原地修改不会改变目录 mtime，只能靠定期比较文件时间戳
+DESCRIPTION_RESCAN_INTERVAL = float(
+    os.environ.get("GALLERY_DESCRIPTION_RESCAN_INTERVAL", 300)
+)
+# trigram 分词只能匹配至少 3 个字符的关键词，更短的关键词改用 instr 过滤
+FTS_MIN_KEYWORD_LENGTH = 3
+# 摘要在首个命中位置前后保留的字符数
+SNIPPET_CONTEXT_CHARS = 30
+
+logger = logging.getLogger(__name__)
+
+
+def read_description_map(folder_path: Path) -> Dict[str, str]:
+    """读取文件夹级图片描述映射（.descriptions.json 优先，其次 descriptions.json）"""
+    try:
+        for file_name in IMAGE_DESCRIPTION_MAP_FILES:
+            desc_file = folder_path / file_name
+            if desc_file.exists():
+                with open(desc_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                return data if isinstance(data, dict) else {}
+        return {}
+    except Exception as e:
+        logger.error(f"读取图片描述映射失败 {folder_path}: {e}")
+        return {}
+
+
+def read_individual_description(desc_file: Path) -> Optional[str]:
+    """读取单图描述文件 <name>.json，内容可以是字符串或含 description/desc/text 的对象"""
+    try:
+        with open(desc_file, "r", encoding="utf-8") as f:
+            desc_data = json.load(f)
+        if isinstance(desc_data, str):
+            return desc_data
+        if isinstance(desc_data, dict):
+            return (
+                desc_data.get("description")
+                or desc_data.get("desc")
+                or desc_data.get("text")
+            )
+    except Exception as e:
+        logger.error(f"读取单图描述失败 {desc_file}: {e}")
+    return None
+
+
+def build_snippet(
+    text: str, keywords: List[str], context_chars: int = SNIPPET_CONTEXT_CHARS
+) -> str:
+    """
+    截取描述中首个命中关键词附近的文字，命中部分用 <mark> 包裹（其余内容已做 HTML 转义）
+
+    Args:
+        text: 描述原文
+        keywords: 小写关键词
+        context_chars: 命中位置前后保留的字符数
+    """
+    text = " ".join(text.split())
+    text_lower = text.lower()
+    hits = sorted(
+        (position, position + len(keyword))
+        for keyword in keywords
+        if keyword
+        for position in [text_lower.find(keyword)]
+        if position >= 0
+    )
+    first = hits[0][0] if hits else 0
+    start = max(0, first - context_chars)
+    end = min(len(text), (hits[0][1] if hits else 0) + context_chars * 2)
+
+    # 窗口内的全部命中区间（合并重叠部分）
+    ranges: List[List[int]] = []
+    for keyword in keywords:
+        if not keyword:
+            continue
+        position = text_lower.find(keyword, start)
+        while 0 <= position < end:
+            ranges.append([position, min(position + len(keyword), end)])
+            position = text_lower.find(keyword, position + 1)
+    ranges.sort()
+    merged: List[List[int]] = []
+    for range_start, range_end in ranges:
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+
+    parts = ["…" if start > 0 else ""]
+    cursor = start
+    for range_start, range_end in merged:
+        parts.append(html.escape(text[cursor:range_start]))
+        parts.append(f"<mark>{html.escape(text[range_start:range_end])}</mark>")
+        cursor = range_end
+    parts.append(html.escape(text[cursor:end]))
+    parts.append("…" if end < len(text) else "")
+    return "".join(parts)
+
+
+def _fts_phrase(keyword: str) -> str:
+    """把关键词转换成 FTS5 短语（双引号内的双引号需要重复）"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+class DescriptionIndexService:
+    """描述全文索引服务类"""
+
+    def __init__(self, catalog: ImageCatalogService):
+        self.catalog = catalog
+        self.images_root = catalog.images_root
+        self.db_file = catalog.db_file
+        self._db_lock = threading.RLock()
+        self._db_initialized = False
+        self.fts_enabled = True
+        self._sync_lock = threading.Lock()
+        self._dirty_dirs: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._listening = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_schema(self) -> None:
+        """只在进程内初始化一次表结构；SQLite 不支持 FTS5 trigram 分词时退化为普通表逐行匹配"""
+        if self._db_initialized:
+            return
+
+        with self._db_lock:
+            if self._db_initialized:
+                return
+
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                columns = [
+                    row[1] for row in conn.execute("PRAGMA table_info(description_fts)")
+                ]
+                if columns and "pinyin" not in columns:
+                    # 旧版本表没有拼音列，FTS5 表不能加列，整表重建
+                    conn.execute("DROP TABLE description_fts")
+                    conn.execute("DROP TABLE IF EXISTS description_sources")
+                try:
+                    conn.execute(
+                        """
+                        CREATE VIRTUAL TABLE IF NOT EXISTS description_fts USING fts5(
+                            folder UNINDEXED,
+                            filename UNINDEXED,
+                            description,
+                            pinyin,
+                            tokenize = 'trigram'
+                        )
+                        """
+                    )
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"SQLite 不支持 FTS5 trigram 分词，描述搜索改为逐行匹配: {e}")
+                    self.fts_enabled = False
+                    conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS description_fts (
+                            folder TEXT NOT NULL,
+                            filename TEXT NOT NULL,
+                            description TEXT NOT NULL,
+                            pinyin TEXT NOT NULL
+                        )
+                        """
+                    )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS description_sources (
+                        folder TEXT PRIMARY KEY,
+                        source_stamp TEXT NOT NULL,
+                        entry_count INTEGER NOT NULL,
+                        synced_at TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.commit()
+                self._db_initialized = True
+            finally:
+                conn.close()
+
+    def _open_db(self) -> sqlite3.Connection:
+        self._ensure_schema()
+        conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _candidate_files(self, names: Iterable[str]) -> List[str]:
+        """目录中可能含有描述的文件：描述映射、文件夹描述，以及与图片同名的 .json"""
+        names = set(names)
+        image_stems = set()
+        for name in names:
+            stem, dot, extension = name.rpartition(".")
+            if dot and f".{extension.lower()}" != ".json":
+                image_stems.add(stem)
+        candidates = [
+            name
+            for name in IMAGE_DESCRIPTION_MAP_FILES + FOLDER_DESCRIPTION_FILES
+            if name in names
+        ]
+        candidates.extend(
+            sorted(
+                name
+                for name in names
+                if name.lower().endswith(".json")
+                and name[: -len(".json")] in image_stems
+                and name not in IMAGE_DESCRIPTION_MAP_FILES
+            )
+        )
+        return candidates
+
+    def _source_stamp(self, folder_path: Path, candidates: List[str]) -> str:
+        """描述文件的 (文件名, mtime_ns, size)，直接 stat 以便发现原地修改"""
+        stamp = []
+        for name in candidates:
+            try:
+                file_stat = (folder_path / name).stat()
+            except OSError:
+                continue
+            stamp.append([name, file_stat.st_mtime_ns, file_stat.st_size])
+        return json.dumps(stamp, ensure_ascii=False)
+
+    def _read_entries(self, folder_path: Path, records: List[Dict]) -> List[Tuple[str, str]]:
+        """
+        按 get_image_description / _get_folder_description 的优先级读取目录的有效描述
+
+        Returns:
+            [(filename, description)]，文件夹描述的 filename 为空字符串
+        """
+        names = {record["name"] for record in records}
+        entries: List[Tuple[str, str]] = []
+
+        for name in FOLDER_DESCRIPTION_FILES:
+            if name in names:
+                try:
+                    with open(folder_path / name, "r", encoding="utf-8") as f:
+                        content = f.read().strip()
+                except OSError as e:
+                    logger.debug(f"读取文件夹描述失败 {folder_path / name}: {e}")
+                    continue
+                if content:
+                    entries.append(("", content))
+                break
+
+        descriptions = read_description_map(folder_path)
+        for record in records:
+            if not record["is_image"]:
+                continue
+            filename = record["name"]
+            if filename in descriptions:
+                description = descriptions.get(filename)
+            else:
+                desc_name = f"{filename.rsplit('.', 1)[0]}.json"
+                description = (
+                    read_individual_description(folder_path / desc_name)
+                    if desc_name in names
+                    else None
+                )
+            if isinstance(description, str) and description.strip():
+                entries.append((filename, description.strip()))
+        return entries
+
+    def sync_folder(self, rel_dir: str, force: bool = False) -> Optional[bool]:
+        """
+        同步单个目录（不含子目录）的描述，描述文件时间戳未变化时跳过
+
+        Returns:
+            是否重建了该目录的记录；目录不在目录索引中时返回 None
+        """
+        records = self.catalog.get_directory_files(rel_dir)
+        with self._sync_lock:
+            conn = self._open_db()
+            try:
+                if records is None:
+                    self._delete_folder(conn, rel_dir)
+                    conn.commit()
+                    return None
+
+                folder_path = self.images_root / rel_dir if rel_dir else self.images_root
+                candidates = self._candidate_files(record["name"] for record in records)
+                stamp = self._source_stamp(folder_path, candidates)
+                if not force:
+                    row = conn.execute(
+                        "SELECT source_stamp FROM description_sources WHERE folder = ?",
+                        (rel_dir,),
+                    ).fetchone()
+                    if row is not None and row["source_stamp"] == stamp:
+                        return False
+
+                entries = self._read_entries(folder_path, records) if candidates else []
+                conn.execute("DELETE FROM description_fts WHERE folder = ?", (rel_dir,))
+                conn.executemany(
+                    """
+                    INSERT INTO description_fts (folder, filename, description, pinyin)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (
+                        (
+                            rel_dir,
+                            filename,
+                            description,
+                            SEARCH_TEXT_SEPARATOR.join(pinyin_keys(description)),
+                        )
+                        for filename, description in entries
+                    ),
+                )
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO description_sources (
+                        folder, source_stamp, entry_count, synced_at
+                    ) VALUES (?, ?, ?, ?)
+                    """,
+                    (rel_dir, stamp, len(entries), datetime.now().isoformat()),
+                )
+                conn.commit()
+                return True
+            finally:
+                conn.close()
+
+    def _delete_folder(self, conn: sqlite3.Connection, rel_dir: str) -> None:
+        conn.execute("DELETE FROM description_fts WHERE folder = ?", (rel_dir,))
+        conn.execute("DELETE FROM description_sources WHERE folder = ?", (rel_dir,))
+
+    def sync_tree(self, rel_dir: str = "", only_missing: bool = False) -> Dict[str, int]:
+        """
+        同步目录树下的全部目录，并删除已不在目录索引中的目录记录
+
+        Args:
+            rel_dir: 子树根目录，空字符串表示全部
+            only_missing: 只同步尚未建立过记录的目录（首次搜索时使用，已有记录交给后台巡检）
+        """
+        stats = {"checked": 0, "synced": 0, "removed": 0}
+        current_dirs = self.catalog.list_subtree_dirs(rel_dir)
+        if current_dirs is None:
+            # 目录索引尚未建立该子树，不能据此删除已有记录
+            return stats
+
+        conn = self._open_db()
+        try:
+            if rel_dir:
+                rows = conn.execute(
+                    """
+                    SELECT folder FROM description_sources
+                    WHERE folder = ? OR substr(folder, 1, ?) = ?
+                    """,
+                    (rel_dir, len(rel_dir) + 1, f"{rel_dir}/"),
+                )
+            else:
+                rows = conn.execute("SELECT folder FROM description_sources")
+            known = {row["folder"] for row in rows}
+        finally:
+            conn.close()
+
+        for folder in current_dirs:
+            if self._stop_event.is_set():
+                break
+            if only_missing and folder in known:
+                continue
+            stats["checked"] += 1
+            try:
+                if self.sync_folder(folder):
+                    stats["synced"] += 1
+            except Exception as e:
+                logger.warning(f"同步描述索引失败 {folder}: {e}")
+
+        stale = known - set(current_dirs)
+        if stale:
+            with self._sync_lock:
+                conn = self._open_db()
+                try:
+                    for folder in stale:
+                        self._delete_folder(conn, folder)
+                    conn.commit()
+                finally:
+                    conn.close()
+            stats["removed"] = len(stale)
+
+        if stats["synced"] or stats["removed"]:
+            logger.debug(f"描述索引已同步 {rel_dir or '/'}: {stats}")
+        return stats
+
+    def mark_dirty(self, rel_dirs: Iterable[str]) -> None:
+        """目录索引变化回调：发生变化的目录在下次搜索前或下一轮后台同步时重建"""
+        with self._dirty_lock:
+            self._dirty_dirs.update(rel_dirs)
+
+    def _sync_dirty(self) -> None:
+        with self._dirty_lock:
+            dirty = sorted(self._dirty_dirs)
+            self._dirty_dirs.clear()
+        for rel_dir in dirty:
+            try:
+                self.sync_folder(rel_dir)
+            except Exception as e:
+                logger.warning(f"同步描述索引失败 {rel_dir}: {e}")
+
+    def _ensure_listening(self) -> None:
+        if self._listening:
+            return
+        with self._dirty_lock:
+            if self._listening:
+                return
+            self.catalog.add_change_listener(self.mark_dirty)
+            self._listening = True
+
+    def search(
+        self,
+        folder_path: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+    ) -> Optional[List[Dict]]:
+        """
+        在目录树中按描述文字搜索
+
+        Args:
+            folder_path: 搜索范围（绝对路径）
+            include_keywords: 小写包含关键词，描述（或其全拼、首字母）必须全部包含
+            exclude_keywords: 小写排除关键词，描述原文（忽略大小写）不能包含任何一个，不按全拼、首字母匹配
+
+        Returns:
+            [{"folder", "filename", "description", "score"}]，按相关度从高到低排列，
+            filename 为空字符串表示文件夹描述；目录索引尚未建立时返回 None，由调用方回退实时扫描
+        """
+        rel_dir = self.catalog.ensure_fresh(folder_path)
+        if rel_dir is None:
+            return None
+
+        self._ensure_listening()
+        self._sync_dirty()
+        self.sync_tree(rel_dir, only_missing=True)
+
+        conditions = []
+        params: List = []
+        fts_keywords = [
+            keyword
+            for keyword in include_keywords
+            if self.fts_enabled and len(keyword) >= FTS_MIN_KEYWORD_LENGTH
+        ]
+        if fts_keywords:
+            conditions.append("description_fts MATCH ?")
+            params.append(" AND ".join(_fts_phrase(keyword) for keyword in fts_keywords))
+        for keyword in include_keywords:
+            if keyword not in fts_keywords:
+                conditions.append(
+                    "(instr(lower(description), ?) > 0 OR instr(pinyin, ?) > 0)"
+                )
+                params.extend([keyword, keyword])
+        for keyword in exclude_keywords:
+            if self.fts_enabled and len(keyword) >= FTS_MIN_KEYWORD_LENGTH:
+                # 只匹配 description 列，排除不扩大到拼音
+                conditions.append(
+                    "rowid NOT IN (SELECT rowid FROM description_fts WHERE description_fts MATCH ?)"
+                )
+                params.append(f"description : {_fts_phrase(keyword)}")
+            else:
+                conditions.append("instr(lower(description), ?) = 0")
+                params.append(keyword)
+        if rel_dir:
+            conditions.append("(folder = ? OR substr(folder, 1, ?) = ?)")
+            params.extend([rel_dir, len(rel_dir) + 1, f"{rel_dir}/"])
+
+        # bm25 越小越相关，取反后作为得分
+        score_expr = "-bm25(description_fts)" if fts_keywords else "0.0"
+        sql = f"""
+            SELECT folder, filename, description, pinyin, {score_expr} AS score
+            FROM description_fts
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            ORDER BY score DESC, folder, filename
+        """
+        conn = self._open_db()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        # lower() 只处理 ASCII，非 ASCII 关键词交给 Python 再确认一次
+        results = []
+        for row in rows:
+            description_lower = row["description"].lower()
+            search_text = SEARCH_TEXT_SEPARATOR.join((description_lower, row["pinyin"]))
+            if not all(keyword in search_text for keyword in include_keywords):
+                continue
+            if any(keyword in description_lower for keyword in exclude_keywords):
+                continue
+            results.append(
+                {
+                    "folder": row["folder"],
+                    "filename": row["filename"],
+                    "description": row["description"],
+                    "score": float(row["score"]),
+                }
+            )
+        return results
+
+    def _run(self) -> None:
+        last_full_sync = 0.0
+        while not self._stop_event.wait(1.0):
+            now = time.monotonic()
+            if now - last_full_sync >= DESCRIPTION_RESCAN_INTERVAL:
+                last_full_sync = now
+                with self._dirty_lock:
+                    self._dirty_dirs.clear()
+                self.sync_tree()
+                continue
+            self._sync_dirty()
+
+    def start(self) -> None:
+        """启动后台巡检线程"""
+        if self._thread is not None or DESCRIPTION_RESCAN_INTERVAL <= 0:
+            return
+        self._ensure_listening()
+        self._thread = threading.Thread(
+            target=self._run, name="description-index", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+# 全局实例（按图片根目录区分）
+_description_index_services: Dict[str, DescriptionIndexService] = {}
+_description_index_services_guard = threading.Lock()
+
+
+def get_description_index_service(images_root: Path) -> DescriptionIndexService:
+    """获取全局描述全文索引服务实例"""
+    key = str(Path(images_root))
+    with _description_index_services_guard:
+        service = _description_index_services.get(key)
+        if service is None:
+            service = DescriptionIndexService(get_image_catalog_service(images_root))
+            _description_index_services[key] = service
+        return service
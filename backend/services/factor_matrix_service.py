@@ -0,0 +1,473 @@
+"""
+因子矩阵存储
+把 parquet 因子数据转换成 float32 的 .npy 矩阵保存在本地，行列对齐到共享的全局 日期 × 股票 坐标轴；
+以源 parquet 的 (mtime_ns, size) 为版本，未变化时直接 np.load(mmap_mode="r")，
+重复的去重运行和并发的工作进程通过操作系统页缓存共享数据，不再经网络重新读取 parquet；
+_fold 因子保存 rank + 均值距离处理之后的结果，处理只做一次；
+一对多批量比较需要的截面标准化结果在第一次请求时计算，以 <矩阵>.<源文件版本>.standardized/valid.npy 保存在矩阵旁边，
+同样以内存映射打开
+
+坐标轴只追加不重排：新因子带来的日期 / 股票追加到末尾，已写入的矩阵不需要改写。
+矩阵的行列覆盖写入时坐标轴的全部前缀，因子没有数据的日期为整行 NaN，
+因此同一时期写入的因子日期索引完全相同；不同时期写入的矩阵截取共同前缀后同样可以批量比较
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config.settings import CACHE_DIR
+from backend.utils import correlation_utils
+from backend.utils.correlation_kernel import standardize_cross_sections
+
+logger = logging.getLogger(__name__)
+
+# on / off：关闭后每次都直接读取 parquet
+FACTOR_MATRIX_STORE_ENABLED = os.environ.get(
+    "GALLERY_FACTOR_MATRIX_STORE", "on"
+).lower() not in ("0", "off", "false")
+FACTOR_MATRIX_DIR = Path(
+    os.environ.get("GALLERY_FACTOR_MATRIX_DIR", str(CACHE_DIR / "factor_matrices"))
+)
+# 索引与矩阵文件放在同一目录，整体删除即可清空
+FACTOR_MATRIX_DB_NAME = "index.db"
+# 坐标轴名称
+DATE_AXIS = "date"
+STOCK_AXIS = "stock"
+
+
+def _axis_kind(index: pd.Index) -> str:
+    if pd.api.types.is_datetime64_any_dtype(index):
+        return "datetime"
+    if pd.api.types.is_integer_dtype(index):
+        return "int"
+    return "str"
+
+
+def _encode_axis_values(index: pd.Index, kind: str) -> List[str]:
+    if kind == "datetime":
+        return [value.isoformat() for value in index]
+    return [str(value) for value in index]
+
+
+def _decode_axis_values(values: List[str], kind: str) -> pd.Index:
+    if kind == "datetime":
+        return pd.DatetimeIndex(pd.to_datetime(values))
+    if kind == "int":
+        return pd.Index(np.asarray(values, dtype=np.int64))
+    return pd.Index(values)
+
+
+class FactorMatrixService:
+    """因子矩阵存储服务类"""
+
+    def __init__(
+        self,
+        root_dir: Path = FACTOR_MATRIX_DIR,
+        enabled: bool = FACTOR_MATRIX_STORE_ENABLED,
+    ):
+        self.root_dir = Path(root_dir)
+        self.db_file = self.root_dir / FACTOR_MATRIX_DB_NAME
+        self.enabled = enabled
+        self._db_lock = threading.RLock()
+        self._db_initialized = False
+        # 坐标轴：名称 -> (类型, 编码后的值列表, 值 -> 位置)
+        self._axes: Dict[str, Tuple[Optional[str], List[str], Dict[str, int]]] = {
+            DATE_AXIS: (None, [], {}),
+            STOCK_AXIS: (None, [], {}),
+        }
+        # (坐标轴, 长度) -> pd.Index，同一长度的因子共用同一个索引对象
+        self._index_cache: Dict[Tuple[str, int], pd.Index] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.conversions = 0
+
+    def _ensure_schema(self) -> None:
+        """只在进程内初始化一次表结构"""
+        if self._db_initialized:
+            return
+
+        with self._db_lock:
+            if self._db_initialized:
+                return
+
+            self.root_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS axis_kinds (
+                        axis TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS axis_values (
+                        axis TEXT NOT NULL,
+                        position INTEGER NOT NULL,
+                        value TEXT NOT NULL,
+                        PRIMARY KEY (axis, position)
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS factor_matrices (
+                        factor_version TEXT NOT NULL,
+                        factor_name TEXT NOT NULL,
+                        source_mtime_ns INTEGER NOT NULL,
+                        source_size INTEGER NOT NULL,
+                        rows INTEGER NOT NULL,
+                        cols INTEGER NOT NULL,
+                        file_name TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        PRIMARY KEY (factor_version, factor_name)
+                    )
+                    """
+                )
+                conn.commit()
+                self._db_initialized = True
+            finally:
+                conn.close()
+
+    def _open_db(self) -> sqlite3.Connection:
+        self._ensure_schema()
+        conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _source_path(self, factor_version: str, factor_name: str) -> Path:
+        """_fold 因子由原始因子的 parquet 计算得到"""
+        return (
+            Path(correlation_utils.FACTOR_DATA_ROOT)
+            / factor_version
+            / f"{correlation_utils.get_original_name(factor_name)}.parquet"
+        )
+
+    def _matrix_path(self, file_name: str) -> Path:
+        return self.root_dir / file_name
+
+    def _companion_paths(self, file_name: str, stamp: Tuple[int, int]) -> Tuple[Path, Path]:
+        """截面标准化结果的文件路径，文件名带源文件版本，矩阵重建后旧文件不会被误用"""
+        prefix = f"{Path(file_name).stem}.{stamp[0]}-{stamp[1]}"
+        return (
+            self.root_dir / f"{prefix}.standardized.npy",
+            self.root_dir / f"{prefix}.valid.npy",
+        )
+
+    def _remove_companions(self, file_name: str) -> None:
+        for path in self.root_dir.glob(f"{Path(file_name).stem}.*.*.npy"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _save_array(self, target: Path, array: np.ndarray) -> None:
+        """先写临时文件再替换，已经打开的内存映射仍指向旧文件，不受替换影响"""
+        temp_path = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(temp_path, target)
+        except Exception:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+    def _source_stamp(self, factor_version: str, factor_name: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat_result = os.stat(self._source_path(factor_version, factor_name))
+        except OSError:
+            return None
+        return stat_result.st_mtime_ns, stat_result.st_size
+
+    def _sync_axis(self, conn: sqlite3.Connection, axis: str) -> None:
+        """读入其他进程追加的坐标轴取值（调用方持有 self._lock）"""
+        kind, values, positions = self._axes[axis]
+        if kind is None:
+            row = conn.execute(
+                "SELECT kind FROM axis_kinds WHERE axis = ?", (axis,)
+            ).fetchone()
+            kind = row[0] if row else None
+        rows = conn.execute(
+            "SELECT position, value FROM axis_values WHERE axis = ? AND position >= ? ORDER BY position",
+            (axis, len(values)),
+        ).fetchall()
+        for position, value in rows:
+            positions[value] = position
+            values.append(value)
+        self._axes[axis] = (kind, values, positions)
+
+    def _get_index(self, axis: str, length: int) -> pd.Index:
+        key = (axis, length)
+        with self._lock:
+            index = self._index_cache.get(key)
+            if index is None:
+                kind, values, _ = self._axes[axis]
+                index = _decode_axis_values(values[:length], kind)
+                self._index_cache[key] = index
+            return index
+
+    def _assign_positions(
+        self, conn: sqlite3.Connection, axis: str, index: pd.Index
+    ) -> Optional[np.ndarray]:
+        """
+        取得索引在全局坐标轴上的位置，新值追加到末尾（调用方持有 self._lock 并已开启写事务）
+
+        Returns:
+            位置数组；类型与坐标轴不一致或索引有重复值时返回 None
+        """
+        if index.has_duplicates:
+            return None
+        self._sync_axis(conn, axis)
+        kind, values, positions = self._axes[axis]
+        index_kind = _axis_kind(index)
+        if kind is None:
+            conn.execute(
+                "INSERT INTO axis_kinds (axis, kind) VALUES (?, ?)", (axis, index_kind)
+            )
+            kind = index_kind
+            self._axes[axis] = (kind, values, positions)
+        elif kind != index_kind:
+            return None
+
+        encoded = _encode_axis_values(index, kind)
+        new_values = [value for value in encoded if value not in positions]
+        if new_values:
+            start = len(values)
+            conn.executemany(
+                "INSERT INTO axis_values (axis, position, value) VALUES (?, ?, ?)",
+                [(axis, start + offset, value) for offset, value in enumerate(new_values)],
+            )
+            for offset, value in enumerate(new_values):
+                positions[value] = start + offset
+                values.append(value)
+        return np.fromiter((positions[value] for value in encoded), dtype=np.int64, count=len(encoded))
+
+    def axis_prefix(self, df: pd.DataFrame) -> Optional[Tuple[int, int]]:
+        """
+        load 返回的矩阵的 (行数, 列数)：行列都是全局坐标轴的前缀，形状不同的矩阵截取共同前缀即可对齐；
+        其他 DataFrame 返回 None
+        """
+        rows, cols = df.shape
+        with self._lock:
+            if (
+                self._index_cache.get((DATE_AXIS, rows)) is df.index
+                and self._index_cache.get((STOCK_AXIS, cols)) is df.columns
+            ):
+                return rows, cols
+        return None
+
+    def _build_frame(self, values: np.ndarray, rows: int, cols: int) -> pd.DataFrame:
+        return pd.DataFrame(
+            values,
+            index=self._get_index(DATE_AXIS, rows),
+            columns=self._get_index(STOCK_AXIS, cols),
+            copy=False,
+        )
+
+    def _open_stored(
+        self, conn: sqlite3.Connection, factor_version: str, factor_name: str, stamp: Tuple[int, int]
+    ) -> Optional[pd.DataFrame]:
+        row = conn.execute(
+            """
+            SELECT source_mtime_ns, source_size, rows, cols, file_name
+            FROM factor_matrices WHERE factor_version = ? AND factor_name = ?
+            """,
+            (factor_version, factor_name),
+        ).fetchone()
+        if row is None or (row[0], row[1]) != stamp:
+            return None
+
+        try:
+            values = np.load(self._matrix_path(row[4]), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if values.shape != (row[2], row[3]):
+            return None
+
+        with self._lock:
+            if len(self._axes[DATE_AXIS][1]) < row[2] or len(self._axes[STOCK_AXIS][1]) < row[3]:
+                self._sync_axis(conn, DATE_AXIS)
+                self._sync_axis(conn, STOCK_AXIS)
+        return self._build_frame(values, row[2], row[3])
+
+    def _store(
+        self,
+        conn: sqlite3.Connection,
+        factor_version: str,
+        factor_name: str,
+        stamp: Tuple[int, int],
+        df: pd.DataFrame,
+    ) -> Optional[pd.DataFrame]:
+        """把处理后的因子写成对齐到全局坐标轴的矩阵；无法对齐时返回 None"""
+        with self._lock:
+            # 写事务保证多进程追加坐标轴时位置不冲突
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row_positions = self._assign_positions(conn, DATE_AXIS, df.index)
+                col_positions = self._assign_positions(conn, STOCK_AXIS, df.columns)
+                if row_positions is None or col_positions is None:
+                    conn.rollback()
+                    return None
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                # 回滚后内存中的坐标轴可能多出未提交的值，下次从数据库重新读取
+                self._axes = {axis: (None, [], {}) for axis in self._axes}
+                self._index_cache.clear()
+                raise
+            rows = len(self._axes[DATE_AXIS][1])
+            cols = len(self._axes[STOCK_AXIS][1])
+
+        values = df.to_numpy(dtype=np.float32)
+        matrix = np.full((rows, cols), np.nan, dtype=np.float32)
+        if np.array_equal(row_positions, np.arange(len(row_positions))) and np.array_equal(
+            col_positions, np.arange(len(col_positions))
+        ):
+            matrix[: len(row_positions), : len(col_positions)] = values
+        else:
+            matrix[np.ix_(row_positions, col_positions)] = values
+
+        file_name = (
+            hashlib.sha1(f"{factor_version}\0{factor_name}".encode("utf-8")).hexdigest()
+            + ".npy"
+        )
+        target = self._matrix_path(file_name)
+        self._save_array(target, matrix)
+        self._remove_companions(file_name)
+
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO factor_matrices (
+                factor_version, factor_name, source_mtime_ns, source_size,
+                rows, cols, file_name, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                factor_version,
+                factor_name,
+                stamp[0],
+                stamp[1],
+                rows,
+                cols,
+                file_name,
+                datetime.now().isoformat(),
+            ),
+        )
+        conn.commit()
+        return self._build_frame(np.load(target, mmap_mode="r"), rows, cols)
+
+    def load(self, factor_version: str, factor_name: str) -> Optional[pd.DataFrame]:
+        """
+        读取处理后的因子矩阵（值为只读的 float32 内存映射），首次使用或源文件变化时转换并保存
+
+        Returns:
+            行列为全局坐标轴前缀的 DataFrame；未启用、源 parquet 不存在时返回 None，
+            由调用方回退到 load_and_process_factor
+        """
+        if not self.enabled:
+            return None
+        stamp = self._source_stamp(factor_version, factor_name)
+        if stamp is None:
+            return None
+
+        try:
+            conn = self._open_db()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"打开因子矩阵索引失败: {e}")
+            return None
+
+        try:
+            stored = self._open_stored(conn, factor_version, factor_name, stamp)
+            if stored is not None:
+                self.hits += 1
+                return stored
+
+            df = correlation_utils.load_and_process_factor(factor_version, factor_name)
+            if df is None:
+                return None
+            try:
+                stored = self._store(conn, factor_version, factor_name, stamp, df)
+            except (OSError, sqlite3.Error, ValueError, TypeError) as e:
+                logger.warning(f"保存因子矩阵失败 {factor_name}@{factor_version}: {e}")
+                return df
+            if stored is None:
+                logger.debug(f"因子坐标轴与全局坐标轴不兼容，不保存: {factor_name}@{factor_version}")
+                return df
+            self.conversions += 1
+            return stored
+        finally:
+            conn.close()
+
+    def standardized_paths(
+        self, factor_version: str, factor_name: str
+    ) -> Optional[Tuple[str, str]]:
+        """
+        已保存矩阵的截面标准化结果 (standardized, valid) 文件路径，第一次请求时由矩阵计算并保存
+
+        Returns:
+            源文件当前版本的矩阵尚未保存（未启用、源文件不存在或无法对齐）时返回 None
+        """
+        if not self.enabled:
+            return None
+        stamp = self._source_stamp(factor_version, factor_name)
+        if stamp is None:
+            return None
+
+        try:
+            conn = self._open_db()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"打开因子矩阵索引失败: {e}")
+            return None
+        try:
+            row = conn.execute(
+                """
+                SELECT source_mtime_ns, source_size, file_name
+                FROM factor_matrices WHERE factor_version = ? AND factor_name = ?
+                """,
+                (factor_version, factor_name),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or (row[0], row[1]) != stamp:
+            return None
+
+        standardized_path, valid_path = self._companion_paths(row[2], stamp)
+        if not (standardized_path.exists() and valid_path.exists()):
+            try:
+                values = np.load(self._matrix_path(row[2]), mmap_mode="r")
+                standardized, valid = standardize_cross_sections(values)
+                self._save_array(standardized_path, standardized)
+                self._save_array(valid_path, valid)
+            except (OSError, ValueError) as e:
+                logger.warning(f"保存截面标准化结果失败 {factor_name}@{factor_version}: {e}")
+                return None
+        return str(standardized_path), str(valid_path)
+
+
+# 全局实例
+_factor_matrix_service: Optional[FactorMatrixService] = None
+_factor_matrix_service_lock = threading.Lock()
+
+
+def get_factor_matrix_service() -> FactorMatrixService:
+    """获取全局因子矩阵存储服务实例"""
+    global _factor_matrix_service
+    if _factor_matrix_service is None:
+        with _factor_matrix_service_lock:
+            if _factor_matrix_service is None:
+                _factor_matrix_service = FactorMatrixService()
+    return _factor_matrix_service
@@ -0,0 +1,346 @@
+"""
+因子收益率汇总索引服务
+把各子文件夹的 neu_rets.db / neu_rets.json 汇总到目录索引数据库的 factor_returns_index 表，
+按 (父文件夹, 收益率) 建索引，跨子文件夹收益率排序的首屏可以用一条 ORDER BY ... LIMIT 查询并关联目录索引取得；
+后台线程按收益率文件的 (mtime_ns, size) 增量同步
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from backend.services.image_catalog_service import (
+    ImageCatalogService,
+    get_image_catalog_service,
+)
+from backend.services.neu_ret_cache_service import (
+    NeuRetCacheService,
+    get_neu_ret_cache_service,
+)
+
+# 后台巡检收益率文件的间隔（秒）；数据库原地更新不会改变目录 mtime，只能靠定期比较文件时间戳
+FACTOR_RETURN_SYNC_INTERVAL = float(
+    os.environ.get("GALLERY_FACTOR_RETURN_SYNC_INTERVAL", 60)
+)
+NEU_RET_FILE_NAMES = ("neu_rets.db", "neu_rets.json")
+
+logger = logging.getLogger(__name__)
+
+
+def _coerce_neu_ret(value) -> float:
+    """与收益率排序相同的数值化规则"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class FactorReturnIndexService:
+    """因子收益率汇总索引服务类"""
+
+    def __init__(
+        self,
+        catalog: ImageCatalogService,
+        neu_ret_cache: NeuRetCacheService,
+    ):
+        self.catalog = catalog
+        self.images_root = catalog.images_root
+        self.neu_ret_cache = neu_ret_cache
+        self.db_file = catalog.db_file
+        self._db_lock = threading.RLock()
+        self._db_initialized = False
+        self._sync_lock = threading.Lock()
+        self._dirty_parents: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_schema(self) -> None:
+        """只在进程内初始化一次表结构（与目录索引共用数据库，便于关联查询）"""
+        if self._db_initialized:
+            return
+
+        with self._db_lock:
+            if self._db_initialized:
+                return
+
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS factor_returns_index (
+                        parent TEXT NOT NULL,
+                        folder TEXT NOT NULL,
+                        factor_version TEXT NOT NULL,
+                        factor_name TEXT NOT NULL,
+                        neu_ret REAL NOT NULL,
+                        PRIMARY KEY (folder, factor_name)
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_factor_returns_parent_neu_ret
+                    ON factor_returns_index (parent, neu_ret DESC)
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS factor_returns_sources (
+                        folder TEXT PRIMARY KEY,
+                        parent TEXT NOT NULL,
+                        source_stamp TEXT NOT NULL,
+                        row_count INTEGER NOT NULL,
+                        synced_at TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_factor_returns_sources_parent
+                    ON factor_returns_sources (parent)
+                    """
+                )
+                # 关联目录索引时按因子名查找图片
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_catalog_files_factor_name
+                    ON catalog_files (factor_name)
+                    """
+                )
+                conn.commit()
+                self._db_initialized = True
+            finally:
+                conn.close()
+
+    def _open_db(self) -> sqlite3.Connection:
+        # 目录索引的表由目录索引服务创建
+        self.catalog._ensure_schema()
+        self._ensure_schema()
+        conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=30000")
+        # SQLite 内置 lower() 只处理 ASCII，排序键需要与 Python str.lower() 一致
+        conn.create_function("py_lower", 1, str.lower, deterministic=True)
+        return conn
+
+    def sync_parent(self, parent_path: Path) -> Optional[Dict[str, int]]:
+        """
+        同步父文件夹下各子文件夹的收益率，只重新读取时间戳发生变化的文件
+
+        Returns:
+            {"checked", "synced", "removed"}；目录索引尚未建立时返回 None
+        """
+        subfolders = self.catalog.list_subfolders(parent_path)
+        if subfolders is None:
+            return None
+        parent = self.catalog.to_rel_dir(parent_path)
+
+        stats = {"checked": 0, "synced": 0, "removed": 0}
+        with self._sync_lock:
+            conn = self._open_db()
+            try:
+                known = {
+                    row["folder"]: row["source_stamp"]
+                    for row in conn.execute(
+                        "SELECT folder, source_stamp FROM factor_returns_sources WHERE parent = ?",
+                        (parent,),
+                    )
+                }
+                current_folders = set()
+                synced_at = datetime.now().isoformat()
+                for subfolder_name in subfolders:
+                    folder = f"{parent}/{subfolder_name}" if parent else subfolder_name
+                    current_folders.add(folder)
+                    folder_path = self.images_root / folder
+                    stamp = json.dumps(self.neu_ret_cache.get_file_stamp(folder_path))
+                    stats["checked"] += 1
+                    if known.get(folder) == stamp:
+                        continue
+
+                    neu_ret_data = self.neu_ret_cache.get(folder_path)
+                    conn.execute(
+                        "DELETE FROM factor_returns_index WHERE folder = ?", (folder,)
+                    )
+                    conn.executemany(
+                        """
+                        INSERT OR REPLACE INTO factor_returns_index (
+                            parent, folder, factor_version, factor_name, neu_ret
+                        ) VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (
+                            (
+                                parent,
+                                folder,
+                                subfolder_name,
+                                str(factor_name),
+                                _coerce_neu_ret(value),
+                            )
+                            for factor_name, value in neu_ret_data.items()
+                        ),
+                    )
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO factor_returns_sources (
+                            folder, parent, source_stamp, row_count, synced_at
+                        ) VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (folder, parent, stamp, len(neu_ret_data), synced_at),
+                    )
+                    stats["synced"] += 1
+
+                for stale_folder in set(known) - current_folders:
+                    conn.execute(
+                        "DELETE FROM factor_returns_index WHERE folder = ?",
+                        (stale_folder,),
+                    )
+                    conn.execute(
+                        "DELETE FROM factor_returns_sources WHERE folder = ?",
+                        (stale_folder,),
+                    )
+                    stats["removed"] += 1
+                conn.commit()
+            finally:
+                conn.close()
+
+        if stats["synced"] or stats["removed"]:
+            logger.debug(f"收益率汇总索引已同步 {parent or '/'}: {stats}")
+        return stats
+
+    def query_top_images(
+        self, parent_path: Path, limit: int
+    ) -> List[Tuple[str, str, str, int, float, float, str, float]]:
+        """
+        按收益率从高到低取出父文件夹下收益率为正的前 limit 张图片
+
+        排序与跨子文件夹收益率排序一致：收益率降序，因子版本、因子名（忽略大小写）、相对路径升序；
+        没有收益率记录的图片按 0 计，排在所有正收益之后，因此结果只包含正收益
+
+        Returns:
+            [(relative_path, name, extension, size, mtime, ctime, factor_version, neu_ret)]
+        """
+        parent = self.catalog.to_rel_dir(parent_path)
+        conn = self._open_db()
+        try:
+            rows = conn.execute(
+                """
+                SELECT
+                    f.relative_path, f.name, f.extension, f.size, f.mtime, f.ctime,
+                    r.factor_version, r.neu_ret
+                FROM factor_returns_index AS r
+                JOIN catalog_files AS f
+                    ON f.factor_name = r.factor_name
+                    AND f.relative_path >= r.folder || '/'
+                    AND f.relative_path < r.folder || '0'
+                    AND f.is_image = 1
+                WHERE r.parent = ? AND r.neu_ret > 0
+                ORDER BY
+                    r.neu_ret DESC,
+                    py_lower(r.factor_version),
+                    py_lower(r.factor_name),
+                    f.relative_path
+                LIMIT ?
+                """,
+                (parent, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [tuple(row) for row in rows]
+
+    def mark_dirty(self, rel_dirs: Iterable[str]) -> None:
+        """目录索引变化回调：收益率文件所在目录发生变化时，下一轮同步其父文件夹"""
+        with self._dirty_lock:
+            for rel_dir in rel_dirs:
+                if rel_dir:
+                    self._dirty_parents.add(rel_dir.rpartition("/")[0])
+
+    def _known_parents(self) -> List[str]:
+        """目录索引中含有收益率文件的目录的父目录，以及已经同步过的父目录"""
+        placeholders = ", ".join("?" for _ in NEU_RET_FILE_NAMES)
+        conn = self._open_db()
+        try:
+            parents = {
+                row["folder"].rpartition("/")[0]
+                for row in conn.execute(
+                    f"SELECT DISTINCT folder FROM catalog_files WHERE name IN ({placeholders})",
+                    NEU_RET_FILE_NAMES,
+                )
+                if row["folder"]
+            }
+            parents.update(
+                row["parent"]
+                for row in conn.execute("SELECT DISTINCT parent FROM factor_returns_sources")
+            )
+        finally:
+            conn.close()
+        return sorted(parents)
+
+    def sync_all(self) -> None:
+        with self._dirty_lock:
+            self._dirty_parents.clear()
+        for parent in self._known_parents():
+            if self._stop_event.is_set():
+                return
+            try:
+                self.sync_parent(self.images_root / parent)
+            except Exception as e:
+                logger.warning(f"同步收益率汇总索引失败 {parent}: {e}")
+
+    def _run(self) -> None:
+        last_full_sync = 0.0
+        while not self._stop_event.wait(1.0):
+            now = time.monotonic()
+            if now - last_full_sync >= FACTOR_RETURN_SYNC_INTERVAL:
+                last_full_sync = now
+                self.sync_all()
+                continue
+
+            with self._dirty_lock:
+                dirty = sorted(self._dirty_parents)
+                self._dirty_parents.clear()
+            for parent in dirty:
+                try:
+                    self.sync_parent(self.images_root / parent)
+                except Exception as e:
+                    logger.warning(f"同步收益率汇总索引失败 {parent}: {e}")
+
+    def start(self) -> None:
+        """启动后台同步线程"""
+        if self._thread is not None or FACTOR_RETURN_SYNC_INTERVAL <= 0:
+            return
+        self.catalog.add_change_listener(self.mark_dirty)
+        self._thread = threading.Thread(
+            target=self._run, name="factor-return-index", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+# 全局实例（按图片根目录区分）
+_factor_return_index_services: Dict[str, FactorReturnIndexService] = {}
+_factor_return_index_services_guard = threading.Lock()
+
+
+def get_factor_return_index_service(images_root: Path) -> FactorReturnIndexService:
+    """获取全局因子收益率汇总索引服务实例"""
+    key = str(Path(images_root))
+    with _factor_return_index_services_guard:
+        service = _factor_return_index_services.get(key)
+        if service is None:
+            service = FactorReturnIndexService(
+                get_image_catalog_service(images_root),
+                get_neu_ret_cache_service(),
+            )
+            _factor_return_index_services[key] = service
+        return service
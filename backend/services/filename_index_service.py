@@ -0,0 +1,119 @@
+"""
+文件名索引服务
+在目录索引的内存镜像之上维护文件名三元组倒排索引，目录索引每次刷新后按变化目录增量更新，
+用于多关键词文件名搜索；含汉字的文件名同时索引全拼和首字母，拼音查询与英文查询代价相同
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+
+from backend.services.image_catalog_service import (
+    ImageCatalogService,
+    get_image_catalog_service,
+)
+from backend.utils.pinyin_utils import build_search_text
+from backend.utils.trigram_index import TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+
+class FilenameIndexService:
+    """文件名索引服务类"""
+
+    def __init__(self, catalog: ImageCatalogService):
+        self.catalog = catalog
+        self._index = TrigramIndex(text_func=build_search_text)
+        self._lock = threading.Lock()
+        self._built = False
+        self._listening = False
+
+    def _ensure_built(self) -> None:
+        if self._built:
+            return
+
+        with self._lock:
+            if self._built:
+                return
+            if not self._listening:
+                # 先订阅变化再复制镜像，复制期间发生的变化会在回调中重新应用
+                self.catalog.add_change_listener(self._on_catalog_changed)
+                self._listening = True
+
+            started = time.perf_counter()
+            for rel_dir, records in self.catalog.snapshot_directory_files():
+                self._index.replace_folder(rel_dir, records)
+            self._built = True
+            logger.info(
+                f"文件名索引已建立: {len(self._index)} 个文件，"
+                f"耗时 {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+
+    def _on_catalog_changed(self, changed_dirs: Iterable[str]) -> None:
+        """目录重新列举后替换该目录的记录，目录被删除时连同后代一起移除"""
+        with self._lock:
+            # 构建期间触发的回调等构建完成后再应用
+            if not self._built:
+                return
+            for rel_dir in changed_dirs:
+                records = self.catalog.get_directory_files(rel_dir)
+                if records is None:
+                    self._index.remove_subtree(rel_dir)
+                else:
+                    self._index.replace_folder(rel_dir, records)
+
+    def search(
+        self,
+        folder_path: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+        images_only: bool = True,
+        predicate: Optional[Callable[[Dict], bool]] = None,
+    ) -> Optional[List[Dict]]:
+        """
+        在目录树中按文件名搜索
+
+        Args:
+            folder_path: 搜索范围（绝对路径）
+            include_keywords: 小写包含关键词，文件名（或其全拼、首字母）必须全部包含
+            exclude_keywords: 小写排除关键词，小写文件名不能包含任何一个（不按全拼、首字母匹配）
+            images_only: 是否只返回图片
+            predicate: 额外的记录过滤条件
+
+        Returns:
+            目录索引中的文件记录，顺序与 list_files 一致；索引尚未建立时返回 None，由调用方回退实时扫描
+        """
+        rel_dir = self.catalog.ensure_fresh(folder_path)
+        if rel_dir is None:
+            return None
+
+        self._ensure_built()
+        if images_only:
+            if predicate is None:
+                predicate = lambda record: bool(record["is_image"])
+            else:
+                extra = predicate
+                predicate = lambda record: bool(record["is_image"]) and extra(record)
+
+        with self._lock:
+            return self._index.search(
+                include_keywords, exclude_keywords, scope=rel_dir, predicate=predicate
+            )
+
+
+# 全局实例（按图片根目录区分）
+_filename_index_services: Dict[str, FilenameIndexService] = {}
+_filename_index_services_guard = threading.Lock()
+
+
+def get_filename_index_service(images_root: Path) -> FilenameIndexService:
+    """获取全局文件名索引服务实例"""
+    key = str(Path(images_root))
+    with _filename_index_services_guard:
+        service = _filename_index_services.get(key)
+        if service is None:
+            service = FilenameIndexService(get_image_catalog_service(images_root))
+            _filename_index_services[key] = service
+        return service
@@ -0,0 +1,278 @@
+"""
+目录监听服务
+订阅 IMAGES_ROOT 的文件事件，去抖后增量更新目录索引，并通过 Socket.IO 推送 folder_changed
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+import logging
+
+from backend.services.image_catalog_service import (
+    ImageCatalogService,
+    get_image_catalog_service,
+)
+
+# auto: 本地文件系统用 inotify，网络挂载用 mtime 轮询；也可显式指定 native/polling/off
+WATCHER_MODE = os.environ.get("GALLERY_WATCHER_MODE", "auto").lower()
+WATCHER_DEBOUNCE_SECONDS = float(os.environ.get("GALLERY_WATCHER_DEBOUNCE", 1.0))
+WATCHER_MAX_DELAY_SECONDS = float(os.environ.get("GALLERY_WATCHER_MAX_DELAY", 5.0))
+WATCHER_POLL_INTERVAL = float(os.environ.get("GALLERY_WATCHER_POLL_INTERVAL", 10.0))
+
+# 会改变目录内容的文件事件；watchdog 的 closed 只在写入后关闭时产生。
+# opened / closed_no_write 等只读访问事件（看图、列举、生成缩略图都会触发）一律忽略
+WATCHER_CONTENT_EVENT_TYPES = {"created", "deleted", "moved", "modified", "closed"}
+
+# inotify 在这些文件系统上收不到其他主机写入的事件
+NETWORK_FILESYSTEMS = {
+    "nfs",
+    "nfs4",
+    "cifs",
+    "smb",
+    "smb3",
+    "smbfs",
+    "fuse.sshfs",
+    "fuse.glusterfs",
+    "glusterfs",
+    "ceph",
+    "fuse.ceph",
+    "lustre",
+    "9p",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _get_filesystem_type(path: Path) -> Optional[str]:
+    """从 /proc/mounts 中找出路径所在挂载点的文件系统类型"""
+    try:
+        resolved = str(path.resolve())
+        best_mount = ""
+        best_type = None
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point = parts[1].replace("\\040", " ")
+                if (
+                    resolved == mount_point
+                    or resolved.startswith(mount_point.rstrip("/") + "/")
+                ) and len(mount_point) > len(best_mount):
+                    best_mount = mount_point
+                    best_type = parts[2]
+        return best_type
+    except OSError:
+        return None
+
+
+class FolderWatcherService:
+    """目录监听服务类"""
+
+    def __init__(self, catalog: ImageCatalogService, mode: str = WATCHER_MODE):
+        self.catalog = catalog
+        self.images_root = catalog.images_root
+        self.mode = mode
+        self.active_mode: Optional[str] = None
+        self._observer = None
+        self._stop_event = threading.Event()
+        self._pending_dirs: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._first_event_at: Optional[float] = None
+        self._last_event_at: Optional[float] = None
+        self._threads: List[threading.Thread] = []
+
+    def _resolve_mode(self) -> str:
+        if self.mode in {"native", "polling", "off"}:
+            return self.mode
+
+        fs_type = _get_filesystem_type(self.images_root)
+        if fs_type and fs_type.lower() in NETWORK_FILESYSTEMS:
+            logger.info(f"图片根目录位于网络文件系统 {fs_type}，使用轮询模式监听")
+            return "polling"
+        return "native"
+
+    def start(self) -> None:
+        """启动监听（在后台线程中完成首次索引，不阻塞应用启动）"""
+        if self._threads:
+            return
+
+        mode = self._resolve_mode()
+        if mode == "off" or not self.images_root.exists():
+            logger.info("目录监听未启用")
+            return
+
+        thread = threading.Thread(
+            target=self._run, args=(mode,), name="folder-watcher", daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.catalog.hot = False
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+            except Exception:
+                pass
+
+    def _run(self, mode: str) -> None:
+        if mode == "native" and self._start_native_observer():
+            self.active_mode = "native"
+        else:
+            self.active_mode = "polling"
+
+        # 先订阅事件再做首次巡检，避免两者之间的变化丢失
+        try:
+            self.catalog.refresh("", force=True)
+        except Exception as e:
+            logger.warning(f"首次建立目录索引失败: {e}")
+
+        # 首次巡检之后的所有索引变化（监听事件、轮询或请求触发的巡检）都推送给前端
+        self.catalog.add_change_listener(self._emit_folder_changed)
+
+        # 之后的目录变化由事件或轮询推送，列表查询直接读取内存索引
+        self.catalog.hot = True
+        if self.active_mode == "native":
+            logger.info(f"目录监听已启动(inotify): {self.images_root}")
+            self._debounce_loop()
+        else:
+            logger.info(f"目录监听已启动(轮询 {WATCHER_POLL_INTERVAL}s): {self.images_root}")
+            self._poll_loop()
+
+    def _start_native_observer(self) -> bool:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.warning("watchdog 未安装，目录监听退回轮询模式")
+            return False
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                watcher._on_fs_event(event)
+
+        try:
+            observer = Observer()
+            observer.schedule(_Handler(), str(self.images_root), recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            return True
+        except Exception as e:
+            # inotify 句柄数不足等情况
+            logger.warning(f"启动 inotify 监听失败，退回轮询模式: {e}")
+            return False
+
+    def _to_rel_dir(self, path: str) -> Optional[str]:
+        try:
+            return self.catalog.to_rel_dir(Path(path))
+        except ValueError:
+            return None
+
+    def _on_fs_event(self, event) -> None:
+        """把文件事件折算成需要重新列举的目录"""
+        if event.event_type not in WATCHER_CONTENT_EVENT_TYPES:
+            return
+
+        dirs: Set[str] = set()
+        paths = [event.src_path]
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            paths.append(dest_path)
+
+        for path in paths:
+            if event.is_directory and event.event_type == "modified":
+                rel_dir = self._to_rel_dir(path)
+            else:
+                rel_dir = self._to_rel_dir(os.path.dirname(path))
+            if rel_dir is not None:
+                dirs.add(rel_dir)
+
+        if not dirs:
+            return
+
+        now = time.monotonic()
+        with self._pending_lock:
+            self._pending_dirs.update(dirs)
+            if self._first_event_at is None:
+                self._first_event_at = now
+            self._last_event_at = now
+
+    def _debounce_loop(self) -> None:
+        """事件静默一段时间（或累计超过最大延迟）后批量应用"""
+        while not self._stop_event.wait(0.2):
+            with self._pending_lock:
+                if not self._pending_dirs:
+                    continue
+                now = time.monotonic()
+                quiet_for = now - (self._last_event_at or now)
+                waited_for = now - (self._first_event_at or now)
+                if (
+                    quiet_for < WATCHER_DEBOUNCE_SECONDS
+                    and waited_for < WATCHER_MAX_DELAY_SECONDS
+                ):
+                    continue
+                pending = self._pending_dirs
+                self._pending_dirs = set()
+                self._first_event_at = None
+                self._last_event_at = None
+
+            self._apply(pending)
+
+    def _poll_loop(self) -> None:
+        """网络挂载下按目录 mtime 轮询，变化目录通过索引的变化回调上报"""
+        while not self._stop_event.wait(WATCHER_POLL_INTERVAL):
+            try:
+                self.catalog.refresh("", force=True)
+            except Exception as e:
+                logger.warning(f"轮询目录变化失败: {e}")
+
+    def _apply(self, rel_dirs: Iterable[str]) -> None:
+        try:
+            self.catalog.apply_changes(rel_dirs)
+        except Exception as e:
+            logger.warning(f"应用目录变化失败: {e}")
+
+    def _emit_folder_changed(self, rel_dirs: Iterable[str]) -> None:
+        """按受影响目录推送 folder_changed，前端只刷新对应的子文件夹"""
+        try:
+            from backend.app import socketio
+
+            for rel_dir in sorted(set(rel_dirs)):
+                socketio.emit(
+                    "folder_changed",
+                    {
+                        "folder": rel_dir,
+                        "parent_folder": rel_dir.rpartition("/")[0],
+                        "timestamp": time.time(),
+                    },
+                )
+        except Exception as e:
+            logger.warning(f"发送目录变化通知失败: {e}")
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "mode": self.active_mode,
+            "hot": self.catalog.hot,
+            "pending_dirs": len(self._pending_dirs),
+        }
+
+
+# 全局实例
+_folder_watcher_service: Optional[FolderWatcherService] = None
+
+
+def get_folder_watcher_service(images_root: Path) -> FolderWatcherService:
+    """获取全局目录监听服务实例"""
+    global _folder_watcher_service
+    if _folder_watcher_service is None:
+        _folder_watcher_service = FolderWatcherService(
+            get_image_catalog_service(images_root)
+        )
+    return _folder_watcher_service
@@ -3,22 +3,69 @@ Gallery 服务层
 处理文件夹和图片相关的业务逻辑
 """
 
+import base64
+import csv
 import hashlib
+import io
 import math
 import os
 import json
 import sqlite3
 import threading
 import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from stat import S_ISREG
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-import mimetypes
+from typing import Callable, List, Dict, Optional, Tuple
 import logging
 import numpy as np
 
-from backend.utils.file_utils import get_file_info, is_image_file, get_image_dimensions
+from backend.utils.file_utils import (
+    IMAGE_EXTENSIONS,
+    ScannedFile,
+    get_extension,
+    get_file_info,
+    guess_mime_type,
+    is_image_file,
+    list_subdirectories,
+    scan_directory,
+    walk_files,
+)
 from backend.utils.cache_utils import cached_result, cache_clear
+from backend.utils.image_table import ImageRow, ImageTable, ImageTableBuilder
+from backend.utils.http_cache import versioned_url
+from backend.utils.correlation_kernel import (
+    mean_rowwise_correlation,
+    prefix_mean_correlations,
+    standardize_cross_sections,
+)
+from backend.utils.pinyin_utils import (
+    SEARCH_TEXT_SEPARATOR,
+    build_search_text,
+    pinyin_keys,
+)
+from backend.services.image_catalog_service import get_image_catalog_service
+from backend.services.neu_ret_cache_service import get_neu_ret_cache_service
+from backend.services.image_dimension_service import get_image_dimension_service
+from backend.services.correlation_pool_service import (
+    CorrelationTask,
+    get_correlation_pool_service,
+)
+from backend.services.factor_return_index_service import (
+    get_factor_return_index_service,
+)
+from backend.services.factor_matrix_service import get_factor_matrix_service
+from backend.services.filename_index_service import get_filename_index_service
+from backend.services.description_index_service import (
+    FOLDER_DESCRIPTION_FILES,
+    build_snippet,
+    get_description_index_service,
+    read_description_map,
+    read_individual_description,
+)
 
 IMAGES_ROOT = os.environ.get(
     "GALLERY_IMAGES_ROOT", os.path.expanduser("~/pythoncode/pngs")
@@ -39,6 +86,32 @@ MAX_DEDUPE_CACHE_ENTRIES = 50
 DEDUPE_BATCH_SIZE = 50
 DEDUPE_MAX_KEPT_FACTORS = 100
 DEDUPE_RULE_VERSION = "abs_corr_v1"
+# 去重模式：full 与之前所有因子（含已隐藏的）比较并记录完整的最大相关注解；
+# kept_only 只与已保留的因子比较，遇到第一个超过阈值的因子即停止
+DEDUPE_MODE_FULL = "full"
+DEDUPE_MODE_KEPT_ONLY = "kept_only"
+# 两种模式的判定结果不同，规则版本分开，缓存签名和断点记录互不混用
+DEDUPE_RULE_VERSIONS = {
+    DEDUPE_MODE_FULL: DEDUPE_RULE_VERSION,
+    DEDUPE_MODE_KEPT_ONLY: "abs_corr_kept_only_v1",
+}
+# kept_only 模式每次批量比较的已保留因子数，命中后剩余的因子不再计算
+DEDUPE_KEPT_ONLY_CHUNK_SIZE = 16
+# 请求的页尾不超过总数的该比例时只对候选行做部分排序，否则整体排序
+TOP_K_SELECTION_MAX_RATIO = 0.25
+# 排序后的列表快照：最多缓存的快照数量和存活时间（秒）
+LISTING_SNAPSHOT_MAX_ENTRIES = 32
+LISTING_SNAPSHOT_TTL = 300
+# 收益率汇总索引生成的游标（没有快照编号）在该偏移以内时继续查询索引，更深的页才构建快照
+RETURN_INDEX_MAX_CURSOR_OFFSET = 1000
+# 图片名 -> 所在位置索引：最多缓存的父文件夹数量
+NAME_LOCATION_INDEX_MAX_ENTRIES = 16
+# 跨子文件夹扫描的并发线程数（网络存储上主要用于叠加 I/O 等待）
+SUBFOLDER_SCAN_WORKERS = max(1, int(os.environ.get("GALLERY_SUBFOLDER_SCAN_WORKERS", 8)))
+# 搜索模式：name 匹配文件名，description 匹配图片描述和文件夹描述
+SEARCH_MODES = ("name", "description")
+# 图片所在位置：(子文件夹名, relative_path, size, mtime, neu_ret, extension, ctime)
+NameLocation = Tuple[str, str, int, float, float, str, float]
 
 logger = logging.getLogger(__name__)
 
@@ -53,51 +126,59 @@ class GalleryService:
         self._dedupe_progress_db_initialized = False
         self._dedupe_run_locks: Dict[str, threading.Lock] = {}
         self._dedupe_run_locks_guard = threading.Lock()
+        self._listing_snapshots: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._listing_snapshots_lock = threading.Lock()
+        self._name_location_indexes: "OrderedDict[str, Dict]" = OrderedDict()
+        self._name_location_indexes_lock = threading.Lock()
+        self.catalog = get_image_catalog_service(self.images_root)
+        self.catalog.add_change_listener(self._on_catalog_changed)
+        self.neu_ret_cache = get_neu_ret_cache_service()
+        self.image_dimensions = get_image_dimension_service()
+        self.factor_return_index = get_factor_return_index_service(self.images_root)
+        self.filename_index = get_filename_index_service(self.images_root)
+        self.description_index = get_description_index_service(self.images_root)
         if not self.images_root.exists():
             logger.warning(f"图片根目录不存在: {self.images_root}")
 
+    def _on_catalog_changed(self, changed_dirs: List[str]) -> None:
+        """目录索引发生变化时，丢弃受影响目录及其所有祖先目录的文件夹信息缓存"""
+        affected_dirs = set()
+        for rel_dir in changed_dirs:
+            parts = rel_dir.split("/") if rel_dir else []
+            for depth in range(len(parts) + 1):
+                affected_dirs.add("/".join(parts[:depth]))
+
+        for rel_dir in affected_dirs:
+            folder_path = self.images_root / rel_dir if rel_dir else self.images_root
+            self._get_folder_info.cache_delete(self, folder_path)
+
     def _load_neu_ret_data(self, folder_path: Path) -> Dict[str, float]:
         """
         加载收益率数据（优先从SQLite数据库读取，如果不存在则从JSON文件读取）
 
+        解析结果按收益率文件的 (mtime_ns, size) 进程内缓存，返回的字典为共享只读数据
+
         Args:
             folder_path: 文件夹路径
 
         Returns:
             收益率数据字典，键为图片名（不含扩展名），值为收益率数值
         """
-        neu_ret_data = {}
-
-        # 1. 优先尝试从 SQLite 数据库读取
-        db_file = folder_path / "neu_rets.db"
-        if db_file.exists():
-            try:
-                conn = sqlite3.connect(str(db_file))
-                cursor = conn.cursor()
-                cursor.execute("SELECT factor_name, neu_ret FROM factor_returns")
-                rows = cursor.fetchall()
-                neu_ret_data = {row[0]: row[1] for row in rows}
-                conn.close()
-                logger.debug(
-                    f"从 SQLite 数据库加载收益率数据: {db_file}, 共 {len(neu_ret_data)} 条记录"
-                )
-                return neu_ret_data
-            except Exception as e:
-                logger.warning(f"无法从 SQLite 数据库读取 {db_file}: {e}")
-
-        # 2. 如果数据库不存在或读取失败，尝试从 JSON 文件读取（fallback）
-        json_file = folder_path / "neu_rets.json"
-        if json_file.exists():
+        return self.neu_ret_cache.get(folder_path)
+
+    def _get_image_neu_ret(
+        self, image_path: Path, neu_ret_by_folder: Dict[Path, Dict[str, float]]
+    ) -> float:
+        """读取单张图片的收益率，同一次调用中每个文件夹只查一次缓存"""
+        folder_path = image_path.parent
+        neu_ret_data = neu_ret_by_folder.get(folder_path)
+        if neu_ret_data is None:
             try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    neu_ret_data = json.load(f)
-                logger.debug(
-                    f"从 JSON 文件加载收益率数据: {json_file}, 共 {len(neu_ret_data)} 条记录"
-                )
-            except (json.JSONDecodeError, OSError) as e:
-                logger.warning(f"无法读取 neu_rets.json 文件 {json_file}: {e}")
-
-        return neu_ret_data
+                neu_ret_data = self._load_neu_ret_data(folder_path)
+            except Exception:
+                neu_ret_data = {}
+            neu_ret_by_folder[folder_path] = neu_ret_data
+        return neu_ret_data.get(image_path.name.rsplit(".", 1)[0], 0)
 
     def _build_image_result(self, images: List[Dict], page: int, per_page: int) -> Dict:
         """构建统一的图片分页结果"""
@@ -114,36 +195,690 @@ class GalleryService:
             "has_prev": page > 1,
         }
 
-    def _build_basic_image_info(self, image_path: Path) -> Optional[Dict]:
-        """构建轻量图片信息，避免首屏阶段解析图片内容"""
+    def _encode_listing_cursor(self, snapshot_id: Optional[str], offset: int, last_path: str) -> str:
+        """生成不透明的翻页游标"""
+        payload = json.dumps(
+            {"s": snapshot_id, "o": offset, "r": last_path},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _decode_listing_cursor(self, cursor: str) -> Optional[Dict]:
+        """解析翻页游标，格式不正确时返回 None（调用方回退到 page 参数）"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            offset = int(payload["o"])
+            if offset < 0:
+                return None
+            return {"s": payload.get("s"), "o": offset, "r": str(payload.get("r") or "")}
+        except Exception:
+            return None
+
+    def _get_neu_ret_file_stamp(self, folder_paths: List[Path]) -> Tuple:
+        """收益率文件的 (mtime_ns, size)，数据库原地更新不会改变目录 mtime，需要单独比较"""
+        return tuple(
+            self.neu_ret_cache.get_file_stamp(folder_path) for folder_path in folder_paths
+        )
+
+    def _get_dedupe_runs_marker(self, cache_key: str) -> Optional[Tuple]:
+        """去重记录的变化标记，没有去重记录时返回 None"""
         try:
+            conn = self._open_dedupe_progress_db()
+            try:
+                row = conn.execute(
+                    """
+                    SELECT COUNT(*) AS run_count, MAX(updated_at) AS last_updated
+                    FROM dedupe_runs WHERE cache_key = ?
+                    """,
+                    (cache_key,),
+                ).fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("读取去重记录失败 %s: %s", cache_key, e)
+            return ("unknown", time.time())
+        if not row or not row["run_count"]:
+            return None
+        return (row["run_count"], row["last_updated"])
+
+    def _get_listing_snapshot(
+        self,
+        snapshot_key: Tuple,
+        version: Optional[Tuple],
+        build: Callable[[], Dict],
+    ) -> Tuple[Dict, bool]:
+        """
+        读取排序后的列表快照，版本不一致或过期时重新构建
+
+        Args:
+            snapshot_key: (列表类型, 文件夹, 排序方式, 去重模式)
+            version: 数据版本（目录子树版本 + 收益率文件时间戳 + 去重记录标记），None 表示无法判断，不缓存
+            build: 构建快照的函数，返回 {"table", "sort_by", "extra", "annotations", ...}
+
+        Returns:
+            (快照, 是否命中缓存)
+        """
+        snapshot = self._lookup_listing_snapshot(snapshot_key, version)
+        if snapshot is not None:
+            return snapshot, True
+
+        now = time.monotonic()
+        snapshot = build()
+        snapshot.update(
+            {
+                "id": uuid.uuid4().hex[:16] if version is not None else None,
+                "version": version,
+                "created_at": now,
+                "lock": threading.Lock(),
+                "positions": None,
+            }
+        )
+        if version is not None:
+            with self._listing_snapshots_lock:
+                self._listing_snapshots[snapshot_key] = snapshot
+                self._listing_snapshots.move_to_end(snapshot_key)
+                while len(self._listing_snapshots) > LISTING_SNAPSHOT_MAX_ENTRIES:
+                    self._listing_snapshots.popitem(last=False)
+        return snapshot, False
+
+    def _lookup_listing_snapshot(
+        self, snapshot_key: Tuple, version: Optional[Tuple]
+    ) -> Optional[Dict]:
+        """读取版本一致且未过期的列表快照，不存在时返回 None"""
+        if version is None:
+            return None
+        with self._listing_snapshots_lock:
+            snapshot = self._listing_snapshots.get(snapshot_key)
             if (
-                not image_path.exists()
-                or not image_path.is_file()
-                or not is_image_file(image_path)
+                snapshot is not None
+                and snapshot["version"] == version
+                and time.monotonic() - snapshot["created_at"] < LISTING_SNAPSHOT_TTL
             ):
-                return None
+                self._listing_snapshots.move_to_end(snapshot_key)
+                return snapshot
+        return None
 
-            stat = image_path.stat()
-            mime_type, _ = mimetypes.guess_type(str(image_path))
+    def _get_snapshot_order(self, snapshot: Dict) -> np.ndarray:
+        with snapshot["lock"]:
+            return snapshot["table"].order(snapshot["sort_by"])
 
-            return {
-                "name": image_path.name,
-                "path": str(image_path),
-                "size": stat.st_size,
-                "mime_type": mime_type,
-                "extension": image_path.suffix.lower(),
-                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "date": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "is_image": True,
-                "is_svg": image_path.suffix.lower() == ".svg",
-                "relative_path": str(image_path.relative_to(self.images_root)),
+    def _page_from_snapshot(
+        self,
+        snapshot: Dict,
+        page: int,
+        per_page: int,
+        cursor: Optional[str] = None,
+        fresh: bool = False,
+    ) -> Dict:
+        """
+        从快照中取出一页
+
+        有游标时从游标之后继续：同一快照直接按偏移切片；快照已重建时按游标记录的最后一张图片重新定位。
+        新建的快照浅分页只对候选行做部分排序，之后再次访问时才整体排序一次；
+        只为返回的那一页构造图片字典
+        """
+        table: ImageTable = snapshot["table"]
+        total = len(table)
+        decoded = self._decode_listing_cursor(cursor) if cursor else None
+
+        if decoded is not None:
+            order = self._get_snapshot_order(snapshot)
+            start_idx = decoded["o"]
+            if decoded["s"] != snapshot["id"] and decoded["r"]:
+                with snapshot["lock"]:
+                    if snapshot["positions"] is None:
+                        snapshot["positions"] = {
+                            table.relative_paths[row]: index
+                            for index, row in enumerate(order.tolist())
+                        }
+                    position = snapshot["positions"].get(decoded["r"])
+                if position is not None:
+                    start_idx = position + 1
+            start_idx = min(start_idx, total)
+            page = start_idx // per_page + 1 if per_page > 0 else 1
+            has_prev = start_idx > 0
+        else:
+            start_idx = (page - 1) * per_page
+            has_prev = page > 1
+            if fresh and start_idx >= 0:
+                with snapshot["lock"]:
+                    order = table.head_order(
+                        snapshot["sort_by"],
+                        start_idx + per_page,
+                        max_ratio=TOP_K_SELECTION_MAX_RATIO,
+                    )
+            else:
+                order = self._get_snapshot_order(snapshot)
+
+        end_idx = start_idx + per_page
+        rows = order[start_idx:end_idx].tolist()
+        result = {
+            "images": self._materialize_table_rows(table, rows, snapshot["extra"]),
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "has_next": end_idx < total,
+            "has_prev": has_prev,
+        }
+        result["next_cursor"] = (
+            self._encode_listing_cursor(
+                snapshot["id"],
+                end_idx,
+                str(result["images"][-1].get("relative_path", "")),
+            )
+            if result["has_next"] and result["images"]
+            else None
+        )
+        return result
+
+    def get_next_page_paths(
+        self, folder_name: str, cursor: str, count: int, cross_folders: bool = False
+    ) -> List[str]:
+        """
+        取出游标之后 count 张图片的相对路径，供缩略图预生成使用
+
+        只读取生成该游标的列表快照，或（跨子文件夹收益率排序的索引游标）查询收益率汇总索引；
+        不构造图片字典，也不扫描目录，两者都不可用时返回空列表
+        """
+        decoded = self._decode_listing_cursor(cursor)
+        if decoded is None or count <= 0:
+            return []
+        start_idx = decoded["o"]
+        end_idx = start_idx + count
+
+        if decoded["s"] is not None:
+            with self._listing_snapshots_lock:
+                snapshot = next(
+                    (
+                        item
+                        for item in self._listing_snapshots.values()
+                        if item["id"] == decoded["s"]
+                        and time.monotonic() - item["created_at"] < LISTING_SNAPSHOT_TTL
+                    ),
+                    None,
+                )
+            if snapshot is None:
+                return []
+            table: ImageTable = snapshot["table"]
+            with snapshot["lock"]:
+                order = table.head_order(
+                    snapshot["sort_by"], end_idx, max_ratio=TOP_K_SELECTION_MAX_RATIO
+                )
+            return [table.relative_paths[row] for row in order[start_idx:end_idx].tolist()]
+
+        if not cross_folders:
+            return []
+        try:
+            top_rows = self.factor_return_index.query_top_images(
+                self.images_root / folder_name, end_idx
+            )
+        except Exception as e:
+            logger.warning(f"查询收益率汇总索引失败 {folder_name}: {e}")
+            return []
+        return [row[0] for row in top_rows[start_idx:end_idx]]
+
+    def _materialize_table_rows(
+        self, table: ImageTable, rows: List[int], extra: Dict[str, Optional[str]]
+    ) -> List[Dict]:
+        """
+        把列式表中的行转换成图片信息字典
+
+        Args:
+            table: 列式图片表
+            rows: 行下标
+            extra: dedupe_group 为收益率分组名（None 表示与 factor_version 相同），
+                parent_folder/parent_rel 非空时补充跨子文件夹字段
+        """
+        images = []
+        parent_folder = extra.get("parent_folder")
+        parent_rel = extra.get("parent_rel") or ""
+        for row in rows:
+            relative_path = table.relative_paths[row]
+            name = table.names[row]
+            image_info = self._format_image_info(
+                name,
+                str(self.images_root / relative_path),
+                relative_path,
+                table.extension(row),
+                int(table.sizes[row]),
+                float(table.mtimes[row]),
+                float(table.ctimes[row]),
+            )
+            if table.has_neu_ret:
+                factor_version = table.group(row)
+                if parent_folder is not None:
+                    folder = relative_path.rpartition("/")[0]
+                    image_info["subfolder"] = factor_version
+                    image_info["subfolder_path"] = (
+                        folder[len(parent_rel) + 1:] if parent_rel else folder
+                    )
+                    image_info["parent_folder"] = parent_folder
+                image_info["factor_name"] = table.factor_name(row)
+                image_info["factor_version"] = factor_version
+                image_info["dedupe_group"] = extra.get("dedupe_group") or factor_version
+                image_info["neu_ret"] = table.neu_ret_values[row]
+            images.append(image_info)
+        return images
+
+    def _build_table_signature_items(self, table: ImageTable) -> List[Dict]:
+        """按收益率顺序生成去重签名和注解所需的轻量字典"""
+        return [
+            {
+                "relative_path": table.relative_paths[row],
+                "factor_name": table.factor_name(row),
+                "factor_version": table.group(row),
+                "neu_ret": table.neu_ret_values[row],
             }
+            for row in table.order("neu_ret").tolist()
+        ]
+
+    def _format_image_info(
+        self,
+        name: str,
+        path: str,
+        relative_path: str,
+        extension: str,
+        size: int,
+        mtime: float,
+        ctime: float,
+    ) -> Dict:
+        """统一的轻量图片信息结构"""
+        modified_at = datetime.fromtimestamp(mtime).isoformat()
+        return {
+            "name": name,
+            "path": path,
+            "size": size,
+            "mime_type": guess_mime_type(extension),
+            "extension": extension,
+            "created_at": datetime.fromtimestamp(ctime).isoformat(),
+            "modified_at": modified_at,
+            "date": modified_at,
+            "is_image": extension in IMAGE_EXTENSIONS,
+            "is_svg": extension == ".svg",
+            "relative_path": relative_path,
+            # 带版本号的地址，文件修改后地址随之变化，浏览器可以长期缓存
+            "url": versioned_url("/gallery/serve", relative_path, mtime),
+            "thumbnail_url": versioned_url("/gallery/thumb/preview", relative_path, mtime),
+        }
+
+    def _build_basic_image_info(self, image_path: Path) -> Optional[Dict]:
+        """构建轻量图片信息，避免首屏阶段解析图片内容"""
+        try:
+            extension = get_extension(image_path.name)
+            if extension not in IMAGE_EXTENSIONS:
+                return None
+
+            try:
+                stat = image_path.stat()
+            except OSError:
+                return None
+            if not S_ISREG(stat.st_mode):
+                return None
+
+            return self._format_image_info(
+                image_path.name,
+                str(image_path),
+                str(image_path.relative_to(self.images_root)),
+                extension,
+                stat.st_size,
+                stat.st_mtime,
+                stat.st_ctime,
+            )
         except Exception as e:
             logger.error(f"构建轻量图片信息失败 {image_path}: {e}")
             return None
 
+    def _build_image_info_from_scanned(self, scanned: ScannedFile) -> Dict:
+        """把目录遍历得到的记录转换成轻量图片信息，直接复用遍历时取得的 stat"""
+        return self._format_image_info(
+            scanned.name,
+            scanned.path,
+            scanned.relative_path,
+            scanned.extension,
+            scanned.stat.st_size,
+            scanned.stat.st_mtime,
+            scanned.stat.st_ctime,
+        )
+
+    def _build_image_info_from_record(self, record: Dict) -> Dict:
+        """把目录索引中的文件记录转换成与 _build_basic_image_info 相同的结构"""
+        return self._format_image_info(
+            record["name"],
+            str(self.images_root / record["relative_path"]),
+            record["relative_path"],
+            record["extension"],
+            record["size"],
+            record["mtime"],
+            record["ctime"],
+        )
+
+    def _collect_file_infos(
+        self, folder_path: Path, images_only: bool = True
+    ) -> List[Dict]:
+        """收集目录树下的轻量文件信息，优先读取持久化目录索引，索引未建立时回退实时扫描"""
+        records = self.catalog.list_files(folder_path, images_only=images_only)
+        if records is not None:
+            return [self._build_image_info_from_record(record) for record in records]
+
+        return [
+            self._build_image_info_from_scanned(scanned)
+            for scanned in walk_files(
+                folder_path, base=self.images_root, images_only=images_only
+            )
+        ]
+
+    def _search_file_infos(
+        self,
+        folder_path: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+        images_only: bool = True,
+    ) -> List[Dict]:
+        """
+        按文件名关键词筛选目录树下的文件，优先查询文件名索引，索引未建立时回退实时扫描
+
+        文件名（忽略大小写，含汉字时也可以用全拼或首字母）必须包含全部包含关键词，
+        小写文件名不能包含任何屏蔽关键词（屏蔽只按原文匹配）；
+        结果顺序与 _collect_file_infos 一致
+        """
+        records = self.filename_index.search(
+            folder_path, include_keywords, exclude_keywords, images_only=images_only
+        )
+        if records is not None:
+            return [self._build_image_info_from_record(record) for record in records]
+
+        results = []
+        for file_info in self._collect_file_infos(folder_path, images_only=images_only):
+            search_text = build_search_text(file_info["name"])
+            filename_lower = file_info["name"].lower()
+            if all(keyword in search_text for keyword in include_keywords) and not any(
+                keyword in filename_lower for keyword in exclude_keywords
+            ):
+                results.append(file_info)
+        return results
+
+    def _name_match_position(self, name: str, keyword: str) -> int:
+        """关键词在文件名中的位置，在原文中找不到时依次按全拼、首字母中的位置顺延"""
+        offset = 0
+        for part in build_search_text(name).split(SEARCH_TEXT_SEPARATOR):
+            position = part.find(keyword)
+            if position >= 0:
+                return offset + position
+            offset += len(part) + 1
+        return offset
+
+    def _parse_search_keywords(self, query: str) -> Tuple[List[str], List[str]]:
+        """解析查询字符串，支持屏蔽关键词语法 no:keyword，返回小写的 (包含关键词, 屏蔽关键词)"""
+        include_keywords = []
+        exclude_keywords = []
+
+        for kw in query.split():
+            kw = kw.strip()
+            if not kw:
+                continue
+            if kw.startswith("no:"):
+                # 屏蔽关键词
+                exclude_keyword = kw[3:].lower()
+                if exclude_keyword:
+                    exclude_keywords.append(exclude_keyword)
+            else:
+                # 包含关键词
+                include_keywords.append(kw.lower())
+
+        return include_keywords, exclude_keywords
+
+    def _find_description_hits(
+        self,
+        folder_path: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+    ) -> List[Dict]:
+        """
+        按描述文字查找命中的图片描述和文件夹描述，优先查询描述全文索引，索引未建立时回退逐个读取描述文件
+
+        Returns:
+            [{"folder", "filename", "description", "score"}]，filename 为空字符串表示文件夹描述
+        """
+        hits = self.description_index.search(
+            folder_path, include_keywords, exclude_keywords
+        )
+        if hits is not None:
+            return hits
+
+        def _matches(text: Optional[str]) -> bool:
+            if not isinstance(text, str) or not text.strip():
+                return False
+            text_lower = text.lower()
+            search_text = SEARCH_TEXT_SEPARATOR.join((text_lower, *pinyin_keys(text)))
+            return all(keyword in search_text for keyword in include_keywords) and not any(
+                keyword in text_lower for keyword in exclude_keywords
+            )
+
+        hits = []
+        visited_folders = set()
+        for file_info in self._collect_file_infos(folder_path):
+            image_path = Path(file_info["path"])
+            folder = image_path.parent
+            rel_dir = self.catalog.to_rel_dir(folder)
+            if folder not in visited_folders:
+                visited_folders.add(folder)
+                folder_description = self._get_folder_description(folder)
+                if _matches(folder_description):
+                    hits.append(
+                        {
+                            "folder": rel_dir,
+                            "filename": "",
+                            "description": folder_description,
+                            "score": 0.0,
+                        }
+                    )
+
+            description = self._get_image_description_from_folder(folder, image_path.name)
+            if _matches(description):
+                hits.append(
+                    {
+                        "folder": rel_dir,
+                        "filename": image_path.name,
+                        "description": description.strip(),
+                        "score": 0.0,
+                    }
+                )
+        return hits
+
+    def _list_folder_image_infos(self, rel_dir: str) -> Dict[str, Dict]:
+        """单个目录（不含子目录）中的图片，键为文件名"""
+        records = self.catalog.get_directory_files(rel_dir)
+        if records is not None:
+            return {
+                record["name"]: self._build_image_info_from_record(record)
+                for record in records
+                if record["is_image"]
+            }
+
+        folder_path = self.images_root / rel_dir if rel_dir else self.images_root
+        try:
+            scanned_files, _ = scan_directory(folder_path, rel_dir)
+        except OSError as e:
+            logger.debug(f"列出目录图片失败 {folder_path}: {e}")
+            return {}
+        return {
+            scanned.name: self._build_image_info_from_scanned(scanned)
+            for scanned in scanned_files
+        }
+
+    def _description_hits_to_infos(
+        self, hits: List[Dict], include_keywords: List[str]
+    ) -> List[Dict]:
+        """
+        把描述命中转换成图片信息：图片描述命中返回该图片，文件夹描述命中返回该文件夹（不含子目录）下的全部图片
+
+        每条结果带 snippet（命中处摘要）、match_score（相关度，越大越相关）和 match_source（image/folder），
+        同一张图片同时被两类描述命中时保留图片描述；结果按相关度从高到低排列，图片描述命中优先
+        """
+        images_by_folder: Dict[str, Dict[str, Dict]] = {}
+        results: Dict[str, Dict] = {}
+        for hit in hits:
+            folder = hit["folder"]
+            images = images_by_folder.get(folder)
+            if images is None:
+                images = images_by_folder[folder] = self._list_folder_image_infos(folder)
+
+            if hit["filename"]:
+                source = "image"
+                image_info = images.get(hit["filename"])
+                matched = [image_info] if image_info is not None else []
+            else:
+                source = "folder"
+                matched = list(images.values())
+
+            snippet = build_snippet(hit["description"], include_keywords)
+            for image_info in matched:
+                existing = results.get(image_info["relative_path"])
+                if existing is not None and (
+                    existing["match_source"] == "image" or source == "folder"
+                ):
+                    continue
+                results[image_info["relative_path"]] = dict(
+                    image_info,
+                    snippet=snippet,
+                    match_score=hit["score"],
+                    match_source=source,
+                )
+
+        return sorted(
+            results.values(),
+            key=lambda x: (-x["match_score"], x["match_source"] != "image"),
+        )
+
+    def _search_description_infos(
+        self,
+        folder_path: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+    ) -> List[Dict]:
+        """按描述文字筛选目录树下的图片，结果结构与 _search_file_infos 相同并附带摘要和相关度"""
+        hits = self._find_description_hits(
+            folder_path, include_keywords, exclude_keywords
+        )
+        return self._description_hits_to_infos(hits, include_keywords)
+
+    def _description_rank_key(self, file_info: Dict) -> Tuple:
+        """描述搜索结果的排序键：相关度降序，图片描述命中优先，其次收益率降序"""
+        return (
+            -file_info.get("match_score", 0.0),
+            file_info.get("match_source") != "image",
+            -float(file_info.get("neu_ret", 0) or 0),
+        )
+
+    def _collect_file_rows(self, folder_path: Path) -> List[ImageRow]:
+        """收集目录树下的图片行 (relative_path, name, extension, size, mtime, ctime)，用于构建列式表"""
+        records = self.catalog.list_files(folder_path)
+        if records is not None:
+            return [
+                (
+                    record["relative_path"],
+                    record["name"],
+                    record["extension"],
+                    record["size"],
+                    record["mtime"],
+                    record["ctime"],
+                )
+                for record in records
+            ]
+
+        return [
+            (
+                scanned.relative_path,
+                scanned.name,
+                scanned.extension,
+                scanned.stat.st_size,
+                scanned.stat.st_mtime,
+                scanned.stat.st_ctime,
+            )
+            for scanned in walk_files(folder_path, base=self.images_root)
+        ]
+
+    def _scan_subfolders_parallel(
+        self,
+        parent_path: Path,
+        worker: Callable[[str, Path, Dict[str, float]], List[Dict]],
+        selected_subfolders: Optional[List[str]] = None,
+        max_workers: int = SUBFOLDER_SCAN_WORKERS,
+        item_count: Callable[[List], int] = len,
+    ) -> Tuple[List[Dict], Dict]:
+        """
+        在有界线程池中并行处理父文件夹下的各个子文件夹
+
+        Args:
+            parent_path: 父文件夹绝对路径
+            worker: 处理单个子文件夹的函数，参数为 (子文件夹名, 子文件夹路径, 分阶段耗时字典)，
+                返回该子文件夹的结果列表；可在耗时字典中写入各阶段的毫秒数
+            selected_subfolders: 只处理这些子文件夹，None 表示全部非隐藏子文件夹
+            max_workers: 线程池宽度
+            item_count: 统计单个子文件夹结果数量的函数，默认取列表长度
+
+        Returns:
+            (按子文件夹顺序合并的结果列表, 调试信息)
+        """
+        if selected_subfolders is None:
+            subfolder_paths = self._list_subfolder_paths(parent_path)
+        else:
+            subfolder_paths = []
+            for subfolder_name in selected_subfolders:
+                subfolder = parent_path / subfolder_name
+                if subfolder.name.startswith(".") or not subfolder.is_dir():
+                    continue
+                subfolder_paths.append(subfolder)
+
+        def _run(subfolder: Path) -> Tuple[List[Dict], Dict]:
+            phase_timings: Dict[str, float] = {}
+            started = time.perf_counter()
+            try:
+                items = worker(subfolder.name, subfolder, phase_timings)
+            except Exception as e:
+                logger.warning(f"处理子文件夹失败 {subfolder}: {e}")
+                items = []
+            timing = {
+                "subfolder": subfolder.name,
+                "count": item_count(items),
+                "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            timing.update(
+                (phase, round(value, 2)) for phase, value in phase_timings.items()
+            )
+            return items, timing
+
+        workers = max(1, min(max_workers, len(subfolder_paths)))
+        started = time.perf_counter()
+        if workers == 1:
+            outcomes = [_run(subfolder) for subfolder in subfolder_paths]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="subfolder-scan"
+            ) as executor:
+                outcomes = list(executor.map(_run, subfolder_paths))
+
+        merged: List[Dict] = []
+        timings = []
+        for items, timing in outcomes:
+            merged.extend(items)
+            timings.append(timing)
+
+        debug = {
+            "workers": workers,
+            "subfolder_count": len(subfolder_paths),
+            "scan_ms": round((time.perf_counter() - started) * 1000, 2),
+            "subfolder_timings": timings,
+        }
+        return merged, debug
+
+    def _get_relative_folder(self, file_info: Dict, base_path: Path) -> str:
+        """图片所在目录相对 base_path 的路径，位于 base_path 本身时返回空字符串"""
+        folder_path = Path(file_info["path"]).parent.relative_to(base_path)
+        return str(folder_path) if folder_path != Path(".") else ""
+
     def _enrich_image_info(
         self,
         image_info: Dict,
@@ -152,20 +887,19 @@ class GalleryService:
     ) -> Dict:
         """为当前页图片补充重成本字段"""
         try:
-            image_path = Path(str(image_info.get("path", "")))
-            if not image_path.exists() or not image_path.is_file():
-                relative_path = image_info.get("relative_path")
-                if relative_path:
-                    image_path = self.images_root / str(relative_path)
-
-            if not image_path.exists() or not image_path.is_file():
+            # 列表阶段已经确认过文件存在，这里不再重复 exists()/is_file()，读取失败由各步骤自行兜底
+            if image_info.get("path"):
+                image_path = Path(str(image_info["path"]))
+            elif image_info.get("relative_path"):
+                image_path = self.images_root / str(image_info["relative_path"])
+            else:
                 return image_info
 
             if include_dimensions and (
                 "width" not in image_info or "height" not in image_info
             ):
                 try:
-                    dimensions = get_image_dimensions(image_path)
+                    dimensions = self.image_dimensions.get_dimensions(image_path)
                     if dimensions:
                         image_info["width"], image_info["height"] = dimensions
                 except Exception as e:
@@ -196,23 +930,7 @@ class GalleryService:
     @cached_result(timeout=300)
     def _get_folder_descriptions(self, folder_path: Path) -> Dict[str, str]:
         """读取文件夹级描述映射，避免同一页重复打开描述文件"""
-        try:
-            desc_file = folder_path / ".descriptions.json"
-            if desc_file.exists():
-                with open(desc_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return data if isinstance(data, dict) else {}
-
-            desc_file_public = folder_path / "descriptions.json"
-            if desc_file_public.exists():
-                with open(desc_file_public, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return data if isinstance(data, dict) else {}
-
-            return {}
-        except Exception as e:
-            logger.error(f"读取图片描述映射失败 {folder_path}: {e}")
-            return {}
+        return read_description_map(folder_path)
 
     def _get_image_description_from_folder(
         self, folder_path: Path, filename: str
@@ -225,19 +943,7 @@ class GalleryService:
         name_without_ext = filename.rsplit(".", 1)[0]
         individual_desc_file = folder_path / f"{name_without_ext}.json"
         if individual_desc_file.exists():
-            try:
-                with open(individual_desc_file, "r", encoding="utf-8") as f:
-                    desc_data = json.load(f)
-                if isinstance(desc_data, str):
-                    return desc_data
-                if isinstance(desc_data, dict):
-                    return (
-                        desc_data.get("description")
-                        or desc_data.get("desc")
-                        or desc_data.get("text")
-                    )
-            except Exception as e:
-                logger.error(f"读取单图描述失败 {folder_path}/{filename}: {e}")
+            return read_individual_description(individual_desc_file)
 
         return None
 
@@ -348,6 +1054,12 @@ class GalleryService:
                     ON dedupe_pairwise_results (run_key, factor_index)
                     """
                 )
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_dedupe_runs_cache_key
+                    ON dedupe_runs (cache_key)
+                    """
+                )
                 conn.commit()
                 self._dedupe_progress_db_initialized = True
             finally:
@@ -609,30 +1321,8 @@ class GalleryService:
         left_values: np.ndarray,
         right_values: np.ndarray,
     ) -> Optional[float]:
-        """按日期逐行计算截面相关性，避免构造超大中间矩阵"""
-        total_corr = 0.0
-        valid_days = 0
-
-        for left_row, right_row in zip(left_values, right_values):
-            mask = np.isfinite(left_row) & np.isfinite(right_row)
-            if mask.sum() <= 1:
-                continue
-
-            valid_left = left_row[mask]
-            valid_right = right_row[mask]
-            centered_left = valid_left - valid_left.mean()
-            centered_right = valid_right - valid_right.mean()
-            denominator = np.linalg.norm(centered_left) * np.linalg.norm(centered_right)
-            if denominator <= 0:
-                continue
-
-            total_corr += float(np.dot(centered_left, centered_right) / denominator)
-            valid_days += 1
-
-        if valid_days == 0:
-            return None
-
-        return total_corr / valid_days
+        """按日期分块计算截面相关性的均值，避免构造超大中间矩阵"""
+        return mean_rowwise_correlation(left_values, right_values)
 
     def _get_factor_data_file_path(self, factor_version: str, factor_name: str) -> Path:
         """获取相关性计算实际依赖的 parquet 路径"""
@@ -645,8 +1335,14 @@ class GalleryService:
             Path(FACTOR_DATA_ROOT) / factor_version / f"{parquet_factor_name}.parquet"
         )
 
+    def _get_dedupe_cache_key(self, cache_key: str, dedupe_mode: str) -> str:
+        """kept_only 模式使用单独的缓存键，本地结果缓存不会覆盖完整比较模式的结果"""
+        if dedupe_mode == DEDUPE_MODE_FULL:
+            return cache_key
+        return f"{cache_key}::{dedupe_mode}"
+
     def _build_dedupe_cache_signature(
-        self, images: List[Dict], threshold: float
+        self, images: List[Dict], threshold: float, dedupe_mode: str = DEDUPE_MODE_FULL
     ) -> str:
         """基于当前候选因子集合、去重规则和底层数据时间戳生成缓存签名"""
         parquet_mtime_cache: Dict[Tuple[str, str], Optional[int]] = {}
@@ -676,7 +1372,7 @@ class GalleryService:
             )
 
         payload = {
-            "rule_version": DEDUPE_RULE_VERSION,
+            "rule_version": DEDUPE_RULE_VERSIONS[dedupe_mode],
             "threshold": threshold,
             "items": signature_items,
         }
@@ -753,12 +1449,13 @@ class GalleryService:
         cache_key: str,
         threshold: float,
         target_kept_limit: Optional[int],
+        dedupe_mode: str = DEDUPE_MODE_FULL,
     ) -> Optional[Tuple[List[Dict], Dict[str, object], str]]:
         """从 SQLite 恢复当前快照，用于刷新展示而不是继续计算"""
         if not images:
             return None
 
-        signature = self._build_dedupe_cache_signature(images, threshold)
+        signature = self._build_dedupe_cache_signature(images, threshold, dedupe_mode)
         run_key = self._build_dedupe_run_key(cache_key, signature, threshold)
         run_row = self._load_dedupe_run_row(conn, run_key)
         if run_row is None:
@@ -775,6 +1472,7 @@ class GalleryService:
             cache_key=cache_key,
             threshold=threshold,
             conn=conn,
+            dedupe_mode=dedupe_mode,
         )
         kept_images = self._apply_dedupe_annotations(kept_images, annotations)
         run_status = str(run_row["status"] or "running")
@@ -803,12 +1501,13 @@ class GalleryService:
         cache_key: str,
         threshold: float = 0.6,
         conn: Optional[sqlite3.Connection] = None,
+        dedupe_mode: str = DEDUPE_MODE_FULL,
     ) -> Dict[str, Dict]:
         """读取每个因子的最大相关因子与相关性摘要"""
         if not images:
             return {}
 
-        signature = self._build_dedupe_cache_signature(images, threshold)
+        signature = self._build_dedupe_cache_signature(images, threshold, dedupe_mode)
         run_key = self._build_dedupe_run_key(cache_key, signature, threshold)
         image_map = {str(image.get("relative_path")): image for image in images}
         active_conn = conn
@@ -924,15 +1623,20 @@ class GalleryService:
 
         return images
 
-    def _get_neu_ret_sort_key(self, image_info: Dict) -> Tuple[float, str, str]:
-        """收益率排序键，收益率降序，其余字段升序打破并列"""
+    def _get_neu_ret_sort_key(self, image_info: Dict) -> Tuple[float, str, str, str]:
+        """收益率排序键，收益率降序，其余字段升序打破并列（同名因子的多种格式按相对路径固定顺序）"""
         try:
             neu_ret = float(image_info.get("neu_ret", 0) or 0)
         except (TypeError, ValueError):
             neu_ret = 0.0
         factor_version = str(image_info.get("factor_version", ""))
         factor_name = str(self._get_factor_name_from_image(image_info))
-        return (-neu_ret, factor_version.lower(), factor_name.lower())
+        return (
+            -neu_ret,
+            factor_version.lower(),
+            factor_name.lower(),
+            str(image_info.get("relative_path", "")),
+        )
 
     def _load_ranked_factor_data(
         self,
@@ -946,18 +1650,24 @@ class GalleryService:
             return factor_cache[cache_key]
 
         try:
-            from backend.utils.correlation_utils import load_and_process_factor
+            # 优先读取本地因子矩阵（只读内存映射），源文件不存在或未启用时直接读取 parquet
+            factor_matrix_service = get_factor_matrix_service()
+            df = factor_matrix_service.load(factor_version, factor_name)
+            if df is None:
+                from backend.utils.correlation_utils import load_and_process_factor
 
-            df = load_and_process_factor(factor_version, factor_name)
+                df = load_and_process_factor(factor_version, factor_name)
             if df is None:
                 factor_cache[cache_key] = None
                 return None
 
-            values = df.to_numpy(dtype=np.float32, copy=False)
-
+            # 截面标准化结果在一对多批量比较第一次用到时再补充，见 _ensure_standardized_factor_data
+            # axis_prefix 不为 None 时行列是全局坐标轴的前缀，与其他本地因子矩阵截取共同前缀即可批量比较
             factor_cache[cache_key] = {
                 "index": df.index,
-                "values": values,
+                "columns": df.columns,
+                "values": df.to_numpy(dtype=np.float32, copy=False),
+                "axis_prefix": factor_matrix_service.axis_prefix(df),
             }
             return factor_cache[cache_key]
         except Exception as e:
@@ -965,6 +1675,33 @@ class GalleryService:
             factor_cache[cache_key] = None
             return None
 
+    def _ensure_standardized_factor_data(
+        self, factor: Tuple[str, str], data: Dict
+    ) -> Dict:
+        """
+        补充一对多批量比较使用的截面标准化结果 (standardized, valid)，每个因子只计算一次
+
+        本地因子矩阵的标准化结果保存在矩阵旁边并以只读内存映射打开，与其他进程共用页缓存；
+        不在本地因子矩阵中的因子在内存中计算
+        """
+        if "standardized" in data:
+            return data
+
+        paths = get_factor_matrix_service().standardized_paths(factor[0], factor[1])
+        if paths is not None:
+            standardized = np.load(paths[0], mmap_mode="r")
+            valid = np.load(paths[1], mmap_mode="r")
+            # 读取矩阵后源文件又发生变化时形状可能不一致，改为在内存中计算
+            if standardized.shape == data["values"].shape == valid.shape:
+                data["standardized"] = standardized
+                data["valid"] = valid
+                # 工作进程按路径打开同一份文件
+                data["standardized_paths"] = paths
+                return data
+
+        data["standardized"], data["valid"] = standardize_cross_sections(data["values"])
+        return data
+
     def _calculate_mean_factor_correlation(
         self,
         image_a: Dict,
@@ -1016,6 +1753,14 @@ class GalleryService:
                 values1 = df1["values"][positions1]
                 values2 = df2["values"][positions2]
 
+            # 本地因子矩阵的股票列是全局坐标轴的前缀，宽度不同时较窄一方缺少的股票视为缺失值
+            width = min(values1.shape[1], values2.shape[1])
+            if values1.shape[1] != values2.shape[1] and df1["columns"][:width].equals(
+                df2["columns"][:width]
+            ):
+                values1 = values1[:, :width]
+                values2 = values2[:, :width]
+
             mean_corr = self._mean_rowwise_correlation(values1, values2)
             if (
                 mean_corr is None
@@ -1034,27 +1779,209 @@ class GalleryService:
             correlation_cache[cache_key] = None
             return None
 
-    def _emit_dedupe_progress(
-        self,
-        task_id: Optional[str],
-        status: str,
-        processed_factors: int,
-        total_factors: int,
-        kept_factors: int,
-        target_kept_limit: Optional[int] = None,
-        start_time: Optional[float] = None,
-        current_factor: Optional[str] = None,
-        message: str = "",
-        kept_images: Optional[List[Dict]] = None,
-        new_kept_image: Optional[Dict] = None,
-        replace_gallery: bool = False,
-    ) -> None:
-        """通过 Socket.IO 向前端广播去重进度"""
-        if not task_id:
-            return
-
-        try:
-            from backend.app import socketio
+    def _can_batch_factor_data(self, data: Dict, prior_data: Dict) -> bool:
+        """
+        两个因子能否一对多批量比较：同为本地因子矩阵（行列是全局坐标轴的前缀，截取共同前缀即可对齐），
+        或日期索引和股票列完全相同
+        """
+        if data["axis_prefix"] is not None and prior_data["axis_prefix"] is not None:
+            return True
+        return prior_data["index"].equals(data["index"]) and prior_data["columns"].equals(
+            data["columns"]
+        )
+
+    def _calculate_batch_factor_correlations(
+        self,
+        image_info: Dict,
+        prior_images: List[Dict],
+        factor_cache: Dict[Tuple[str, str], Optional[object]],
+        correlation_cache: Dict[
+            Tuple[Tuple[str, str], Tuple[str, str]], Optional[float]
+        ],
+    ) -> List[Optional[float]]:
+        """
+        计算一个因子与一组因子的平均截面相关性，结果与 prior_images 一一对应
+
+        可以批量比较的因子（见 _can_batch_factor_data）按块一次性计算，其余（需要对齐）逐对计算；
+        结果写入 correlation_cache，与 _calculate_mean_factor_correlation 共用；
+        已由 _prefetch_dedupe_correlations 在工作进程中算好的因子对直接取缓存
+        """
+        factor = (
+            str(image_info.get("factor_version", "")),
+            str(self._get_factor_name_from_image(image_info)),
+        )
+        results: List[Optional[float]] = [None] * len(prior_images)
+        batch_positions: List[int] = []
+        batch_factors: List[Tuple[str, str]] = []
+        batch_cache_keys: List[Tuple[Tuple[str, str], Tuple[str, str]]] = []
+        batch_data: List[Dict] = []
+        batched_keys = set()
+
+        data = self._load_ranked_factor_data(factor[0], factor[1], factor_cache)
+        for position, prior_image in enumerate(prior_images):
+            prior_factor = (
+                str(prior_image.get("factor_version", "")),
+                str(self._get_factor_name_from_image(prior_image)),
+            )
+            cache_key = tuple(sorted((factor, prior_factor)))
+            if cache_key in correlation_cache:
+                results[position] = correlation_cache[cache_key]
+                continue
+            if cache_key in batched_keys:
+                continue
+
+            prior_data = self._load_ranked_factor_data(
+                prior_factor[0], prior_factor[1], factor_cache
+            )
+            if (
+                data is not None
+                and prior_data is not None
+                and self._can_batch_factor_data(data, prior_data)
+            ):
+                batched_keys.add(cache_key)
+                batch_positions.append(position)
+                batch_factors.append(prior_factor)
+                batch_cache_keys.append(cache_key)
+                batch_data.append(prior_data)
+            else:
+                results[position] = self._calculate_mean_factor_correlation(
+                    prior_image, image_info, factor_cache, correlation_cache
+                )
+
+        if batch_data:
+            try:
+                self._ensure_standardized_factor_data(factor, data)
+                for prior_factor, prior_data in zip(batch_factors, batch_data):
+                    self._ensure_standardized_factor_data(prior_factor, prior_data)
+                mean_corrs = prefix_mean_correlations(
+                    data["standardized"],
+                    data["valid"],
+                    [prior_data["standardized"] for prior_data in batch_data],
+                    [prior_data["valid"] for prior_data in batch_data],
+                )
+                for position, cache_key, mean_corr in zip(
+                    batch_positions, batch_cache_keys, mean_corrs
+                ):
+                    correlation_cache[cache_key] = (
+                        None if math.isnan(mean_corr) else float(mean_corr)
+                    )
+                    results[position] = correlation_cache[cache_key]
+            except Exception as e:
+                logger.warning(
+                    f"批量计算相关性失败 {factor[1]}@{factor[0]}，改为逐对计算: {e}"
+                )
+                for position in batch_positions:
+                    results[position] = self._calculate_mean_factor_correlation(
+                        prior_images[position],
+                        image_info,
+                        factor_cache,
+                        correlation_cache,
+                    )
+
+        # 同一因子对在 prior_images 中重复出现时，后面的位置取缓存结果
+        for position, prior_image in enumerate(prior_images):
+            if results[position] is None:
+                prior_factor = (
+                    str(prior_image.get("factor_version", "")),
+                    str(self._get_factor_name_from_image(prior_image)),
+                )
+                results[position] = correlation_cache.get(
+                    tuple(sorted((factor, prior_factor)))
+                )
+        return results
+
+    def _prefetch_dedupe_correlations(
+        self,
+        images: List[Dict],
+        start: int,
+        stop: int,
+        factor_cache: Dict[Tuple[str, str], Optional[object]],
+        correlation_cache: Dict[
+            Tuple[Tuple[str, str], Tuple[str, str]], Optional[float]
+        ],
+    ) -> None:
+        """
+        full 模式下候选因子与之前全部因子比较，比较对象与判定结果无关：
+        把 images[start:stop] 各自对之前因子的相关性交给进程池提前计算，结果写入 correlation_cache
+
+        只处理有本地截面标准化文件的因子（工作进程按路径打开）；其余因子对、
+        以及进程池不可用时的整批，留给 _calculate_batch_factor_correlations 在当前线程计算
+        """
+        factor_keys = [
+            (
+                str(image.get("factor_version", "")),
+                str(self._get_factor_name_from_image(image)),
+            )
+            for image in images[:stop]
+        ]
+        shared_paths: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = {}
+
+        def _get_shared_paths(factor: Tuple[str, str]) -> Optional[Tuple[str, str]]:
+            if factor not in shared_paths:
+                data = self._load_ranked_factor_data(factor[0], factor[1], factor_cache)
+                if data is not None and data["axis_prefix"] is not None:
+                    self._ensure_standardized_factor_data(factor, data)
+                shared_paths[factor] = (
+                    data.get("standardized_paths") if data is not None else None
+                )
+            return shared_paths[factor]
+
+        tasks: List[CorrelationTask] = []
+        task_keys: List[List[Tuple[Tuple[str, str], Tuple[str, str]]]] = []
+        scheduled = set()
+        for position in range(start, stop):
+            factor = factor_keys[position]
+            candidate_paths = _get_shared_paths(factor)
+            if candidate_paths is None:
+                continue
+            prior_paths = []
+            keys = []
+            for prior_factor in factor_keys[:position]:
+                cache_key = tuple(sorted((factor, prior_factor)))
+                if cache_key in correlation_cache or cache_key in scheduled:
+                    continue
+                paths = _get_shared_paths(prior_factor)
+                if paths is None:
+                    continue
+                scheduled.add(cache_key)
+                prior_paths.append(paths)
+                keys.append(cache_key)
+            if prior_paths:
+                tasks.append((candidate_paths, prior_paths))
+                task_keys.append(keys)
+
+        if not tasks:
+            return
+        results = get_correlation_pool_service().correlate_tasks(tasks)
+        if results is None:
+            return
+        for keys, mean_corrs in zip(task_keys, results):
+            for cache_key, mean_corr in zip(keys, mean_corrs):
+                correlation_cache[cache_key] = (
+                    None if math.isnan(mean_corr) else float(mean_corr)
+                )
+
+    def _emit_dedupe_progress(
+        self,
+        task_id: Optional[str],
+        status: str,
+        processed_factors: int,
+        total_factors: int,
+        kept_factors: int,
+        target_kept_limit: Optional[int] = None,
+        start_time: Optional[float] = None,
+        current_factor: Optional[str] = None,
+        message: str = "",
+        kept_images: Optional[List[Dict]] = None,
+        new_kept_image: Optional[Dict] = None,
+        replace_gallery: bool = False,
+    ) -> None:
+        """通过 Socket.IO 向前端广播去重进度"""
+        if not task_id:
+            return
+
+        try:
+            from backend.app import socketio
 
             elapsed_seconds = 0.0
             eta_seconds = None
@@ -1117,8 +2044,16 @@ class GalleryService:
         task_id: Optional[str] = None,
         target_kept_limit: Optional[int] = None,
         continue_requested: bool = False,
+        dedupe_mode: str = DEDUPE_MODE_FULL,
     ) -> Tuple[List[Dict], Dict[str, object]]:
-        """按收益率从高到低贪心去除高相关的重复因子，使用相关系数绝对值判重"""
+        """
+        按收益率从高到低贪心去除高相关的重复因子，使用相关系数绝对值判重
+
+        dedupe_mode 为 kept_only 时只与已保留的因子比较，遇到第一个超过阈值的因子即停止，
+        比较次数从 O(n²) 降到 O(n·k)（k 为保留数量，不超过 DEDUPE_MAX_KEPT_FACTORS）；
+        最大相关注解只覆盖实际比较过的因子
+        """
+        kept_only = dedupe_mode == DEDUPE_MODE_KEPT_ONLY
         start_time = time.monotonic()
         conn: Optional[sqlite3.Connection] = None
         run_key: Optional[str] = None
@@ -1152,7 +2087,9 @@ class GalleryService:
                 return images, final_state
 
             dedupe_cache_key = cache_key or f"adhoc::{len(images)}"
-            cache_signature = self._build_dedupe_cache_signature(images, threshold)
+            cache_signature = self._build_dedupe_cache_signature(
+                images, threshold, dedupe_mode
+            )
             run_key = self._build_dedupe_run_key(
                 dedupe_cache_key, cache_signature, threshold
             )
@@ -1180,6 +2117,7 @@ class GalleryService:
                         images,
                         cache_key=cache_key,
                         threshold=threshold,
+                        dedupe_mode=dedupe_mode,
                     )
                     cached_images = self._apply_dedupe_annotations(
                         cached_images, cached_annotations
@@ -1220,6 +2158,7 @@ class GalleryService:
                 cache_key=dedupe_cache_key,
                 threshold=threshold,
                 target_kept_limit=normalized_target_kept,
+                dedupe_mode=dedupe_mode,
             )
             if existing_snapshot is not None and not continue_requested:
                 kept_images, snapshot_state, run_status = existing_snapshot
@@ -1261,6 +2200,7 @@ class GalleryService:
                     cache_key=dedupe_cache_key,
                     threshold=threshold,
                     target_kept_limit=normalized_target_kept,
+                    dedupe_mode=dedupe_mode,
                 )
                 if concurrent_snapshot is not None:
                     kept_images, snapshot_state, run_status = concurrent_snapshot
@@ -1301,6 +2241,9 @@ class GalleryService:
             correlation_cache: Dict[
                 Tuple[Tuple[str, str], Tuple[str, str]], Optional[float]
             ] = {}
+            correlation_pool = get_correlation_pool_service()
+            # images 中已提前计算相关性的位置（不含）
+            prefetched_stop = 0
             processed_prefix, kept_images = self._load_resumable_dedupe_state(
                 conn, run_key, images
             )
@@ -1313,6 +2256,7 @@ class GalleryService:
                 cache_key=dedupe_cache_key,
                 threshold=threshold,
                 conn=conn,
+                dedupe_mode=dedupe_mode,
             )
 
             if processed_prefix > 0:
@@ -1450,46 +2394,93 @@ class GalleryService:
                 if index <= processed_prefix:
                     continue
 
+                if (
+                    not kept_only
+                    and correlation_pool.enabled
+                    and index - 1 >= prefetched_stop
+                ):
+                    prefetched_stop = min(
+                        total_factors, index - 1 + correlation_pool.block_size
+                    )
+                    self._prefetch_dedupe_correlations(
+                        images,
+                        index - 1,
+                        prefetched_stop,
+                        factor_cache,
+                        correlation_cache,
+                    )
+
                 saved_comparisons = self._load_saved_factor_comparisons(
                     conn, run_key, index
                 )
                 should_hide = False
                 max_corr: Optional[float] = None
                 max_corr_with: Optional[str] = None
+                compared_count = 0
 
-                for prior_image in images[: index - 1]:
-                    prior_relative_path = str(prior_image.get("relative_path", ""))
-
-                    if prior_relative_path in saved_comparisons:
-                        corr_value = saved_comparisons[prior_relative_path]
-                    else:
-                        corr_value = self._calculate_mean_factor_correlation(
-                            prior_image,
-                            image_info,
-                            factor_cache,
-                            correlation_cache,
+                compare_images = list(kept_images) if kept_only else images[: index - 1]
+                chunk_size = (
+                    DEDUPE_KEPT_ONLY_CHUNK_SIZE if kept_only else max(1, len(compare_images))
+                )
+                for chunk_start in range(0, len(compare_images), chunk_size):
+                    chunk_images = compare_images[chunk_start : chunk_start + chunk_size]
+                    pending_priors = [
+                        prior_image
+                        for prior_image in chunk_images
+                        if str(prior_image.get("relative_path", ""))
+                        not in saved_comparisons
+                    ]
+                    batch_corrs = dict(
+                        zip(
+                            (
+                                str(prior_image.get("relative_path", ""))
+                                for prior_image in pending_priors
+                            ),
+                            self._calculate_batch_factor_correlations(
+                                image_info,
+                                pending_priors,
+                                factor_cache,
+                                correlation_cache,
+                            ),
                         )
-                        self._save_factor_comparison(
-                            conn,
-                            run_key=run_key,
-                            factor_index=index,
-                            prior_relative_path=prior_relative_path,
-                            corr=corr_value,
+                    )
+
+                    for prior_image in chunk_images:
+                        prior_relative_path = str(prior_image.get("relative_path", ""))
+
+                        if prior_relative_path in saved_comparisons:
+                            corr_value = saved_comparisons[prior_relative_path]
+                        else:
+                            corr_value = batch_corrs[prior_relative_path]
+                            self._save_factor_comparison(
+                                conn,
+                                run_key=run_key,
+                                factor_index=index,
+                                prior_relative_path=prior_relative_path,
+                                corr=corr_value,
+                            )
+                            saved_comparisons[prior_relative_path] = corr_value
+                        compared_count += 1
+
+                        corr_abs_value = (
+                            abs(corr_value) if corr_value is not None else None
                         )
-                        saved_comparisons[prior_relative_path] = corr_value
 
-                    corr_abs_value = abs(corr_value) if corr_value is not None else None
+                        if corr_value is not None and (
+                            max_corr is None or corr_abs_value > abs(max_corr)
+                        ):
+                            max_corr = float(corr_value)
+                            max_corr_with = prior_relative_path
 
-                    if corr_value is not None and (
-                        max_corr is None or corr_abs_value > abs(max_corr)
-                    ):
-                        max_corr = float(corr_value)
-                        max_corr_with = prior_relative_path
+                        if corr_abs_value is not None and corr_abs_value > threshold:
+                            should_hide = True
+                            if kept_only:
+                                break
 
-                    if corr_abs_value is not None and corr_abs_value > threshold:
-                        should_hide = True
+                    if should_hide and kept_only:
+                        break
 
-                image_info["dedupe_compared_count"] = index - 1
+                image_info["dedupe_compared_count"] = compared_count
                 image_info["dedupe_max_corr"] = max_corr
                 image_info["dedupe_max_corr_with_relative_path"] = max_corr_with
                 if max_corr_with:
@@ -1518,7 +2509,7 @@ class GalleryService:
                     is_kept=not should_hide,
                     max_corr=max_corr,
                     max_corr_with=max_corr_with,
-                    compared_count=index - 1,
+                    compared_count=compared_count,
                 )
                 conn.commit()
                 last_processed_factors = index
@@ -1706,6 +2697,13 @@ class GalleryService:
             if conn is not None:
                 conn.close()
 
+    def _list_subfolder_paths(self, folder_path: Path) -> List[Path]:
+        """列出直接子文件夹（不含隐藏目录），优先读取目录索引"""
+        names = self.catalog.list_subfolders(folder_path)
+        if names is not None:
+            return [folder_path / name for name in names]
+        return sorted(Path(entry.path) for entry in list_subdirectories(folder_path))
+
     def get_folder_list(self) -> List[Dict]:
         """获取文件夹列表"""
         try:
@@ -1714,13 +2712,12 @@ class GalleryService:
             if not self.images_root.exists():
                 return folders
 
-            for item in self.images_root.iterdir():
-                if item.is_dir() and not item.name.startswith("."):
-                    folder_info = self._get_folder_info(item)
-                    if folder_info:
-                        if not folder_info.get("has_subfolders"):
-                            continue
-                        folders.append(folder_info)
+            for folder_path in self._list_subfolder_paths(self.images_root):
+                folder_info = self._get_folder_info(folder_path)
+                if folder_info:
+                    if not folder_info.get("has_subfolders"):
+                        continue
+                    folders.append(folder_info)
 
             # 按日期降序排序
             folders.sort(key=lambda x: x.get("date", ""), reverse=True)
@@ -1751,11 +2748,10 @@ class GalleryService:
                 return []
 
             subfolders = []
-            for item in folder_path.iterdir():
-                if item.is_dir() and not item.name.startswith("."):
-                    subfolder_info = self._get_folder_info(item)
-                    if subfolder_info:
-                        subfolders.append(subfolder_info)
+            for subfolder_path in self._list_subfolder_paths(folder_path):
+                subfolder_info = self._get_folder_info(subfolder_path)
+                if subfolder_info:
+                    subfolders.append(subfolder_info)
 
             # 按日期降序排序
             subfolders.sort(key=lambda x: x.get("date", ""), reverse=True)
@@ -1775,61 +2771,113 @@ class GalleryService:
         dedupe_task_id: Optional[str] = None,
         dedupe_target_kept: Optional[int] = None,
         dedupe_continue: bool = False,
+        dedupe_mode: str = DEDUPE_MODE_FULL,
+        cursor: Optional[str] = None,
     ) -> Dict:
-        """获取图片列表"""
+        """获取图片列表（非去重模式下复用排序快照，支持 page 和 cursor 两种翻页方式）"""
         try:
             folder_path = self.images_root / folder_name
             if not folder_path.exists():
                 return {"images": [], "total": 0, "page": page, "per_page": per_page}
 
-            # 先仅收集轻量元数据，避免在分页前对所有图片解析尺寸和描述
-            all_images = []
-            for item in folder_path.rglob("*"):
-                if item.is_file() and is_image_file(item):
-                    image_info = self._build_basic_image_info(item)
-                    if image_info:
-                        all_images.append(image_info)
-
-            # 收益率排序支持
-            dedupe_source_images = None
-            dedupe_state: Optional[Dict[str, object]] = None
-            if sort_by == "neu_ret":
-                all_images = self._sort_by_neu_ret(
+            cache_key = f"single::{folder_name}"
+            if sort_by == "neu_ret" and dedupe_similar:
+                # 去重结果随任务进度变化，不走快照
+                all_images = self._apply_folder_neu_ret(
                     folder_path,
-                    all_images,
+                    self._collect_file_infos(folder_path),
                     factor_version=self._get_factor_version_from_folder(folder_name),
                 )
+                all_images.sort(key=self._get_neu_ret_sort_key)
                 dedupe_source_images = list(all_images)
-                if dedupe_similar:
-                    all_images, dedupe_state = self._dedupe_images_by_correlation(
-                        all_images,
-                        cache_key=f"single::{folder_name}",
-                        task_id=dedupe_task_id,
-                        target_kept_limit=dedupe_target_kept,
-                        continue_requested=dedupe_continue,
-                    )
-            elif sort_by == "date" or sort_by == "time":  # 支持date和time两种参数
-                all_images.sort(key=lambda x: x.get("date", ""), reverse=True)
-            elif sort_by == "size":
-                all_images.sort(key=lambda x: x.get("size", 0), reverse=True)
-            else:
-                # 默认按文件名排序
-                all_images.sort(key=lambda x: x["name"].lower())
-
-            result = self._build_image_result(all_images, page, per_page)
-            result["images"] = [
-                self._enrich_image_info(image) for image in result["images"]
-            ]
-            if sort_by == "neu_ret" and dedupe_source_images is not None:
+                dedupe_cache_key = self._get_dedupe_cache_key(cache_key, dedupe_mode)
+                all_images, dedupe_state = self._dedupe_images_by_correlation(
+                    all_images,
+                    cache_key=dedupe_cache_key,
+                    task_id=dedupe_task_id,
+                    target_kept_limit=dedupe_target_kept,
+                    continue_requested=dedupe_continue,
+                    dedupe_mode=dedupe_mode,
+                )
+                result = self._build_image_result(all_images, page, per_page)
+                result["images"] = [
+                    self._enrich_image_info(image) for image in result["images"]
+                ]
                 annotations = self._load_dedupe_annotations(
                     dedupe_source_images,
-                    cache_key=f"single::{folder_name}",
+                    cache_key=dedupe_cache_key,
+                    dedupe_mode=dedupe_mode,
                 )
                 result["images"] = self._apply_dedupe_annotations(
                     result["images"], annotations
                 )
-            if dedupe_state:
-                result["dedupe_state"] = dedupe_state
+                if dedupe_state:
+                    result["dedupe_state"] = dedupe_state
+                return result
+
+            if sort_by == "date" or sort_by == "time":  # 支持date和time两种参数
+                table_sort = "date"
+            elif sort_by in ("neu_ret", "size"):
+                table_sort = sort_by
+            else:
+                # 默认按文件名排序
+                table_sort = "name"
+
+            catalog_version = self.catalog.get_subtree_version(folder_path)
+            dedupe_marker = (
+                self._get_dedupe_runs_marker(cache_key) if sort_by == "neu_ret" else None
+            )
+            version = (
+                (
+                    catalog_version,
+                    self._get_neu_ret_file_stamp([folder_path])
+                    if sort_by == "neu_ret"
+                    else (),
+                    dedupe_marker,
+                )
+                if catalog_version is not None
+                else None
+            )
+
+            def _build() -> Dict:
+                # 先仅收集轻量元数据，避免在分页前对所有图片解析尺寸和描述
+                rows = self._collect_file_rows(folder_path)
+                factor_version = self._get_factor_version_from_folder(folder_name)
+                builder = ImageTableBuilder(with_neu_ret=table_sort == "neu_ret")
+                neu_ret_data = None
+                if table_sort == "neu_ret":
+                    try:
+                        neu_ret_data = self._load_neu_ret_data(folder_path)
+                    except Exception as e:
+                        logger.error(f"加载收益率数据失败: {e}")
+                builder.add_group(rows, factor_version, neu_ret_data)
+                table = builder.build()
+
+                annotations: Dict[str, Dict] = {}
+                if table_sort == "neu_ret" and dedupe_marker is not None:
+                    # 去重注解的签名依赖完整的排序结果
+                    annotations = self._load_dedupe_annotations(
+                        self._build_table_signature_items(table), cache_key=cache_key
+                    )
+                return {
+                    "table": table,
+                    "sort_by": table_sort,
+                    "extra": {"dedupe_group": factor_version},
+                    "annotations": annotations,
+                }
+
+            snapshot, hit = self._get_listing_snapshot(
+                ("single", folder_name, sort_by, False), version, _build
+            )
+            result = self._page_from_snapshot(
+                snapshot, page, per_page, cursor=cursor, fresh=not hit
+            )
+            result["images"] = [
+                self._enrich_image_info(image) for image in result["images"]
+            ]
+            result["images"] = self._apply_dedupe_annotations(
+                result["images"], snapshot["annotations"]
+            )
             return result
 
         except Exception as e:
@@ -1867,9 +2915,9 @@ class GalleryService:
             return None
 
     def search_files(
-        self, query: str, folder: str = "", file_type: str = "all"
+        self, query: str, folder: str = "", file_type: str = "all", mode: str = "name"
     ) -> List[Dict]:
-        """搜索文件"""
+        """搜索文件（mode 为 description 时按描述文字搜索图片）"""
         try:
             results = []
             search_path = self.images_root / folder if folder else self.images_root
@@ -1877,33 +2925,41 @@ class GalleryService:
             if not search_path.exists():
                 return results
 
-            query_lower = query.lower()
+            if mode == "description":
+                include_keywords, exclude_keywords = self._parse_search_keywords(query)
+                if not include_keywords and not exclude_keywords:
+                    return results
+                for file_info in self._search_description_infos(
+                    search_path, include_keywords, exclude_keywords
+                ):
+                    if file_type == "svg" and file_info["extension"] != ".svg":
+                        continue
+                    file_info["parent_folder"] = self._get_relative_folder(
+                        file_info, self.images_root
+                    )
+                    results.append(file_info)
+                    if len(results) >= 100:
+                        break
+                return results
 
-            for item in search_path.rglob("*"):
-                if not item.is_file():
-                    continue
+            query_lower = query.lower()
 
+            # 名称匹配
+            for file_info in self._search_file_infos(
+                search_path, [query_lower], [], images_only=file_type in ("image", "svg")
+            ):
                 # 文件类型过滤
-                if file_type == "image" and not is_image_file(item):
-                    continue
-                elif file_type == "svg" and item.suffix.lower() != ".svg":
+                if file_type == "svg" and file_info["extension"] != ".svg":
                     continue
 
-                # 名称匹配
-                if query_lower in item.name.lower():
-                    relative_path = item.relative_to(self.images_root)
-                    file_info = get_file_info(item)
-                    if file_info:
-                        file_info["relative_path"] = str(relative_path)
-                        # 添加父文件夹信息，便于在结果中显示来源
-                        folder_path = item.parent.relative_to(self.images_root)
-                        file_info["parent_folder"] = (
-                            str(folder_path) if folder_path != Path(".") else ""
-                        )
-                        results.append(file_info)
+                # 添加父文件夹信息，便于在结果中显示来源
+                file_info["parent_folder"] = self._get_relative_folder(
+                    file_info, self.images_root
+                )
+                results.append(file_info)
 
-            # 按相关性排序（名称匹配度）
-            results.sort(key=lambda x: x["name"].lower().find(query_lower))
+            # 按相关性排序（名称匹配度），只通过拼音命中的排在原文命中之后
+            results.sort(key=lambda x: self._name_match_position(x["name"], query_lower))
             return results[:100]  # 限制结果数量
 
         except Exception as e:
@@ -1911,9 +2967,18 @@ class GalleryService:
             raise
 
     def search_images_in_folder(
-        self, folder_name: str, query: str, page: int = 1, per_page: int = 20
+        self,
+        folder_name: str,
+        query: str,
+        page: int = 1,
+        per_page: int = 20,
+        mode: str = "name",
     ) -> Dict:
-        """在指定文件夹中搜索图片，支持多关键词AND搜索和屏蔽关键词"""
+        """
+        在指定文件夹中搜索图片，支持多关键词AND搜索和屏蔽关键词
+
+        mode 为 name 时匹配文件名、按收益率排序；为 description 时匹配图片描述和文件夹描述、按相关度排序
+        """
         try:
             results = []
             folder_path = self.images_root / folder_name
@@ -1922,79 +2987,58 @@ class GalleryService:
                 return results
 
             # 解析查询字符串，支持屏蔽关键词语法 no:keyword
-            include_keywords = []
-            exclude_keywords = []
-
-            for kw in query.split():
-                kw = kw.strip()
-                if not kw:
-                    continue
-                if kw.startswith("no:"):
-                    # 屏蔽关键词
-                    exclude_keyword = kw[3:].lower()
-                    if exclude_keyword:
-                        exclude_keywords.append(exclude_keyword)
-                else:
-                    # 包含关键词
-                    include_keywords.append(kw.lower())
+            include_keywords, exclude_keywords = self._parse_search_keywords(query)
 
             # 如果没有包含关键字也没有排除关键字，则返回空结果
             if not include_keywords and not exclude_keywords:
                 return results
 
-            # 遍历文件夹中的所有图片
-            for item in folder_path.rglob("*"):
-                if not item.is_file() or not is_image_file(item):
-                    continue
+            # 关键词匹配：文件名（或描述）必须包含所有包含关键词，且不能包含任何屏蔽关键词
+            if mode == "description":
+                file_infos = self._search_description_infos(
+                    folder_path, include_keywords, exclude_keywords
+                )
+            else:
+                file_infos = self._search_file_infos(
+                    folder_path, include_keywords, exclude_keywords
+                )
 
-                # 关键词匹配：文件名必须包含所有包含关键词，且不能包含任何屏蔽关键词
-                filename_lower = item.name.lower()
-                # 如果有包含关键字，检查是否全部匹配
-                include_match = not include_keywords or all(
-                    keyword in filename_lower for keyword in include_keywords
-                )
-                # 如果有排除关键字，检查是否包含任何一个
-                exclude_match = not any(
-                    keyword in filename_lower for keyword in exclude_keywords
-                )
-                if include_match and exclude_match:
-                    relative_path = item.relative_to(self.images_root)
-                    file_info = get_file_info(item)
-                    if file_info:
-                        file_info["relative_path"] = str(relative_path)
-                        file_info["folder"] = folder_name
-
-                        # 添加图片描述信息
-                        try:
-                            folder_relative = str(
-                                item.parent.relative_to(self.images_root)
-                            )
-                            description = self.get_image_description(
-                                folder_relative, item.name
-                            )
-                            file_info["description"] = description
-                            file_info["has_description"] = (
-                                description is not None and description.strip() != ""
-                            )
-                        except Exception as e:
-                            logger.debug(f"获取图片描述失败 {item}: {e}")
-                            file_info["description"] = None
-                            file_info["has_description"] = False
-
-                        # 添加收益率信息（优先从SQLite数据库读取，其次从JSON文件读取）
-                        try:
-                            neu_ret_data = self._load_neu_ret_data(item.parent)
-                            file_key = item.name.rsplit(".", 1)[0]
-                            file_info["neu_ret"] = neu_ret_data.get(file_key, 0)
-                        except Exception:
-                            file_info["neu_ret"] = 0
-
-                        # 添加匹配的关键词信息，用于排序
-                        file_info["matched_keywords"] = include_keywords
-                        results.append(file_info)
+            neu_ret_by_folder: Dict[Path, Dict[str, float]] = {}
+            for file_info in file_infos:
+                item = Path(file_info["path"])
+                file_info["folder"] = folder_name
 
-            # 按收益率降序排序
-            results.sort(key=lambda x: x.get("neu_ret", 0), reverse=True)
+                # 添加图片描述信息
+                try:
+                    folder_relative = str(
+                        item.parent.relative_to(self.images_root)
+                    )
+                    description = self.get_image_description(
+                        folder_relative, item.name
+                    )
+                    file_info["description"] = description
+                    file_info["has_description"] = (
+                        description is not None and description.strip() != ""
+                    )
+                except Exception as e:
+                    logger.debug(f"获取图片描述失败 {item}: {e}")
+                    file_info["description"] = None
+                    file_info["has_description"] = False
+
+                # 添加收益率信息（优先从SQLite数据库读取，其次从JSON文件读取）
+                file_info["neu_ret"] = self._get_image_neu_ret(
+                    item, neu_ret_by_folder
+                )
+
+                # 添加匹配的关键词信息，用于排序
+                file_info["matched_keywords"] = include_keywords
+                results.append(file_info)
+
+            if mode == "description":
+                results.sort(key=self._description_rank_key)
+            else:
+                # 按收益率降序排序
+                results.sort(key=lambda x: x.get("neu_ret", 0), reverse=True)
 
             # 分页处理
             total = len(results)
@@ -2015,10 +3059,100 @@ class GalleryService:
             logger.error(f"在文件夹中搜索图片失败 {folder_name}, {query}: {e}")
             raise
 
+    def _search_subfolder_images(
+        self,
+        parent_path: Path,
+        parent_folder: str,
+        subfolder_name: str,
+        subfolder: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+        timings: Dict[str, float],
+        description_hits: Optional[List[Dict]] = None,
+    ) -> List[Dict]:
+        """
+        在单个子文件夹中按关键词筛选图片，并补充描述和收益率（供并行扫描调用）
+
+        description_hits 不为 None 时表示按描述搜索，传入已在父文件夹范围查好的该子文件夹命中
+        """
+        # 关键词匹配：文件名（或描述）必须包含所有包含关键词，且不能包含任何屏蔽关键词
+        started = time.perf_counter()
+        if description_hits is not None:
+            file_infos = self._description_hits_to_infos(
+                description_hits, include_keywords
+            )
+        else:
+            file_infos = self._search_file_infos(
+                subfolder, include_keywords, exclude_keywords
+            )
+        timings["match_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        results = []
+        neu_ret_by_folder: Dict[Path, Dict[str, float]] = {}
+        for file_info in file_infos:
+            item = Path(file_info["path"])
+            # 添加子文件夹信息
+            file_info["subfolder"] = subfolder_name
+            file_info["subfolder_path"] = self._get_relative_folder(
+                file_info, parent_path
+            )
+            file_info["parent_folder"] = parent_folder
+
+            # 添加图片描述信息
+            try:
+                folder_relative = str(item.parent.relative_to(self.images_root))
+                description = self.get_image_description(
+                    folder_relative, item.name
+                )
+                file_info["description"] = description
+                file_info["has_description"] = (
+                    description is not None and description.strip() != ""
+                )
+            except Exception as e:
+                logger.debug(f"获取图片描述失败 {item}: {e}")
+                file_info["description"] = None
+                file_info["has_description"] = False
+
+            # 添加收益率信息（优先从SQLite数据库读取，其次从JSON文件读取）
+            file_info["neu_ret"] = self._get_image_neu_ret(item, neu_ret_by_folder)
+
+            # 添加匹配的关键词信息，用于排序
+            file_info["matched_keywords"] = include_keywords
+            results.append(file_info)
+
+        timings["enrich_ms"] = (time.perf_counter() - started) * 1000
+        return results
+
+    def _group_description_hits_by_subfolder(
+        self,
+        parent_path: Path,
+        include_keywords: List[str],
+        exclude_keywords: List[str],
+    ) -> Dict[str, List[Dict]]:
+        """在父文件夹范围内查一次描述命中，按所属直接子文件夹分组（父文件夹自身的命中不计入）"""
+        parent_rel = self.catalog.to_rel_dir(parent_path)
+        prefix = f"{parent_rel}/" if parent_rel else ""
+        hits_by_subfolder: Dict[str, List[Dict]] = {}
+        for hit in self._find_description_hits(
+            parent_path, include_keywords, exclude_keywords
+        ):
+            folder = hit["folder"]
+            if not folder.startswith(prefix) or folder == parent_rel:
+                continue
+            subfolder_name = folder[len(prefix):].split("/", 1)[0]
+            hits_by_subfolder.setdefault(subfolder_name, []).append(hit)
+        return hits_by_subfolder
+
     def search_images_in_subfolders(
-        self, parent_folder: str, query: str, page: int = 1, per_page: int = 20
+        self,
+        parent_folder: str,
+        query: str,
+        page: int = 1,
+        per_page: int = 20,
+        mode: str = "name",
     ) -> Dict:
-        """在指定父文件夹的所有子文件夹中搜索图片，支持多关键词AND搜索和屏蔽关键词"""
+        """在指定父文件夹的所有子文件夹中搜索图片，支持多关键词AND搜索和屏蔽关键词（mode 同 search_images_in_folder）"""
         try:
             results = []
             parent_path = self.images_root / parent_folder
@@ -2027,100 +3161,42 @@ class GalleryService:
                 return results
 
             # 解析查询字符串，支持屏蔽关键词语法 no:keyword
-            include_keywords = []
-            exclude_keywords = []
-
-            for kw in query.split():
-                kw = kw.strip()
-                if not kw:
-                    continue
-                if kw.startswith("no:"):
-                    # 屏蔽关键词
-                    exclude_keyword = kw[3:].lower()
-                    if exclude_keyword:
-                        exclude_keywords.append(exclude_keyword)
-                else:
-                    # 包含关键词
-                    include_keywords.append(kw.lower())
+            include_keywords, exclude_keywords = self._parse_search_keywords(query)
 
             # 如果没有包含关键字也没有排除关键字，则返回空结果
             if not include_keywords and not exclude_keywords:
                 return results
 
-            # 遍历所有子文件夹
-            for subfolder in parent_path.iterdir():
-                if not subfolder.is_dir() or subfolder.name.startswith("."):
-                    continue
-
-                # 在子文件夹中搜索图片
-                for item in subfolder.rglob("*"):
-                    if not item.is_file() or not is_image_file(item):
-                        continue
+            hits_by_subfolder = None
+            if mode == "description":
+                hits_by_subfolder = self._group_description_hits_by_subfolder(
+                    parent_path, include_keywords, exclude_keywords
+                )
 
-                    # 关键词匹配：文件名必须包含所有包含关键词，且不能包含任何屏蔽关键词
-                    filename_lower = item.name.lower()
-                    # 如果有包含关键字，检查是否全部匹配
-                    include_match = not include_keywords or all(
-                        keyword in filename_lower for keyword in include_keywords
-                    )
-                    # 如果有排除关键字，检查是否包含任何一个
-                    exclude_match = not any(
-                        keyword in filename_lower for keyword in exclude_keywords
-                    )
-                    if include_match and exclude_match:
-                        relative_path = item.relative_to(self.images_root)
-                        file_info = get_file_info(item)
-                        if file_info:
-                            file_info["relative_path"] = str(relative_path)
-                            # 添加子文件夹信息
-                            subfolder_path = item.parent.relative_to(parent_path)
-                            file_info["subfolder"] = subfolder.name
-                            file_info["subfolder_path"] = (
-                                str(subfolder_path)
-                                if subfolder_path != Path(".")
-                                else ""
-                            )
-                            file_info["parent_folder"] = parent_folder
+            # 并行遍历所有子文件夹中的图片
+            results, scan_debug = self._scan_subfolders_parallel(
+                parent_path,
+                lambda subfolder_name, subfolder, timings: self._search_subfolder_images(
+                    parent_path,
+                    parent_folder,
+                    subfolder_name,
+                    subfolder,
+                    include_keywords,
+                    exclude_keywords,
+                    timings,
+                    description_hits=(
+                        None
+                        if hits_by_subfolder is None
+                        else hits_by_subfolder.get(subfolder_name, [])
+                    ),
+                ),
+            )
 
-                            # 添加图片描述信息
-                            try:
-                                folder_relative = str(
-                                    item.parent.relative_to(self.images_root)
-                                )
-                                description = self.get_image_description(
-                                    folder_relative, item.name
-                                )
-                                file_info["description"] = description
-                                file_info["has_description"] = (
-                                    description is not None
-                                    and description.strip() != ""
-                                )
-                            except Exception as e:
-                                logger.debug(f"获取图片描述失败 {item}: {e}")
-                                file_info["description"] = None
-                                file_info["has_description"] = False
-
-                            # 添加收益率信息
-                            try:
-                                neu_ret_file = item.parent / "neu_rets.json"
-                                if neu_ret_file.exists():
-                                    with open(neu_ret_file, "r", encoding="utf-8") as f:
-                                        neu_ret_data = json.load(f)
-                                        file_key = item.name.rsplit(".", 1)[0]
-                                        file_info["neu_ret"] = neu_ret_data.get(
-                                            file_key, 0
-                                        )
-                                else:
-                                    file_info["neu_ret"] = 0
-                            except Exception:
-                                file_info["neu_ret"] = 0
-
-                            # 添加匹配的关键词信息，用于排序
-                            file_info["matched_keywords"] = include_keywords
-                            results.append(file_info)
-
-            # 按收益率降序排序
-            results.sort(key=lambda x: x.get("neu_ret", 0), reverse=True)
+            if mode == "description":
+                results.sort(key=self._description_rank_key)
+            else:
+                # 按收益率降序排序
+                results.sort(key=lambda x: x.get("neu_ret", 0), reverse=True)
 
             # 分页处理
             total = len(results)
@@ -2135,12 +3211,132 @@ class GalleryService:
                 "per_page": per_page,
                 "has_next": end_idx < total,
                 "has_prev": page > 1,
+                "debug": scan_debug,
             }
 
         except Exception as e:
             logger.error(f"在子文件夹中搜索图片失败 {parent_folder}, {query}: {e}")
             raise
 
+    def _build_name_location_index(self, parent_path: Path) -> Dict:
+        """
+        构建父文件夹下 图片名 -> 所在位置 的索引（只统计子文件夹中的图片，忽略父文件夹根目录和隐藏目录）
+
+        Returns:
+            {"names": 按小写排序的去重图片名, "locations": {图片名: [NameLocation]}（按子文件夹名排序）,
+             "neu_ret_folders": 图片所在目录, "neu_ret_stamp": 这些目录收益率文件的时间戳}
+        """
+        parent_rel = self.catalog.to_rel_dir(parent_path)
+        prefix = f"{parent_rel}/" if parent_rel else ""
+        locations: Dict[str, List[NameLocation]] = {}
+        neu_ret_by_folder: Dict[str, Dict[str, float]] = {}
+
+        for relative_path, name, extension, size, mtime, ctime in self._collect_file_rows(
+            parent_path
+        ):
+            relative_parts = relative_path[len(prefix):].split("/")
+            if len(relative_parts) < 2 or relative_parts[0].startswith("."):
+                continue
+
+            folder = relative_path.rpartition("/")[0]
+            neu_ret_data = neu_ret_by_folder.get(folder)
+            if neu_ret_data is None:
+                try:
+                    neu_ret_data = self._load_neu_ret_data(self.images_root / folder)
+                except Exception:
+                    neu_ret_data = {}
+                neu_ret_by_folder[folder] = neu_ret_data
+
+            locations.setdefault(name, []).append(
+                (
+                    relative_parts[0],
+                    relative_path,
+                    size,
+                    mtime,
+                    neu_ret_data.get(name.rsplit(".", 1)[0], 0),
+                    extension,
+                    ctime,
+                )
+            )
+
+        for name_locations in locations.values():
+            name_locations.sort(key=lambda location: location[0])
+
+        neu_ret_folders = [self.images_root / folder for folder in sorted(neu_ret_by_folder)]
+        return {
+            "names": sorted(locations, key=lambda x: x.lower()),
+            "locations": locations,
+            "neu_ret_folders": neu_ret_folders,
+            "neu_ret_stamp": self._get_neu_ret_file_stamp(neu_ret_folders),
+        }
+
+    def _get_name_location_index(self, parent_path: Path) -> Dict:
+        """
+        读取父文件夹的图片名位置索引，目录子树或收益率文件发生变化时重建
+
+        目录索引尚未建立时无法判断版本，每次实时构建且不缓存
+        """
+        catalog_version = self.catalog.get_subtree_version(parent_path)
+        if catalog_version is None:
+            return self._build_name_location_index(parent_path)
+
+        key = self.catalog.to_rel_dir(parent_path)
+        with self._name_location_indexes_lock:
+            index = self._name_location_indexes.get(key)
+        if (
+            index is not None
+            and index["catalog_version"] == catalog_version
+            and self._get_neu_ret_file_stamp(index["neu_ret_folders"])
+            == index["neu_ret_stamp"]
+        ):
+            with self._name_location_indexes_lock:
+                self._name_location_indexes.move_to_end(key)
+            return index
+
+        index = self._build_name_location_index(parent_path)
+        index["catalog_version"] = catalog_version
+        with self._name_location_indexes_lock:
+            self._name_location_indexes[key] = index
+            self._name_location_indexes.move_to_end(key)
+            while len(self._name_location_indexes) > NAME_LOCATION_INDEX_MAX_ENTRIES:
+                self._name_location_indexes.popitem(last=False)
+        return index
+
+    def _build_name_location_info(
+        self, location: NameLocation, name: str, parent_path: Path, parent_folder: str
+    ) -> Dict:
+        """把位置索引中的一条记录转换成 find_images_by_name_in_subfolders 的图片信息"""
+        subfolder_name, relative_path, size, mtime, neu_ret, extension, ctime = location
+        file_info = self._format_image_info(
+            name,
+            str(self.images_root / relative_path),
+            relative_path,
+            extension,
+            size,
+            mtime,
+            ctime,
+        )
+        # 添加子文件夹信息
+        file_info["subfolder"] = subfolder_name
+        file_info["subfolder_path"] = self._get_relative_folder(file_info, parent_path)
+        file_info["parent_folder"] = parent_folder
+
+        # 添加图片描述信息
+        try:
+            folder_relative = relative_path.rpartition("/")[0]
+            description = self.get_image_description(folder_relative, name)
+            file_info["description"] = description
+            file_info["has_description"] = (
+                description is not None and description.strip() != ""
+            )
+        except Exception as e:
+            logger.debug(f"获取图片描述失败 {relative_path}: {e}")
+            file_info["description"] = None
+            file_info["has_description"] = False
+
+        file_info["neu_ret"] = neu_ret
+        return file_info
+
     def get_unique_image_names_in_subfolders(self, parent_folder: str) -> List[str]:
         """获取父文件夹下所有子文件夹中的图片名称（去重）"""
         try:
@@ -2149,22 +3345,8 @@ class GalleryService:
             if not parent_path.exists():
                 return []
 
-            unique_names = set()
-
-            # 遍历所有子文件夹
-            for subfolder in parent_path.iterdir():
-                if not subfolder.is_dir() or subfolder.name.startswith("."):
-                    continue
-
-                # 在子文件夹中收集图片名称
-                for item in subfolder.rglob("*"):
-                    if not item.is_file() or not is_image_file(item):
-                        continue
-
-                    unique_names.add(item.name)
-
-            # 按名称排序并返回
-            return sorted(list(unique_names), key=lambda x: x.lower())
+            # 按名称排序的去重名称在构建位置索引时已经算好
+            return list(self._get_name_location_index(parent_path)["names"])
 
         except Exception as e:
             logger.error(f"获取去重图片名称失败 {parent_folder}: {e}")
@@ -2173,81 +3355,44 @@ class GalleryService:
     def find_images_by_name_in_subfolders(
         self, parent_folder: str, image_name: str
     ) -> List[Dict]:
-        """根据图片名称在所有子文件夹中查找匹配的图片"""
+        """根据图片名称在所有子文件夹中查找匹配的图片（按子文件夹名称排序）"""
         try:
-            results = []
-            parent_path = self.images_root / parent_folder
+            return self.find_images_by_names_in_subfolders(
+                parent_folder, [image_name]
+            ).get(image_name, [])
 
-            if not parent_path.exists():
-                return results
+        except Exception as e:
+            logger.error(f"根据名称查找图片失败 {parent_folder}, {image_name}: {e}")
+            raise
 
-            # 遍历所有子文件夹
-            for subfolder in parent_path.iterdir():
-                if not subfolder.is_dir() or subfolder.name.startswith("."):
-                    continue
+    def find_images_by_names_in_subfolders(
+        self, parent_folder: str, image_names: List[str]
+    ) -> Dict[str, List[Dict]]:
+        """
+        批量根据图片名称在所有子文件夹中查找匹配的图片
 
-                # 在子文件夹中查找指定名称的图片
-                for item in subfolder.rglob("*"):
-                    if not item.is_file() or not is_image_file(item):
-                        continue
+        Returns:
+            {图片名: 图片信息列表}，每个请求的名称都有对应键，找不到时为空列表
+        """
+        try:
+            parent_path = self.images_root / parent_folder
 
-                    # 精确匹配图片名称
-                    if item.name == image_name:
-                        relative_path = item.relative_to(self.images_root)
-                        file_info = get_file_info(item)
-                        if file_info:
-                            file_info["relative_path"] = str(relative_path)
-                            # 添加子文件夹信息
-                            subfolder_path = item.parent.relative_to(parent_path)
-                            file_info["subfolder"] = subfolder.name
-                            file_info["subfolder_path"] = (
-                                str(subfolder_path)
-                                if subfolder_path != Path(".")
-                                else ""
-                            )
-                            file_info["parent_folder"] = parent_folder
+            if not parent_path.exists():
+                return {name: [] for name in image_names}
 
-                            # 添加图片描述信息
-                            try:
-                                folder_relative = str(
-                                    item.parent.relative_to(self.images_root)
-                                )
-                                description = self.get_image_description(
-                                    folder_relative, item.name
-                                )
-                                file_info["description"] = description
-                                file_info["has_description"] = (
-                                    description is not None
-                                    and description.strip() != ""
-                                )
-                            except Exception as e:
-                                logger.debug(f"获取图片描述失败 {item}: {e}")
-                                file_info["description"] = None
-                                file_info["has_description"] = False
-
-                            # 添加收益率信息
-                            try:
-                                neu_ret_file = item.parent / "neu_rets.json"
-                                if neu_ret_file.exists():
-                                    with open(neu_ret_file, "r", encoding="utf-8") as f:
-                                        neu_ret_data = json.load(f)
-                                        file_key = item.name.rsplit(".", 1)[0]
-                                        file_info["neu_ret"] = neu_ret_data.get(
-                                            file_key, 0
-                                        )
-                                else:
-                                    file_info["neu_ret"] = 0
-                            except Exception:
-                                file_info["neu_ret"] = 0
-
-                            results.append(file_info)
-
-            # 按子文件夹名称排序
-            results.sort(key=lambda x: x["subfolder"])
-            return results
+            locations = self._get_name_location_index(parent_path)["locations"]
+            return {
+                name: [
+                    self._build_name_location_info(
+                        location, name, parent_path, parent_folder
+                    )
+                    for location in locations.get(name, ())
+                ]
+                for name in image_names
+            }
 
         except Exception as e:
-            logger.error(f"根据名称查找图片失败 {parent_folder}, {image_name}: {e}")
+            logger.error(f"批量根据名称查找图片失败 {parent_folder}, {len(image_names)} 个名称: {e}")
             raise
 
     def delete_files(self, folder_name: str, file_paths: List[str]) -> Dict:
@@ -2280,6 +3425,18 @@ class GalleryService:
                 except Exception as e:
                     failed_files.append({"file": file_path, "error": str(e)})
 
+            if deleted_files:
+                # 立即同步目录索引，避免节流间隔内的列表和快照仍包含已删除的文件
+                try:
+                    self.catalog.apply_changes(
+                        {
+                            self.catalog.to_rel_dir((folder_path / file_path).parent)
+                            for file_path in deleted_files
+                        }
+                    )
+                except Exception as e:
+                    logger.warning(f"删除后同步目录索引失败 {folder_name}: {e}")
+
             return {
                 "success": True,
                 "deleted_count": len(deleted_files),
@@ -2292,6 +3449,62 @@ class GalleryService:
             logger.error(f"删除文件失败: {e}")
             return {"success": False, "message": str(e)}
 
+    def prepare_export(
+        self, folder_name: str, file_paths: List[str], include_manifest: bool = False
+    ) -> Dict:
+        """
+        校验待导出的文件并整理成 ZIP 条目，文件内容由调用方流式读取
+
+        Args:
+            folder_name: 文件夹路径
+            file_paths: 相对文件夹的文件路径，与删除接口相同
+            include_manifest: 是否附带 manifest.csv（文件、因子名、收益率、描述）
+
+        Returns:
+            success 为 True 时包含 entries（(压缩包内路径, 源文件路径或 bytes) 列表）、failed_files
+        """
+        folder_path = self.images_root / folder_name
+        if not folder_path.is_dir():
+            return {"success": False, "message": "文件夹不存在"}
+
+        resolved_folder = folder_path.resolve()
+        entries = []
+        failed_files = []
+        exported = set()
+        for file_path in file_paths:
+            full_path = (folder_path / file_path).resolve()
+            if not str(full_path).startswith(str(resolved_folder) + os.sep):
+                failed_files.append({"file": file_path, "error": "路径不安全"})
+                continue
+            if not full_path.is_file():
+                failed_files.append({"file": file_path, "error": "文件不存在"})
+                continue
+            arcname = full_path.relative_to(resolved_folder).as_posix()
+            if arcname in exported:
+                continue
+            exported.add(arcname)
+            entries.append((arcname, str(full_path)))
+
+        if not entries:
+            return {"success": False, "message": "没有可导出的文件", "failed_files": failed_files}
+
+        if include_manifest:
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(["file", "factor_name", "neu_ret", "description"])
+            for arcname, source in entries:
+                source_path = Path(source)
+                factor_name = self._get_factor_name_from_image({"name": source_path.name})
+                neu_ret = self._load_neu_ret_data(source_path.parent).get(factor_name)
+                description = self._get_image_description_from_folder(
+                    source_path.parent, source_path.name
+                )
+                writer.writerow([arcname, factor_name, "" if neu_ret is None else neu_ret, description or ""])
+            # 带 BOM，Excel 直接打开时中文不乱码
+            entries.append(("manifest.csv", output.getvalue().encode("utf-8-sig")))
+
+        return {"success": True, "entries": entries, "failed_files": failed_files}
+
     def query_backup_files(self, query: str) -> List[Dict]:
         """查询备份文件"""
         try:
@@ -2312,18 +3525,20 @@ class GalleryService:
                 if not backup_path.exists():
                     continue
 
-                for item in backup_path.rglob("*"):
-                    if not item.is_file():
-                        continue
-
-                    if query_lower in item.name.lower():
-                        file_info = get_file_info(item)
-                        if file_info:
-                            file_info["backup_path"] = str(backup_path)
-                            file_info["relative_path"] = str(
-                                item.relative_to(backup_path)
-                            )
-                            results.append(file_info)
+                for scanned in walk_files(backup_path, images_only=False):
+                    if query_lower in scanned.name.lower():
+                        file_info = self._format_image_info(
+                            scanned.name,
+                            scanned.path,
+                            scanned.relative_path,
+                            scanned.extension,
+                            scanned.stat.st_size,
+                            scanned.stat.st_mtime,
+                            scanned.stat.st_ctime,
+                        )
+                        del file_info["date"]
+                        file_info["backup_path"] = str(backup_path)
+                        results.append(file_info)
 
             return results[:50]  # 限制结果数量
 
@@ -2333,26 +3548,40 @@ class GalleryService:
 
     @cached_result(timeout=300)  # 缓存5分钟
     def _get_folder_info(self, folder_path: Path) -> Optional[Dict]:
-        """获取文件夹详细信息"""
+        """获取文件夹详细信息（优先读取目录索引中的子树汇总，索引未建立时回退实时扫描）"""
         try:
-            if not folder_path.exists() or not folder_path.is_dir():
-                return None
-
-            # 统计文件
-            image_count = 0
-            total_size = 0
-
-            for item in folder_path.rglob("*"):
-                if item.is_file():
-                    total_size += item.stat().st_size
-                    if is_image_file(item):
+            aggregate = self.catalog.get_folder_aggregate(
+                folder_path, probe_files=FOLDER_DESCRIPTION_FILES
+            )
+            if aggregate is not None:
+                image_count = aggregate["image_count"]
+                total_size = aggregate["total_size"]
+                mtime = aggregate["mtime"]
+                newest_mtime = aggregate["newest_mtime"]
+                has_subfolders = aggregate["has_subfolders"]
+                description = self._get_folder_description(
+                    folder_path, candidates=aggregate["present_files"]
+                )
+            else:
+                if not folder_path.exists() or not folder_path.is_dir():
+                    return None
+
+                # 统计文件
+                image_count = 0
+                total_size = 0
+                mtime = folder_path.stat().st_mtime
+                newest_mtime = mtime
+
+                for scanned in walk_files(folder_path, images_only=False):
+                    total_size += scanned.stat.st_size
+                    if scanned.is_image:
                         image_count += 1
+                    newest_mtime = max(newest_mtime, scanned.stat.st_mtime)
 
-            # 获取修改时间
-            mtime = folder_path.stat().st_mtime
+                has_subfolders = bool(list_subdirectories(folder_path))
 
-            # 检查是否有描述文件
-            description = self._get_folder_description(folder_path)
+                # 检查是否有描述文件
+                description = self._get_folder_description(folder_path)
 
             return {
                 "name": folder_path.name,
@@ -2360,34 +3589,26 @@ class GalleryService:
                 "image_count": image_count,
                 "size": total_size,
                 "date": datetime.fromtimestamp(mtime).isoformat(),
+                "last_modified": datetime.fromtimestamp(newest_mtime).isoformat(),
                 "description": description,
                 "has_images": image_count > 0,
-                "has_subfolders": any(
-                    item.is_dir()
-                    for item in folder_path.iterdir()
-                    if not item.name.startswith(".")
-                ),
+                "has_subfolders": has_subfolders,
             }
 
         except Exception as e:
             logger.error(f"获取文件夹信息失败 {folder_path}: {e}")
             return None
 
-    def _get_folder_description(self, folder_path: Path) -> Optional[str]:
-        """获取文件夹描述"""
+    def _get_folder_description(
+        self, folder_path: Path, candidates: Optional[List[str]] = None
+    ) -> Optional[str]:
+        """获取文件夹描述（candidates 为目录索引确认存在的描述文件，可省去逐个 exists 探测）"""
         try:
-            # 查找描述文件（folder_info.md为主，README.md等为备选）
-            desc_files = [
-                "folder_info.md",
-                "README.md",
-                "readme.md",
-                "description.txt",
-                "desc.txt",
-            ]
+            desc_files = FOLDER_DESCRIPTION_FILES if candidates is None else candidates
 
             for desc_file in desc_files:
                 desc_path = folder_path / desc_file
-                if desc_path.exists() and desc_path.is_file():
+                if candidates is not None or (desc_path.exists() and desc_path.is_file()):
                     with open(desc_path, "r", encoding="utf-8") as f:
                         content = f.read().strip()
                         return content
@@ -2460,6 +3681,7 @@ class GalleryService:
 
             # 清除缓存以确保立即更新
             cache_clear()
+            self._sync_description_index(folder_path)
 
             return True
 
@@ -2467,21 +3689,24 @@ class GalleryService:
             logger.error(f"设置图片描述失败 {folder_name}/{filename}: {e}")
             return False
 
+    def _sync_description_index(self, folder_path: Path) -> None:
+        """描述写入后立即重建该目录的描述全文索引，失败不影响写入结果"""
+        try:
+            rel_dir = self.catalog.to_rel_dir(folder_path)
+            # 目录中第一次写入的 .descriptions.json / folder_info.md 还不在目录索引中，先重新列举该目录
+            self.catalog.refresh(rel_dir, force=True, force_dirs=[rel_dir])
+            self.description_index.sync_folder(rel_dir, force=True)
+        except Exception as e:
+            logger.warning(f"同步描述索引失败 {folder_path}: {e}")
+
     def get_described_images(self, folder_name: str) -> List[Dict]:
         """获取有描述的图片列表"""
         try:
             folder_path = self.images_root / folder_name
             described_images = []
 
-            # 读取收益率数据
-            neu_ret_file = folder_path / "neu_rets.json"
-            neu_ret_data = {}
-            if neu_ret_file.exists():
-                try:
-                    with open(neu_ret_file, "r", encoding="utf-8") as f:
-                        neu_ret_data = json.load(f)
-                except (json.JSONDecodeError, OSError) as e:
-                    logger.warning(f"无法读取neu_rets.json文件 {neu_ret_file}: {e}")
+            # 读取收益率数据（优先从SQLite数据库读取，其次从JSON文件读取）
+            neu_ret_data = self._load_neu_ret_data(folder_path)
 
             # 主要方案：读取隐藏的.descriptions.json文件
             desc_file = folder_path / ".descriptions.json"
@@ -2556,6 +3781,7 @@ class GalleryService:
 
             # 清除相关缓存
             cache_clear()
+            self._sync_description_index(folder_path)
 
             return True
 
@@ -2563,26 +3789,45 @@ class GalleryService:
             logger.error(f"设置文件夹描述失败 {folder_name}: {e}")
             return False
 
-    def _sort_by_neu_ret(
+    def _apply_folder_neu_ret(
         self,
         folder_path: Path,
         images: List[Dict],
         factor_version: Optional[str] = None,
         dedupe_group: Optional[str] = None,
     ) -> List[Dict]:
-        """根据收益率数据排序（优先从SQLite数据库读取，其次从JSON文件读取）"""
+        """为图片补充所在文件夹的收益率数据（优先从SQLite数据库读取，其次从JSON文件读取）"""
         try:
-            # 加载收益率数据（优先从SQLite数据库，其次从JSON文件）
             neu_ret_data = self._load_neu_ret_data(folder_path)
 
             default_factor_version = factor_version or folder_path.name
-            images = self._apply_neu_ret_metadata(
+            return self._apply_neu_ret_metadata(
                 images,
                 neu_ret_data,
                 default_factor_version=default_factor_version,
                 dedupe_group=dedupe_group,
             )
 
+        except Exception as e:
+            logger.error(f"加载收益率数据失败: {e}")
+            return images
+
+    def _sort_by_neu_ret(
+        self,
+        folder_path: Path,
+        images: List[Dict],
+        factor_version: Optional[str] = None,
+        dedupe_group: Optional[str] = None,
+    ) -> List[Dict]:
+        """根据收益率数据排序（优先从SQLite数据库读取，其次从JSON文件读取）"""
+        try:
+            images = self._apply_folder_neu_ret(
+                folder_path,
+                images,
+                factor_version=factor_version,
+                dedupe_group=dedupe_group,
+            )
+
             # 按neu_ret值从大到小排序，并在并列时稳定打破顺序
             images.sort(key=self._get_neu_ret_sort_key)
             return images
@@ -2592,6 +3837,105 @@ class GalleryService:
             # 如果排序失败，返回原始列表
             return images
 
+    def _get_cross_page_from_return_index(
+        self,
+        parent_path: Path,
+        parent_folder: str,
+        page: int,
+        per_page: int,
+        start_idx: Optional[int] = None,
+        last_path: str = "",
+    ) -> Optional[Dict]:
+        """
+        用收益率汇总索引取出跨子文件夹收益率排序的一页
+
+        汇总索引只保存有收益率记录的因子，没有记录的图片按 0 计；
+        只有整页都落在正收益区间时结果才与完整排序一致，否则返回 None 由调用方走快照
+
+        Args:
+            start_idx: 游标翻页时的起始偏移，None 表示按 page 计算
+            last_path: 游标记录的上一页最后一张图片，与索引中起始偏移前一行不一致时
+                （期间数据有变化）返回 None，由快照按图片重新定位
+        """
+        if per_page < 1:
+            return None
+        if start_idx is None:
+            if page < 1:
+                return None
+            start_idx = (page - 1) * per_page
+        else:
+            page = start_idx // per_page + 1
+
+        started = time.perf_counter()
+        try:
+            sync_stats = self.factor_return_index.sync_parent(parent_path)
+            if sync_stats is None:
+                return None
+            sync_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            end_idx = start_idx + per_page
+            top_rows = self.factor_return_index.query_top_images(parent_path, end_idx)
+            query_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            logger.warning(f"查询收益率汇总索引失败 {parent_folder}: {e}")
+            return None
+
+        total = 0
+        for subfolder in self._list_subfolder_paths(parent_path):
+            aggregate = self.catalog.get_folder_aggregate(subfolder)
+            if aggregate is None:
+                return None
+            total += aggregate["image_count"]
+        # 末页不足一整页时，只有全部图片都是正收益才与完整排序一致
+        if len(top_rows) < min(end_idx, total) or start_idx >= len(top_rows):
+            return None
+        if last_path and (start_idx == 0 or top_rows[start_idx - 1][0] != last_path):
+            return None
+
+        groups: Dict[str, Tuple[List[ImageRow], Dict[str, float]]] = {}
+        for row in top_rows[start_idx:]:
+            relative_path, name, extension, size, mtime, ctime, factor_version, neu_ret = row
+            rows, neu_ret_data = groups.setdefault(factor_version, ([], {}))
+            rows.append((relative_path, name, extension, size, mtime, ctime))
+            neu_ret_data[name[: len(name) - len(extension)]] = neu_ret
+        builder = ImageTableBuilder(with_neu_ret=True)
+        for factor_version, (rows, neu_ret_data) in groups.items():
+            builder.add_group(rows, factor_version, neu_ret_data)
+        table = builder.build()
+
+        images = self._materialize_table_rows(
+            table,
+            table.order("neu_ret").tolist(),
+            {
+                "dedupe_group": parent_folder,
+                "parent_folder": parent_folder,
+                "parent_rel": self.catalog.to_rel_dir(parent_path),
+            },
+        )
+        has_next = end_idx < total
+        return {
+            "images": [self._enrich_image_info(image) for image in images],
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "has_next": has_next,
+            "has_prev": start_idx > 0,
+            # 没有快照编号，下一页按最后一张图片在快照中的位置继续
+            "next_cursor": self._encode_listing_cursor(
+                None, end_idx, images[-1]["relative_path"]
+            )
+            if has_next and images
+            else None,
+            "debug": {
+                "source": "factor_return_index",
+                "snapshot_hit": False,
+                "sync_ms": round(sync_ms, 2),
+                "query_ms": round(query_ms, 2),
+                "synced_subfolders": sync_stats["synced"],
+            },
+        }
+
     def get_images_cross_folders_by_return(
         self,
         parent_folder: str,
@@ -2601,73 +3945,171 @@ class GalleryService:
         dedupe_task_id: Optional[str] = None,
         dedupe_target_kept: Optional[int] = None,
         dedupe_continue: bool = False,
+        dedupe_mode: str = DEDUPE_MODE_FULL,
+        cursor: Optional[str] = None,
     ) -> Dict:
-        """跨子文件夹按收益率排序获取图片列表"""
+        """跨子文件夹按收益率排序获取图片列表（非去重模式下复用排序快照）"""
         try:
             parent_path = self.images_root / parent_folder
 
             if not parent_path.exists():
                 return {"images": [], "total": 0, "page": page, "per_page": per_page}
 
-            all_images = []
-
-            # 遍历所有子文件夹
-            for subfolder in parent_path.iterdir():
-                if not subfolder.is_dir() or subfolder.name.startswith("."):
-                    continue
+            def _scan_subfolder(
+                subfolder_name: str, subfolder: Path, timings: Dict[str, float]
+            ) -> List[Dict]:
+                started = time.perf_counter()
+                image_infos = self._collect_file_infos(subfolder)
+                timings["walk_ms"] = (time.perf_counter() - started) * 1000
 
                 # 读取子文件夹的收益率数据（优先从SQLite数据库读取，其次从JSON文件读取）
+                started = time.perf_counter()
                 neu_ret_data = self._load_neu_ret_data(subfolder)
+                timings["neu_ret_ms"] = (time.perf_counter() - started) * 1000
 
-                # 收集子文件夹中的所有图片
-                for item in subfolder.rglob("*"):
-                    if not item.is_file() or not is_image_file(item):
-                        continue
-
-                    image_info = self._build_basic_image_info(item)
-                    if image_info:
-                        # 添加子文件夹信息
-                        image_info["subfolder"] = subfolder.name
-                        subfolder_path = item.parent.relative_to(parent_path)
-                        image_info["subfolder_path"] = str(subfolder_path)
-                        image_info["parent_folder"] = parent_folder
-
-                        # 添加收益率信息
-                        file_key = item.name.rsplit(".", 1)[0]
-                        image_info["factor_name"] = file_key
-                        image_info["factor_version"] = subfolder.name
-                        image_info["dedupe_group"] = parent_folder
-                        image_info["neu_ret"] = neu_ret_data.get(file_key, 0)
-
-                        all_images.append(image_info)
+                for image_info in image_infos:
+                    # 添加子文件夹信息
+                    image_info["subfolder"] = subfolder_name
+                    image_info["subfolder_path"] = self._get_relative_folder(
+                        image_info, parent_path
+                    )
+                    image_info["parent_folder"] = parent_folder
 
-            # 按收益率从大到小排序，并在并列时稳定打破顺序
-            all_images.sort(key=self._get_neu_ret_sort_key)
-            dedupe_source_images = list(all_images)
-            dedupe_state: Optional[Dict[str, object]] = None
+                    # 添加收益率信息
+                    file_key = image_info["name"].rsplit(".", 1)[0]
+                    image_info["factor_name"] = file_key
+                    image_info["factor_version"] = subfolder_name
+                    image_info["dedupe_group"] = parent_folder
+                    image_info["neu_ret"] = neu_ret_data.get(file_key, 0)
+                return image_infos
 
+            cache_key = f"cross::{parent_folder}"
             if dedupe_similar:
+                # 去重结果随任务进度变化，不走快照
+                all_images, scan_debug = self._scan_subfolders_parallel(
+                    parent_path, _scan_subfolder
+                )
+                # 按收益率从大到小排序，并在并列时稳定打破顺序
+                all_images.sort(key=self._get_neu_ret_sort_key)
+                dedupe_source_images = list(all_images)
+                dedupe_cache_key = self._get_dedupe_cache_key(cache_key, dedupe_mode)
                 all_images, dedupe_state = self._dedupe_images_by_correlation(
                     all_images,
-                    cache_key=f"cross::{parent_folder}",
+                    cache_key=dedupe_cache_key,
                     task_id=dedupe_task_id,
                     target_kept_limit=dedupe_target_kept,
                     continue_requested=dedupe_continue,
+                    dedupe_mode=dedupe_mode,
+                )
+                result = self._build_image_result(all_images, page, per_page)
+                result["images"] = [
+                    self._enrich_image_info(image) for image in result["images"]
+                ]
+                annotations = self._load_dedupe_annotations(
+                    dedupe_source_images,
+                    cache_key=dedupe_cache_key,
+                    dedupe_mode=dedupe_mode,
+                )
+                result["images"] = self._apply_dedupe_annotations(
+                    result["images"], annotations
+                )
+                if dedupe_state:
+                    result["dedupe_state"] = dedupe_state
+                result["debug"] = scan_debug
+                return result
+
+            catalog_version = self.catalog.get_subtree_version(parent_path)
+            dedupe_marker = self._get_dedupe_runs_marker(cache_key)
+            version = (
+                (
+                    catalog_version,
+                    self._get_neu_ret_file_stamp(
+                        self._list_subfolder_paths(parent_path)
+                    ),
+                    dedupe_marker,
+                )
+                if catalog_version is not None
+                else None
+            )
+
+            snapshot_key = ("cross", parent_folder, "neu_ret", False)
+            decoded = self._decode_listing_cursor(cursor) if cursor else None
+            # 首次访问的页，以及收益率汇总索引生成的浅分页游标，不必扫描全部子文件夹
+            from_return_index = cursor is None or (
+                decoded is not None
+                and decoded["s"] is None
+                and decoded["o"] <= RETURN_INDEX_MAX_CURSOR_OFFSET
+            )
+            if (
+                version is not None
+                and dedupe_marker is None
+                and from_return_index
+                and self._lookup_listing_snapshot(snapshot_key, version) is None
+            ):
+                result = self._get_cross_page_from_return_index(
+                    parent_path,
+                    parent_folder,
+                    page,
+                    per_page,
+                    start_idx=decoded["o"] if decoded is not None else None,
+                    last_path=decoded["r"] if decoded is not None else "",
+                )
+                if result is not None:
+                    return result
+
+            def _scan_subfolder_rows(
+                subfolder_name: str, subfolder: Path, timings: Dict[str, float]
+            ) -> List[Tuple[str, List[ImageRow], Dict[str, float]]]:
+                started = time.perf_counter()
+                rows = self._collect_file_rows(subfolder)
+                timings["walk_ms"] = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                neu_ret_data = self._load_neu_ret_data(subfolder)
+                timings["neu_ret_ms"] = (time.perf_counter() - started) * 1000
+                return [(subfolder_name, rows, neu_ret_data)]
+
+            def _build() -> Dict:
+                # 并行收集所有子文件夹中的图片和收益率，按子文件夹顺序写入列式表
+                groups, scan_debug = self._scan_subfolders_parallel(
+                    parent_path,
+                    _scan_subfolder_rows,
+                    item_count=lambda items: sum(len(item[1]) for item in items),
                 )
+                builder = ImageTableBuilder(with_neu_ret=True)
+                for subfolder_name, rows, neu_ret_data in groups:
+                    builder.add_group(rows, subfolder_name, neu_ret_data)
+                table = builder.build()
+
+                annotations: Dict[str, Dict] = {}
+                if dedupe_marker is not None:
+                    # 去重注解的签名依赖完整的排序结果
+                    annotations = self._load_dedupe_annotations(
+                        self._build_table_signature_items(table), cache_key=cache_key
+                    )
+                return {
+                    "table": table,
+                    "sort_by": "neu_ret",
+                    "extra": {
+                        "dedupe_group": parent_folder,
+                        "parent_folder": parent_folder,
+                        "parent_rel": self.catalog.to_rel_dir(parent_path),
+                    },
+                    "annotations": annotations,
+                    "debug": scan_debug,
+                }
 
-            result = self._build_image_result(all_images, page, per_page)
+            snapshot, hit = self._get_listing_snapshot(snapshot_key, version, _build)
+            result = self._page_from_snapshot(
+                snapshot, page, per_page, cursor=cursor, fresh=not hit
+            )
             result["images"] = [
                 self._enrich_image_info(image) for image in result["images"]
             ]
-            annotations = self._load_dedupe_annotations(
-                dedupe_source_images,
-                cache_key=f"cross::{parent_folder}",
-            )
             result["images"] = self._apply_dedupe_annotations(
-                result["images"], annotations
+                result["images"], snapshot["annotations"]
             )
-            if dedupe_state:
-                result["dedupe_state"] = dedupe_state
+            result["debug"] = dict(snapshot["debug"], snapshot_hit=hit)
             return result
 
         except Exception as e:
@@ -2681,8 +4123,9 @@ class GalleryService:
         selected_subfolders: List[str],
         page: int = 1,
         per_page: int = 20,
+        mode: str = "name",
     ) -> Dict:
-        """在指定父文件夹的选中子文件夹中搜索图片，支持多关键词AND搜索和屏蔽关键词"""
+        """在指定父文件夹的选中子文件夹中搜索图片，支持多关键词AND搜索和屏蔽关键词（mode 同 search_images_in_folder）"""
         try:
             results = []
             parent_path = self.images_root / parent_folder
@@ -2691,105 +4134,43 @@ class GalleryService:
                 return results
 
             # 解析查询字符串，支持屏蔽关键词语法 no:keyword
-            include_keywords = []
-            exclude_keywords = []
-
-            for kw in query.split():
-                kw = kw.strip()
-                if not kw:
-                    continue
-                if kw.startswith("no:"):
-                    # 屏蔽关键词
-                    exclude_keyword = kw[3:].lower()
-                    if exclude_keyword:
-                        exclude_keywords.append(exclude_keyword)
-                else:
-                    # 包含关键词
-                    include_keywords.append(kw.lower())
+            include_keywords, exclude_keywords = self._parse_search_keywords(query)
 
             # 如果没有包含关键字也没有排除关键字，则返回空结果
             if not include_keywords and not exclude_keywords:
                 return results
 
-            # 遍历选中的子文件夹
-            for subfolder_name in selected_subfolders:
-                subfolder = parent_path / subfolder_name
-                if (
-                    not subfolder.exists()
-                    or not subfolder.is_dir()
-                    or subfolder.name.startswith(".")
-                ):
-                    continue
-
-                # 在子文件夹中搜索图片
-                for item in subfolder.rglob("*"):
-                    if not item.is_file() or not is_image_file(item):
-                        continue
+            hits_by_subfolder = None
+            if mode == "description":
+                hits_by_subfolder = self._group_description_hits_by_subfolder(
+                    parent_path, include_keywords, exclude_keywords
+                )
 
-                    # 关键词匹配：文件名必须包含所有包含关键词，且不能包含任何屏蔽关键词
-                    filename_lower = item.name.lower()
-                    # 如果有包含关键字，检查是否全部匹配
-                    include_match = not include_keywords or all(
-                        keyword in filename_lower for keyword in include_keywords
-                    )
-                    # 如果有排除关键字，检查是否包含任何一个
-                    exclude_match = not any(
-                        keyword in filename_lower for keyword in exclude_keywords
-                    )
-                    if include_match and exclude_match:
-                        relative_path = item.relative_to(self.images_root)
-                        file_info = get_file_info(item)
-                        if file_info:
-                            file_info["relative_path"] = str(relative_path)
-                            # 添加子文件夹信息
-                            subfolder_path = item.parent.relative_to(parent_path)
-                            file_info["subfolder"] = subfolder.name
-                            file_info["subfolder_path"] = (
-                                str(subfolder_path)
-                                if subfolder_path != Path(".")
-                                else ""
-                            )
-                            file_info["parent_folder"] = parent_folder
+            # 并行遍历选中子文件夹中的图片
+            results, scan_debug = self._scan_subfolders_parallel(
+                parent_path,
+                lambda subfolder_name, subfolder, timings: self._search_subfolder_images(
+                    parent_path,
+                    parent_folder,
+                    subfolder_name,
+                    subfolder,
+                    include_keywords,
+                    exclude_keywords,
+                    timings,
+                    description_hits=(
+                        None
+                        if hits_by_subfolder is None
+                        else hits_by_subfolder.get(subfolder_name, [])
+                    ),
+                ),
+                selected_subfolders=selected_subfolders,
+            )
 
-                            # 添加图片描述信息
-                            try:
-                                folder_relative = str(
-                                    item.parent.relative_to(self.images_root)
-                                )
-                                description = self.get_image_description(
-                                    folder_relative, item.name
-                                )
-                                file_info["description"] = description
-                                file_info["has_description"] = (
-                                    description is not None
-                                    and description.strip() != ""
-                                )
-                            except Exception as e:
-                                logger.debug(f"获取图片描述失败 {item}: {e}")
-                                file_info["description"] = None
-                                file_info["has_description"] = False
-
-                            # 添加收益率信息
-                            try:
-                                neu_ret_file = item.parent / "neu_rets.json"
-                                if neu_ret_file.exists():
-                                    with open(neu_ret_file, "r", encoding="utf-8") as f:
-                                        neu_ret_data = json.load(f)
-                                        file_key = item.name.rsplit(".", 1)[0]
-                                        file_info["neu_ret"] = neu_ret_data.get(
-                                            file_key, 0
-                                        )
-                                else:
-                                    file_info["neu_ret"] = 0
-                            except Exception:
-                                file_info["neu_ret"] = 0
-
-                            # 添加匹配的关键词信息，用于排序
-                            file_info["matched_keywords"] = include_keywords
-                            results.append(file_info)
-
-            # 按收益率降序排序
-            results.sort(key=lambda x: x.get("neu_ret", 0), reverse=True)
+            if mode == "description":
+                results.sort(key=self._description_rank_key)
+            else:
+                # 按收益率降序排序
+                results.sort(key=lambda x: x.get("neu_ret", 0), reverse=True)
 
             # 分页处理
             total = len(results)
@@ -2804,6 +4185,7 @@ class GalleryService:
                 "per_page": per_page,
                 "has_next": end_idx < total,
                 "has_prev": page > 1,
+                "debug": scan_debug,
             }
 
         except Exception as e:
@@ -0,0 +1,772 @@
+"""
+图片目录索引服务
+把 IMAGES_ROOT 下的文件元数据持久化到 SQLite，并在内存中维护目录树镜像，按目录 mtime 增量刷新；
+每个目录额外保存自底向上汇总的子树统计（图片数、总大小、最新修改时间、是否有子文件夹）
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from backend.utils.file_utils import scan_directory
+
+IMAGE_CATALOG_DB_FILE = (
+    Path(__file__).resolve().parent.parent.parent
+    / "config"
+    / "data"
+    / "image_catalog.db"
+)
+# 同一目录树在该间隔内只做一次 mtime 巡检，避免翻页时重复 stat 整棵树
+CATALOG_REFRESH_INTERVAL = float(os.environ.get("GALLERY_CATALOG_REFRESH_INTERVAL", 5))
+CATALOG_FILE_COLUMNS = (
+    "relative_path",
+    "folder",
+    "name",
+    "size",
+    "mtime",
+    "ctime",
+    "extension",
+    "factor_name",
+    "is_image",
+)
+# catalog_dirs 中的子树汇总字段，旧版本数据库启动时自动补列
+CATALOG_AGGREGATE_COLUMNS = (
+    ("image_count", "INTEGER"),
+    ("total_size", "INTEGER"),
+    ("newest_mtime", "REAL"),
+    ("has_subfolders", "INTEGER"),
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCatalogService:
+    """图片目录索引服务类"""
+
+    def __init__(self, images_root: Path, db_file: Path = IMAGE_CATALOG_DB_FILE):
+        self.images_root = Path(images_root)
+        self.db_file = Path(db_file)
+        self._db_lock = threading.RLock()
+        self._db_initialized = False
+        self._refresh_lock = threading.RLock()
+        self._last_refresh: Dict[str, float] = {}
+        self._pending_builds: Set[str] = set()
+        self._pending_builds_guard = threading.Lock()
+        # 内存镜像：rel_dir -> {"parent", "mtime_ns", "children", "files"}
+        self._dirs: Dict[str, Dict] = {}
+        self._memory_loaded = False
+        self._change_listeners: List[Callable[[List[str]], None]] = []
+        # 子树版本号：目录或其任意后代发生变化时递增，仅在进程内有效
+        self._version_counter = 0
+        # 由目录监听服务维护：为 True 时目录变化通过事件推送，查询不再巡检 mtime
+        self.hot = False
+
+    def _ensure_schema(self) -> None:
+        """只在进程内初始化一次表结构"""
+        if self._db_initialized:
+            return
+
+        with self._db_lock:
+            if self._db_initialized:
+                return
+
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS catalog_dirs (
+                        rel_dir TEXT PRIMARY KEY,
+                        parent_dir TEXT,
+                        mtime_ns INTEGER NOT NULL,
+                        scanned_at TEXT NOT NULL,
+                        image_count INTEGER,
+                        total_size INTEGER,
+                        newest_mtime REAL,
+                        has_subfolders INTEGER
+                    )
+                    """
+                )
+                existing_columns = {
+                    row[1] for row in conn.execute("PRAGMA table_info(catalog_dirs)")
+                }
+                for column, column_type in CATALOG_AGGREGATE_COLUMNS:
+                    if column not in existing_columns:
+                        conn.execute(
+                            f"ALTER TABLE catalog_dirs ADD COLUMN {column} {column_type}"
+                        )
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_catalog_dirs_parent
+                    ON catalog_dirs (parent_dir)
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS catalog_files (
+                        relative_path TEXT PRIMARY KEY,
+                        folder TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime REAL NOT NULL,
+                        ctime REAL NOT NULL,
+                        extension TEXT NOT NULL,
+                        factor_name TEXT NOT NULL,
+                        is_image INTEGER NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_catalog_files_folder
+                    ON catalog_files (folder)
+                    """
+                )
+                conn.commit()
+                self._db_initialized = True
+            finally:
+                conn.close()
+
+    def _open_db(self) -> sqlite3.Connection:
+        """打开目录索引数据库"""
+        self._ensure_schema()
+        conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _ensure_memory_loaded(self) -> None:
+        """首次使用时把持久化索引加载到内存镜像"""
+        if self._memory_loaded:
+            return
+
+        with self._refresh_lock:
+            if self._memory_loaded:
+                return
+
+            dirs: Dict[str, Dict] = {}
+            missing_aggregates = False
+            conn = self._open_db()
+            try:
+                for row in conn.execute(
+                    """
+                    SELECT rel_dir, parent_dir, mtime_ns, image_count, total_size,
+                           newest_mtime, has_subfolders
+                    FROM catalog_dirs
+                    """
+                ):
+                    if row["image_count"] is None:
+                        missing_aggregates = True
+                    dirs[row["rel_dir"]] = {
+                        "parent": row["parent_dir"],
+                        "mtime_ns": row["mtime_ns"],
+                        "children": set(),
+                        "files": {},
+                        "image_count": row["image_count"] or 0,
+                        "total_size": row["total_size"] or 0,
+                        "newest_mtime": row["newest_mtime"] or 0.0,
+                        "has_subfolders": bool(row["has_subfolders"]),
+                        "version": 0,
+                    }
+                for row in conn.execute(
+                    f"SELECT {', '.join(CATALOG_FILE_COLUMNS)} FROM catalog_files"
+                ):
+                    node = dirs.get(row["folder"])
+                    if node is not None:
+                        node["files"][row["name"]] = dict(row)
+            finally:
+                conn.close()
+
+            for rel_dir, node in dirs.items():
+                parent_node = dirs.get(node["parent"]) if node["parent"] is not None else None
+                if parent_node is not None:
+                    parent_node["children"].add(rel_dir)
+
+            self._dirs = dirs
+            self._memory_loaded = True
+            logger.info(f"目录索引已加载: {len(dirs)} 个目录")
+
+            if missing_aggregates:
+                # 旧版本索引没有汇总字段，整体汇总一次后写回
+                conn = self._open_db()
+                try:
+                    self._rollup_dirs(conn, list(dirs))
+                    conn.commit()
+                finally:
+                    conn.close()
+
+    def to_rel_dir(self, folder_path: Path) -> str:
+        """把绝对目录转换成索引中使用的相对路径（根目录为空字符串）"""
+        rel_dir = Path(folder_path).relative_to(self.images_root).as_posix()
+        return "" if rel_dir == "." else rel_dir
+
+    def _subtree_bounds(self, rel_dir: str) -> Tuple[str, str]:
+        """子树范围查询边界，'/' 的下一个字符是 '0'，可直接走索引"""
+        return f"{rel_dir}/", f"{rel_dir}0"
+
+    def is_warm(self, rel_dir: str) -> bool:
+        """目录是否已经完整建立过索引"""
+        try:
+            self._ensure_memory_loaded()
+        except Exception as e:
+            logger.warning(f"读取目录索引状态失败 {rel_dir}: {e}")
+            return False
+        return rel_dir in self._dirs
+
+    def add_change_listener(self, callback: Callable[[List[str]], None]) -> None:
+        """注册目录变化回调，参数为发生变化的相对目录列表"""
+        self._change_listeners.append(callback)
+
+    def _notify_change_listeners(self, changed_dirs: List[str]) -> None:
+        for callback in list(self._change_listeners):
+            try:
+                callback(changed_dirs)
+            except Exception as e:
+                logger.warning(f"目录变化回调执行失败: {e}")
+
+    def _list_directory(
+        self, abs_dir: Path, rel_dir: str
+    ) -> Tuple[List[Tuple], List[str]]:
+        """列出单个目录的文件元数据和直接子目录"""
+        scanned_files, subdirs = scan_directory(abs_dir, rel_dir, images_only=False)
+        files = [
+            (
+                scanned.relative_path,
+                rel_dir,
+                scanned.name,
+                scanned.stat.st_size,
+                scanned.stat.st_mtime,
+                scanned.stat.st_ctime,
+                scanned.extension,
+                scanned.name[: len(scanned.name) - len(scanned.extension)],
+                1 if scanned.is_image else 0,
+            )
+            for scanned in scanned_files
+        ]
+        return files, subdirs
+
+    def _delete_subtree(self, conn: sqlite3.Connection, rel_dir: str) -> None:
+        """删除目录及其全部后代在索引中的记录"""
+        lower, upper = self._subtree_bounds(rel_dir)
+        if rel_dir:
+            conn.execute("DELETE FROM catalog_files WHERE folder = ?", (rel_dir,))
+            conn.execute("DELETE FROM catalog_dirs WHERE rel_dir = ?", (rel_dir,))
+            conn.execute(
+                "DELETE FROM catalog_files WHERE folder >= ? AND folder < ?",
+                (lower, upper),
+            )
+            conn.execute(
+                "DELETE FROM catalog_dirs WHERE rel_dir >= ? AND rel_dir < ?",
+                (lower, upper),
+            )
+        else:
+            conn.execute("DELETE FROM catalog_files")
+            conn.execute("DELETE FROM catalog_dirs")
+
+        node = self._dirs.pop(rel_dir, None)
+        if node is not None:
+            parent_node = self._dirs.get(node["parent"]) if node["parent"] is not None else None
+            if parent_node is not None:
+                parent_node["children"].discard(rel_dir)
+            for child in list(node["children"]):
+                self._delete_subtree_memory(child)
+
+    def _delete_subtree_memory(self, rel_dir: str) -> None:
+        node = self._dirs.pop(rel_dir, None)
+        if node is not None:
+            for child in list(node["children"]):
+                self._delete_subtree_memory(child)
+
+    def _rollup_dir(self, rel_dir: str) -> None:
+        """用目录自身文件和直接子目录的汇总值重新计算该目录的子树汇总"""
+        node = self._dirs[rel_dir]
+        image_count = 0
+        total_size = 0
+        newest_mtime = node["mtime_ns"] / 1e9
+        for record in node["files"].values():
+            total_size += record["size"]
+            if record["is_image"]:
+                image_count += 1
+            if record["mtime"] > newest_mtime:
+                newest_mtime = record["mtime"]
+
+        has_subfolders = False
+        for child in node["children"]:
+            child_node = self._dirs.get(child)
+            if child_node is None:
+                continue
+            image_count += child_node["image_count"]
+            total_size += child_node["total_size"]
+            newest_mtime = max(newest_mtime, child_node["newest_mtime"])
+            if not child.rpartition("/")[2].startswith("."):
+                has_subfolders = True
+
+        node["image_count"] = image_count
+        node["total_size"] = total_size
+        node["newest_mtime"] = newest_mtime
+        node["has_subfolders"] = has_subfolders
+
+    def _rollup_dirs(self, conn: sqlite3.Connection, changed_dirs: Iterable[str]) -> None:
+        """
+        自底向上重新汇总发生变化的目录及其全部祖先目录
+
+        未变化的子目录直接复用已保存的汇总值，因此代价只与变化目录的数量和深度有关
+        """
+        affected: Set[str] = set()
+        for rel_dir in changed_dirs:
+            # 已删除的目录从父目录开始汇总
+            candidate: Optional[str] = (
+                rel_dir if rel_dir in self._dirs else None
+            )
+            if candidate is None and rel_dir:
+                candidate = rel_dir.rpartition("/")[0]
+            while candidate is not None and candidate not in affected:
+                affected.add(candidate)
+                candidate = candidate.rpartition("/")[0] if candidate else None
+
+        ordered = sorted(
+            (rel_dir for rel_dir in affected if rel_dir in self._dirs),
+            key=lambda rel_dir: rel_dir.count("/") + (1 if rel_dir else 0),
+            reverse=True,
+        )
+        self._version_counter += 1
+        rows = []
+        for rel_dir in ordered:
+            self._rollup_dir(rel_dir)
+            node = self._dirs[rel_dir]
+            node["version"] = self._version_counter
+            rows.append(
+                (
+                    node["image_count"],
+                    node["total_size"],
+                    node["newest_mtime"],
+                    1 if node["has_subfolders"] else 0,
+                    rel_dir,
+                )
+            )
+        conn.executemany(
+            """
+            UPDATE catalog_dirs
+            SET image_count = ?, total_size = ?, newest_mtime = ?, has_subfolders = ?
+            WHERE rel_dir = ?
+            """,
+            rows,
+        )
+
+    def refresh(
+        self,
+        rel_dir: str = "",
+        force: bool = False,
+        force_dirs: Optional[Iterable[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        增量刷新目录树索引
+
+        只对 mtime 发生变化的目录重新列举文件，未变化的目录沿用索引中的子目录记录继续向下巡检
+
+        Args:
+            rel_dir: 相对 images_root 的目录
+            force: 是否忽略刷新间隔
+            force_dirs: 无论 mtime 是否变化都要重新列举的目录（文件原地修改不会改变目录 mtime）；
+                重新列举后文件记录和子目录都没有变化时不算作变化
+
+        Returns:
+            本次巡检、内容发生变化的和移除的目录数量
+        """
+        stats = {"checked_dirs": 0, "rescanned_dirs": 0, "removed_dirs": 0}
+        if not force and self._recently_refreshed(rel_dir, time.monotonic()):
+            return stats
+
+        self._ensure_memory_loaded()
+        forced = set(force_dirs or ())
+        changed_dirs: List[str] = []
+
+        with self._refresh_lock:
+            if not force and self._recently_refreshed(rel_dir, time.monotonic()):
+                return stats
+
+            conn = self._open_db()
+            try:
+                scanned_at = datetime.now().isoformat()
+                parent_dir = (
+                    None if not rel_dir else (rel_dir.rpartition("/")[0] or "")
+                )
+                stack: List[Tuple[str, Optional[str]]] = [(rel_dir, parent_dir)]
+
+                while stack:
+                    current_dir, current_parent = stack.pop()
+                    abs_dir = self.images_root / current_dir
+                    known_node = self._dirs.get(current_dir)
+                    stats["checked_dirs"] += 1
+
+                    try:
+                        mtime_ns = abs_dir.stat().st_mtime_ns
+                        is_dir = abs_dir.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if not is_dir:
+                        if known_node is not None:
+                            self._delete_subtree(conn, current_dir)
+                            stats["removed_dirs"] += 1
+                            changed_dirs.append(current_dir)
+                        continue
+
+                    previous_children = (
+                        set(known_node["children"]) if known_node is not None else set()
+                    )
+                    parent_node = (
+                        self._dirs.get(current_parent)
+                        if current_parent is not None
+                        else None
+                    )
+                    if (
+                        known_node is not None
+                        and known_node["mtime_ns"] == mtime_ns
+                        and current_dir not in forced
+                    ):
+                        # 单独建立过索引的目录在父目录首次扫描时需要重新挂到父节点下
+                        if parent_node is not None:
+                            parent_node["children"].add(current_dir)
+                        stack.extend(
+                            (child, current_dir) for child in previous_children
+                        )
+                        continue
+
+                    try:
+                        files, subdirs = self._list_directory(abs_dir, current_dir)
+                    except OSError as e:
+                        logger.warning(f"列举目录失败 {abs_dir}: {e}")
+                        continue
+
+                    file_records = {
+                        record[2]: dict(zip(CATALOG_FILE_COLUMNS, record))
+                        for record in files
+                    }
+                    current_children = {
+                        f"{current_dir}/{name}" if current_dir else name
+                        for name in subdirs
+                    }
+                    if (
+                        known_node is not None
+                        and known_node["files"] == file_records
+                        and previous_children == current_children
+                    ):
+                        # 重新列举后内容没有变化（只读访问、临时文件已删除等），
+                        # 只记下新的 mtime，不递增版本号，也不通知变化
+                        if known_node["mtime_ns"] != mtime_ns:
+                            conn.execute(
+                                """
+                                UPDATE catalog_dirs SET mtime_ns = ?, scanned_at = ?
+                                WHERE rel_dir = ?
+                                """,
+                                (mtime_ns, scanned_at, current_dir),
+                            )
+                            known_node["mtime_ns"] = mtime_ns
+                        if parent_node is not None:
+                            parent_node["children"].add(current_dir)
+                        stack.extend(
+                            (child, current_dir) for child in previous_children
+                        )
+                        continue
+
+                    stats["rescanned_dirs"] += 1
+                    changed_dirs.append(current_dir)
+                    conn.execute(
+                        "DELETE FROM catalog_files WHERE folder = ?", (current_dir,)
+                    )
+                    conn.executemany(
+                        f"""
+                        INSERT OR REPLACE INTO catalog_files (
+                            {', '.join(CATALOG_FILE_COLUMNS)}
+                        ) VALUES ({', '.join('?' for _ in CATALOG_FILE_COLUMNS)})
+                        """,
+                        files,
+                    )
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO catalog_dirs (
+                            rel_dir, parent_dir, mtime_ns, scanned_at
+                        ) VALUES (?, ?, ?, ?)
+                        """,
+                        (current_dir, current_parent, mtime_ns, scanned_at),
+                    )
+
+                    for stale_child in previous_children - current_children:
+                        self._delete_subtree(conn, stale_child)
+                        stats["removed_dirs"] += 1
+                        changed_dirs.append(stale_child)
+
+                    self._dirs[current_dir] = {
+                        "parent": current_parent,
+                        "mtime_ns": mtime_ns,
+                        "children": previous_children & current_children,
+                        "files": file_records,
+                        "image_count": 0,
+                        "total_size": 0,
+                        "newest_mtime": 0.0,
+                        "has_subfolders": False,
+                        "version": 0,
+                    }
+                    if parent_node is not None:
+                        parent_node["children"].add(current_dir)
+                    stack.extend((child, current_dir) for child in current_children)
+
+                if changed_dirs:
+                    self._rollup_dirs(conn, changed_dirs)
+                conn.commit()
+            finally:
+                conn.close()
+
+            self._last_refresh[rel_dir] = time.monotonic()
+
+        if changed_dirs:
+            logger.debug(f"目录索引已刷新 {rel_dir or '/'}: {stats}")
+            self._notify_change_listeners(changed_dirs)
+        return stats
+
+    def apply_changes(self, rel_dirs: Iterable[str]) -> List[str]:
+        """
+        应用目录监听推送的变更，只重新列举受影响的目录
+
+        Args:
+            rel_dirs: 发生文件事件的相对目录
+
+        Returns:
+            实际刷新过的目录列表
+        """
+        self._ensure_memory_loaded()
+        refreshed = []
+        for rel_dir in sorted(set(rel_dirs)):
+            # 尚未建立索引的目录交给所在的已知祖先目录巡检，新目录会被当作 mtime 变化处理
+            scope = rel_dir
+            while scope and scope not in self._dirs:
+                scope = scope.rpartition("/")[0]
+            if scope not in self._dirs:
+                continue
+            stats = self.refresh(scope, force=True, force_dirs=[rel_dir])
+            if stats["rescanned_dirs"] or stats["removed_dirs"]:
+                refreshed.append(rel_dir)
+        return refreshed
+
+    def _recently_refreshed(self, rel_dir: str, now: float) -> bool:
+        """监听服务在线，或自身/祖先目录在刷新间隔内刚巡检过"""
+        if self.hot:
+            return True
+
+        candidate = rel_dir
+        while True:
+            refreshed_at = self._last_refresh.get(candidate)
+            if refreshed_at is not None and now - refreshed_at < CATALOG_REFRESH_INTERVAL:
+                return True
+            if not candidate:
+                return False
+            candidate = candidate.rpartition("/")[0]
+
+    def invalidate(self, rel_dir: Optional[str] = None) -> None:
+        """清除刷新节流记录，下次查询时重新巡检 mtime"""
+        if rel_dir is None:
+            self._last_refresh.clear()
+            return
+
+        for key in list(self._last_refresh):
+            if key == rel_dir or not key or rel_dir.startswith(f"{key}/"):
+                self._last_refresh.pop(key, None)
+
+    def schedule_build(self, rel_dir: str) -> None:
+        """在后台线程中为冷目录建立索引"""
+        with self._pending_builds_guard:
+            if rel_dir in self._pending_builds:
+                return
+            self._pending_builds.add(rel_dir)
+
+        def _build():
+            try:
+                self.refresh(rel_dir, force=True)
+            except Exception as e:
+                logger.warning(f"后台建立目录索引失败 {rel_dir}: {e}")
+            finally:
+                with self._pending_builds_guard:
+                    self._pending_builds.discard(rel_dir)
+
+        threading.Thread(
+            target=_build, name=f"catalog-build-{rel_dir or 'root'}", daemon=True
+        ).start()
+
+    def ensure_fresh(self, folder_path: Path) -> Optional[str]:
+        """
+        确认目录已建立索引并按节流间隔巡检 mtime
+
+        Returns:
+            目录的相对路径；索引尚未建立（已安排后台构建）或巡检失败时返回 None
+        """
+        try:
+            rel_dir = self.to_rel_dir(folder_path)
+        except ValueError:
+            return None
+
+        if not self.is_warm(rel_dir):
+            self.schedule_build(rel_dir)
+            return None
+
+        try:
+            self.refresh(rel_dir)
+        except Exception as e:
+            logger.warning(f"巡检目录索引失败 {folder_path}: {e}")
+            return None
+        return rel_dir if rel_dir in self._dirs else None
+
+    def get_folder_aggregate(
+        self, folder_path: Path, probe_files: Iterable[str] = ()
+    ) -> Optional[Dict]:
+        """
+        读取目录的子树汇总
+
+        Args:
+            folder_path: 绝对目录路径
+            probe_files: 需要确认是否存在于该目录（不含子目录）的文件名
+
+        Returns:
+            {"image_count", "total_size", "mtime", "newest_mtime", "has_subfolders", "present_files"}；
+            索引尚未建立时返回 None
+        """
+        rel_dir = self.ensure_fresh(folder_path)
+        if rel_dir is None:
+            return None
+
+        with self._refresh_lock:
+            node = self._dirs.get(rel_dir)
+            if node is None:
+                return None
+            return {
+                "image_count": node["image_count"],
+                "total_size": node["total_size"],
+                "mtime": node["mtime_ns"] / 1e9,
+                "newest_mtime": node["newest_mtime"],
+                "has_subfolders": node["has_subfolders"],
+                "present_files": [name for name in probe_files if name in node["files"]],
+            }
+
+    def get_subtree_version(self, folder_path: Path) -> Optional[int]:
+        """
+        目录子树的版本号，子树内任意目录被重新列举或删除后都会变化
+
+        Returns:
+            版本号；索引尚未建立时返回 None
+        """
+        rel_dir = self.ensure_fresh(folder_path)
+        if rel_dir is None:
+            return None
+
+        with self._refresh_lock:
+            node = self._dirs.get(rel_dir)
+            return node["version"] if node is not None else None
+
+    def list_subfolders(self, folder_path: Path) -> Optional[List[str]]:
+        """列出索引中的直接子目录名（不含隐藏目录）；索引尚未建立时返回 None"""
+        rel_dir = self.ensure_fresh(folder_path)
+        if rel_dir is None:
+            return None
+
+        with self._refresh_lock:
+            node = self._dirs.get(rel_dir)
+            if node is None:
+                return None
+            names = [child.rpartition("/")[2] for child in node["children"]]
+        return sorted(name for name in names if not name.startswith("."))
+
+    def get_directory_files(self, rel_dir: str) -> Optional[List[Dict]]:
+        """读取单个目录（不含子目录）的文件记录；目录不在索引中时返回 None"""
+        with self._refresh_lock:
+            node = self._dirs.get(rel_dir)
+            return list(node["files"].values()) if node is not None else None
+
+    def snapshot_directory_files(self) -> List[Tuple[str, List[Dict]]]:
+        """复制内存镜像中全部目录的文件记录，供派生索引整体构建"""
+        self._ensure_memory_loaded()
+        with self._refresh_lock:
+            return [
+                (rel_dir, list(node["files"].values()))
+                for rel_dir, node in self._dirs.items()
+            ]
+
+    def list_subtree_dirs(self, rel_dir: str) -> Optional[List[str]]:
+        """列出内存镜像中的目录及其全部后代目录（深度优先）；目录不在索引中时返回 None"""
+        self._ensure_memory_loaded()
+        with self._refresh_lock:
+            if rel_dir not in self._dirs:
+                return None
+            result = []
+            stack = [rel_dir]
+            while stack:
+                current = stack.pop()
+                node = self._dirs.get(current)
+                if node is None:
+                    continue
+                result.append(current)
+                stack.extend(sorted(node["children"], reverse=True))
+            return result
+
+    def _iter_subtree_nodes(self, rel_dir: str) -> Iterable[Dict]:
+        """深度优先遍历内存镜像中的子树节点"""
+        stack = [rel_dir]
+        while stack:
+            node = self._dirs.get(stack.pop())
+            if node is None:
+                continue
+            yield node
+            # 固定遍历顺序，保证同一目录树每次返回的记录顺序一致
+            stack.extend(sorted(node["children"], reverse=True))
+
+    def list_files(
+        self, folder_path: Path, images_only: bool = True
+    ) -> Optional[List[Dict]]:
+        """
+        读取目录树下的全部文件记录
+
+        Args:
+            folder_path: 绝对目录路径
+            images_only: 是否只返回图片
+
+        Returns:
+            文件记录列表；索引尚未建立时返回 None，由调用方回退实时扫描
+        """
+        rel_dir = self.ensure_fresh(folder_path)
+        if rel_dir is None:
+            return None
+
+        try:
+            with self._refresh_lock:
+                records = []
+                for node in self._iter_subtree_nodes(rel_dir):
+                    for record in node["files"].values():
+                        if images_only and not record["is_image"]:
+                            continue
+                        records.append(record)
+            return records
+        except Exception as e:
+            logger.warning(f"读取目录索引失败 {folder_path}: {e}")
+            return None
+
+
+# 全局实例（按图片根目录区分）
+_catalog_services: Dict[str, ImageCatalogService] = {}
+_catalog_services_guard = threading.Lock()
+
+
+def get_image_catalog_service(images_root: Path) -> ImageCatalogService:
+    """获取全局图片目录索引服务实例"""
+    key = str(Path(images_root))
+    with _catalog_services_guard:
+        service = _catalog_services.get(key)
+        if service is None:
+            service = ImageCatalogService(Path(images_root))
+            _catalog_services[key] = service
+        return service
@@ -0,0 +1,199 @@
+"""
+图片尺寸缓存服务
+以 (路径, mtime_ns, size) 为版本把图片尺寸持久化到 SQLite，每个文件版本只探测一次；
+进程内再用 LRU 字典挡在数据库前面，翻页时同一张图片不再访问数据库
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+from backend.utils.file_utils import get_image_dimensions
+
+IMAGE_DIMENSION_DB_FILE = (
+    Path(__file__).resolve().parent.parent.parent
+    / "config"
+    / "data"
+    / "image_dimensions.db"
+)
+# 进程内缓存的图片数量上限
+IMAGE_DIMENSION_CACHE_MAX_ENTRIES = int(
+    os.environ.get("GALLERY_IMAGE_DIMENSION_CACHE_MAX_ENTRIES", 200000)
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ImageDimensionService:
+    """图片尺寸缓存服务类"""
+
+    def __init__(
+        self,
+        db_file: Path = IMAGE_DIMENSION_DB_FILE,
+        max_entries: int = IMAGE_DIMENSION_CACHE_MAX_ENTRIES,
+    ):
+        self.db_file = Path(db_file)
+        self.max_entries = max_entries
+        self._db_lock = threading.RLock()
+        self._db_initialized = False
+        # path -> ((mtime_ns, size), (宽, 高) 或 None)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Optional[Tuple[int, int]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _ensure_schema(self) -> None:
+        """只在进程内初始化一次表结构"""
+        if self._db_initialized:
+            return
+
+        with self._db_lock:
+            if self._db_initialized:
+                return
+
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS image_dimensions (
+                        path TEXT PRIMARY KEY,
+                        mtime_ns INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        width INTEGER,
+                        height INTEGER,
+                        probed_at TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.commit()
+                self._db_initialized = True
+            finally:
+                conn.close()
+
+    def _open_db(self) -> sqlite3.Connection:
+        self._ensure_schema()
+        conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _remember(
+        self, key: str, stamp: Tuple[int, int], dimensions: Optional[Tuple[int, int]]
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (stamp, dimensions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_dimensions(
+        self, image_path: Path, stat_result: Optional[os.stat_result] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        读取图片尺寸，文件版本未变化时直接返回缓存结果（无法识别尺寸的结果同样缓存）
+
+        Args:
+            image_path: 图片路径
+            stat_result: 调用方已经取得的 stat，省去一次 stat
+
+        Returns:
+            (宽, 高)；文件不存在或无法识别尺寸时返回 None
+        """
+        key = str(image_path)
+        try:
+            if stat_result is None:
+                stat_result = os.stat(key)
+        except OSError:
+            return None
+        stamp = (stat_result.st_mtime_ns, stat_result.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        try:
+            conn = self._open_db()
+            try:
+                row = conn.execute(
+                    "SELECT mtime_ns, size, width, height FROM image_dimensions WHERE path = ?",
+                    (key,),
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"读取图片尺寸缓存失败 {key}: {e}")
+            row = None
+
+        if row is not None and (row[0], row[1]) == stamp:
+            dimensions = (row[2], row[3]) if row[2] is not None else None
+            self._remember(key, stamp, dimensions)
+            with self._lock:
+                self.db_hits += 1
+            return dimensions
+
+        dimensions = get_image_dimensions(Path(key))
+        if dimensions is not None:
+            dimensions = (int(dimensions[0]), int(dimensions[1]))
+        self._remember(key, stamp, dimensions)
+        with self._lock:
+            self.misses += 1
+
+        try:
+            conn = self._open_db()
+            try:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO image_dimensions (
+                        path, mtime_ns, size, width, height, probed_at
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        key,
+                        stamp[0],
+                        stamp[1],
+                        dimensions[0] if dimensions else None,
+                        dimensions[1] if dimensions else None,
+                        datetime.now().isoformat(),
+                    ),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"写入图片尺寸缓存失败 {key}: {e}")
+        return dimensions
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+            }
+
+
+# 全局实例
+_image_dimension_service: Optional[ImageDimensionService] = None
+_image_dimension_service_lock = threading.Lock()
+
+
+def get_image_dimension_service() -> ImageDimensionService:
+    """获取全局图片尺寸缓存服务实例"""
+    global _image_dimension_service
+    if _image_dimension_service is None:
+        with _image_dimension_service_lock:
+            if _image_dimension_service is None:
+                _image_dimension_service = ImageDimensionService()
+    return _image_dimension_service
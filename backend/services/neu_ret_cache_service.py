@@ -0,0 +1,154 @@
+"""
+收益率缓存服务
+按文件夹缓存 neu_rets.db / neu_rets.json 解析结果，以收益率文件的 (mtime_ns, size) 作为版本，
+文件变化后自动重新读取；按缓存的总条目数做 LRU 淘汰
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+# 所有文件夹缓存的收益率条目总数上限
+NEU_RET_CACHE_MAX_ENTRIES = int(
+    os.environ.get("GALLERY_NEU_RET_CACHE_MAX_ENTRIES", 2000000)
+)
+# 参与版本比较的文件；数据库以 WAL 模式写入时改动先落在 -wal 文件，主文件 mtime 不变
+NEU_RET_STAMP_FILES = ("neu_rets.db", "neu_rets.db-wal", "neu_rets.json")
+
+logger = logging.getLogger(__name__)
+
+
+class NeuRetCacheService:
+    """收益率缓存服务类"""
+
+    def __init__(self, max_entries: int = NEU_RET_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # folder -> (stamp, 收益率字典)
+        self._entries: "OrderedDict[str, Tuple[Tuple, Dict[str, float]]]" = OrderedDict()
+        self._total_entries = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_file_stamp(self, folder_path: Path) -> Tuple:
+        """收益率文件的 (mtime_ns, size)，文件不存在时对应位置为 None"""
+        stamp = []
+        for file_name in NEU_RET_STAMP_FILES:
+            try:
+                stat = (folder_path / file_name).stat()
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def get(self, folder_path: Path) -> Dict[str, float]:
+        """
+        读取文件夹的收益率数据（返回的字典在缓存中共享，调用方不要修改）
+
+        Args:
+            folder_path: 文件夹路径
+
+        Returns:
+            收益率数据字典，键为图片名（不含扩展名），值为收益率数值
+        """
+        key = str(folder_path)
+        stamp = self.get_file_stamp(folder_path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+
+        neu_ret_data = self._load(folder_path, stamp)
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_entries -= len(previous[1])
+            self._entries[key] = (stamp, neu_ret_data)
+            self._total_entries += len(neu_ret_data)
+            # 至少保留刚读取的文件夹
+            while self._total_entries > self.max_entries and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_entries -= len(evicted)
+        return neu_ret_data
+
+    def invalidate(self, folder_path: Optional[Path] = None) -> None:
+        """丢弃某个文件夹（或全部）的缓存"""
+        with self._lock:
+            if folder_path is None:
+                self._entries.clear()
+                self._total_entries = 0
+                return
+            previous = self._entries.pop(str(folder_path), None)
+            if previous is not None:
+                self._total_entries -= len(previous[1])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "folders": len(self._entries),
+                "entries": self._total_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _load(self, folder_path: Path, stamp: Tuple) -> Dict[str, float]:
+        """优先从SQLite数据库读取，如果不存在或读取失败则从JSON文件读取"""
+        neu_ret_data: Dict[str, float] = {}
+
+        # 1. 优先尝试从 SQLite 数据库读取
+        db_file = folder_path / "neu_rets.db"
+        if stamp[0] is not None:
+            try:
+                conn = sqlite3.connect(str(db_file))
+                try:
+                    rows = conn.execute(
+                        "SELECT factor_name, neu_ret FROM factor_returns"
+                    ).fetchall()
+                finally:
+                    conn.close()
+                neu_ret_data = {row[0]: row[1] for row in rows}
+                logger.debug(
+                    f"从 SQLite 数据库加载收益率数据: {db_file}, 共 {len(neu_ret_data)} 条记录"
+                )
+                return neu_ret_data
+            except Exception as e:
+                logger.warning(f"无法从 SQLite 数据库读取 {db_file}: {e}")
+
+        # 2. 如果数据库不存在或读取失败，尝试从 JSON 文件读取（fallback）
+        json_file = folder_path / "neu_rets.json"
+        if stamp[2] is not None:
+            try:
+                with open(json_file, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                if isinstance(loaded, dict):
+                    neu_ret_data = loaded
+                logger.debug(
+                    f"从 JSON 文件加载收益率数据: {json_file}, 共 {len(neu_ret_data)} 条记录"
+                )
+            except (json.JSONDecodeError, OSError, UnicodeDecodeError) as e:
+                logger.warning(f"无法读取 neu_rets.json 文件 {json_file}: {e}")
+
+        return neu_ret_data
+
+
+# 全局实例
+_neu_ret_cache_service: Optional[NeuRetCacheService] = None
+_neu_ret_cache_service_lock = threading.Lock()
+
+
+def get_neu_ret_cache_service() -> NeuRetCacheService:
+    """获取全局收益率缓存服务实例"""
+    global _neu_ret_cache_service
+    if _neu_ret_cache_service is None:
+        with _neu_ret_cache_service_lock:
+            if _neu_ret_cache_service is None:
+                _neu_ret_cache_service = NeuRetCacheService()
+    return _neu_ret_cache_service
@@ -0,0 +1,336 @@
+"""
+缩略图服务
+按 (原图路径, mtime_ns, size, 尺寸) 生成缓存键，把缩小后的 WebP 写到 CACHE_DIR 下；
+SVG 栅格化与 PIL 缩放都是 CPU 密集型操作，放到进程池中执行，请求线程只等待结果；
+缓存按总字节数 LRU 淘汰
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from config.settings import CACHE_DIR, PREVIEW_SIZE, THUMBNAIL_SIZE
+from backend.utils.image_probe import probe_svg_dimensions
+
+logger = logging.getLogger(__name__)
+
+try:
+    import cairosvg
+
+    CAIROSVG_AVAILABLE = True
+except (ImportError, OSError):
+    logger.warning("cairosvg 不可用，SVG 不生成缩略图，直接返回原图")
+    CAIROSVG_AVAILABLE = False
+
+THUMBNAIL_CACHE_DIR = CACHE_DIR / "thumbnails"
+# 可用的缩略图规格：名称 -> 最大 (宽, 高)
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "thumb": THUMBNAIL_SIZE,
+    "preview": PREVIEW_SIZE,
+}
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_EXTENSION = ".webp"
+THUMBNAIL_QUALITY = 85
+# 渲染参数变化时递增，旧缓存自然失效并被淘汰
+THUMBNAIL_RENDER_VERSION = 1
+# 缩略图缓存的总字节数上限，超出后淘汰到上限的 90%
+THUMBNAIL_CACHE_MAX_BYTES = int(
+    os.environ.get("GALLERY_THUMBNAIL_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+)
+THUMBNAIL_CACHE_LOW_WATERMARK = 0.9
+# 生成缩略图的进程数
+THUMBNAIL_WORKERS = int(
+    os.environ.get("GALLERY_THUMBNAIL_WORKERS", max(1, min(4, os.cpu_count() or 1)))
+)
+# 列表接口返回后，后台预生成后续几页的缩略图；0 表示不预生成
+THUMBNAIL_PREFETCH_PAGES = int(os.environ.get("GALLERY_THUMBNAIL_PREFETCH_PAGES", 2))
+# 预生成任务在队列中的上限，避免挤占用户正在等待的请求
+THUMBNAIL_PREFETCH_MAX_PENDING = THUMBNAIL_WORKERS * 16
+# 请求线程等待生成结果的最长时间（秒），超时回退到原图
+THUMBNAIL_WAIT_TIMEOUT = 30
+
+
+def render_thumbnail(source_path: str, target_path: str, max_size: Tuple[int, int]) -> int:
+    """
+    在工作进程中生成缩略图，先写临时文件再原子替换
+
+    Returns:
+        缩略图文件字节数
+    """
+    from PIL import Image
+
+    if source_path.lower().endswith(".svg"):
+        dimensions = probe_svg_dimensions(Path(source_path))
+        scale = 1.0
+        if dimensions and dimensions[0] > 0 and dimensions[1] > 0:
+            scale = min(max_size[0] / dimensions[0], max_size[1] / dimensions[1], 1.0)
+        png_bytes = cairosvg.svg2png(url=source_path, scale=scale)
+        image = Image.open(BytesIO(png_bytes))
+    else:
+        image = Image.open(source_path)
+        # JPEG 解码时直接按比例降采样
+        image.draft("RGB", max_size)
+
+    with image:
+        image.thumbnail(max_size, Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        temp_path = f"{target_path}.{os.getpid()}.tmp"
+        try:
+            image.save(temp_path, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, target_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return os.path.getsize(target_path)
+
+
+class ThumbnailService:
+    """缩略图服务类"""
+
+    def __init__(
+        self,
+        cache_dir: Path = THUMBNAIL_CACHE_DIR,
+        max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES,
+        workers: int = THUMBNAIL_WORKERS,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._prefetch_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="thumbnail-prefetch"
+        )
+        # 缓存文件路径 -> 正在生成的任务
+        self._pending: Dict[str, Future] = {}
+        # 缓存文件路径 -> 字节数，按最近访问排序
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._entries_loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def has_size(size_name: str) -> bool:
+        return size_name in THUMBNAIL_SIZES
+
+    def _cache_path(self, source: str, stat_result: os.stat_result, size_name: str) -> Path:
+        width, height = THUMBNAIL_SIZES[size_name]
+        key = hashlib.sha1(
+            "\0".join(
+                (
+                    str(THUMBNAIL_RENDER_VERSION),
+                    f"{width}x{height}",
+                    os.path.realpath(source),
+                    str(stat_result.st_mtime_ns),
+                    str(stat_result.st_size),
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}{THUMBNAIL_EXTENSION}"
+
+    def _load_entries(self) -> None:
+        """首次使用时扫描缓存目录，按 mtime 恢复 LRU 顺序（调用方持有锁）"""
+        if self._entries_loaded:
+            return
+        self._entries_loaded = True
+
+        found = []
+        if self.cache_dir.exists():
+            for sub_dir in os.scandir(self.cache_dir):
+                if not sub_dir.is_dir():
+                    continue
+                for entry in os.scandir(sub_dir.path):
+                    if not entry.name.endswith(THUMBNAIL_EXTENSION):
+                        continue
+                    try:
+                        stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    found.append((stat_result.st_mtime, entry.path, stat_result.st_size))
+        found.sort()
+        for _, path, size in found:
+            self._entries[path] = size
+            self._total_bytes += size
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # 应用以多线程方式运行，fork 会复制其他线程持有的锁，工作进程用 spawn 启动
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _lookup(self, target: Path) -> bool:
+        """缓存命中时刷新 LRU 顺序"""
+        key = str(target)
+        with self._lock:
+            self._load_entries()
+            if key in self._entries:
+                if target.exists():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True
+                self._total_bytes -= self._entries.pop(key)
+            return False
+
+    def _record(self, key: str, future: Future) -> None:
+        """生成完成后登记缓存条目，必要时淘汰"""
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                if isinstance(future.exception(), BrokenProcessPool):
+                    # 工作进程异常退出后进程池不可再用，下次提交时重建
+                    self._executor = None
+                return
+            size = future.result()
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """淘汰最久未访问的缩略图直到低于水位线（调用方持有锁）"""
+        target_bytes = self.max_bytes * THUMBNAIL_CACHE_LOW_WATERMARK
+        while self._entries and self._total_bytes > target_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(key)
+            except OSError:
+                pass
+
+    def _submit(
+        self, source: str, size_name: str, prefetch: bool = False
+    ) -> Tuple[Optional[Path], Optional[Future]]:
+        """
+        缓存命中时返回 (缩略图路径, None)，否则提交生成任务并返回 (缩略图路径, 任务)；
+        无法生成缩略图时返回 (None, None)
+        """
+        if source.lower().endswith(".svg") and not CAIROSVG_AVAILABLE:
+            return None, None
+        try:
+            stat_result = os.stat(source)
+        except OSError:
+            return None, None
+
+        target = self._cache_path(source, stat_result, size_name)
+        if self._lookup(target):
+            return target, None
+
+        key = str(target)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return target, future
+            if prefetch and len(self._pending) >= THUMBNAIL_PREFETCH_MAX_PENDING:
+                return target, None
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                future = self._get_executor().submit(
+                    render_thumbnail, source, key, THUMBNAIL_SIZES[size_name]
+                )
+            except BrokenProcessPool:
+                self._executor = None
+                return None, None
+            except RuntimeError as e:
+                # 进程池已关闭（解释器正在退出）时不再接受任务，静默回退到原图
+                if "shutdown" not in str(e):
+                    logger.warning(f"提交缩略图任务失败 {source}: {e}")
+                return None, None
+            except Exception as e:
+                logger.warning(f"提交缩略图任务失败 {source}: {e}")
+                return None, None
+            self.misses += 1
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._record(key, done))
+        return target, future
+
+    def get_thumbnail(self, source_path: str, size_name: str) -> Optional[str]:
+        """
+        获取缩略图，未生成时等待工作进程生成
+
+        Args:
+            source_path: 已经过路径校验的原图完整路径
+            size_name: 缩略图规格名称
+
+        Returns:
+            缩略图文件路径；无法生成时返回 None，由调用方回退到原图
+        """
+        target, future = self._submit(str(source_path), size_name)
+        if target is None:
+            return None
+        if future is not None:
+            try:
+                future.result(timeout=THUMBNAIL_WAIT_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"生成缩略图失败 {source_path}: {e}")
+                return None
+        return str(target)
+
+    def prefetch(self, source_paths: Iterable[str], size_name: str) -> int:
+        """提交一批缩略图生成任务，不等待结果；返回新提交的任务数"""
+        submitted = 0
+        for source_path in source_paths:
+            target, future = self._submit(str(source_path), size_name, prefetch=True)
+            if future is not None:
+                submitted += 1
+        return submitted
+
+    def schedule_prefetch(
+        self, load_source_paths: Callable[[], List[str]], size_name: str
+    ) -> None:
+        """在后台线程中取得待预生成的原图列表（通常是后续几页）并提交生成任务"""
+
+        def run():
+            try:
+                self.prefetch(load_source_paths(), size_name)
+            except Exception as e:
+                logger.debug(f"预生成缩略图失败: {e}")
+
+        self._prefetch_executor.submit(run)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# 全局实例
+_thumbnail_service: Optional[ThumbnailService] = None
+_thumbnail_service_lock = threading.Lock()
+
+
+def get_thumbnail_service() -> ThumbnailService:
+    """获取全局缩略图服务实例"""
+    global _thumbnail_service
+    if _thumbnail_service is None:
+        with _thumbnail_service_lock:
+            if _thumbnail_service is None:
+                _thumbnail_service = ThumbnailService()
+    return _thumbnail_service
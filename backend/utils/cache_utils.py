@@ -24,7 +24,8 @@ class SimpleCache:
             if time.time() < expires_at:
                 return value
             else:
-                del self.cache[key]
+                # 并发读取时可能已被其他线程删除
+                self.cache.pop(key, None)
         return None
     
     def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
@@ -104,6 +105,9 @@ def cached_result(timeout: int = 300, key_prefix: str = ''):
         # 添加缓存操作方法
         wrapper.cache_clear = lambda: _cache.clear()
         wrapper.cache_info = lambda: {'size': _cache.size()}
+        wrapper.cache_delete = lambda *args, **kwargs: _cache.delete(
+            f"{key_prefix}{func.__name__}_{get_cache_key(*args, **kwargs)}"
+        )
         
         return wrapper
     
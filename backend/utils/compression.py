@@ -0,0 +1,67 @@
+"""
+响应压缩
+按 Accept-Encoding 协商 brotli / gzip，只压缩超过阈值的 JSON 和 HTML 响应；
+图片、ZIP 等已经压缩过的内容和流式响应保持原样
+"""
+import gzip
+import os
+from typing import Optional
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# 小于该字节数的响应不压缩：压缩收益抵不过 CPU 开销
+COMPRESSION_MIN_BYTES = int(os.environ.get("GALLERY_COMPRESSION_MIN_BYTES", 1024))
+# 动态响应每次都要重新压缩：gzip 等级 1 的体积只比等级 6 大约 5%，耗时约为其 1/5
+GZIP_COMPRESS_LEVEL = 1
+BROTLI_QUALITY = 4
+COMPRESSIBLE_MIMETYPES = frozenset(["application/json", "text/html"])
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """按客户端声明的权重选择编码，权重相同时优先 brotli"""
+    candidates = []
+    if BROTLI_AVAILABLE and accept_encodings["br"] > 0:
+        candidates.append((accept_encodings["br"], 1, "br"))
+    if accept_encodings["gzip"] > 0:
+        candidates.append((accept_encodings["gzip"], 0, "gzip"))
+    if not candidates:
+        return None
+    return max(candidates)[2]
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 使相同内容的压缩结果一致
+    return gzip.compress(data, compresslevel=GZIP_COMPRESS_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings, min_bytes: int = COMPRESSION_MIN_BYTES):
+    """满足条件时原地压缩响应体并补充 Content-Encoding / Vary 头"""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    # 是否压缩取决于 Accept-Encoding，无论本次是否压缩都要告知缓存
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress_body(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,237 @@
+"""
+截面相关性计算内核
+去重时两两比较因子：每个交易日取两个因子都有值的股票计算 Pearson 相关，再对所有有效交易日取均值。
+按日期分块整体计算（掩码中心化、逐行求和、逐行点积），不再逐日循环；
+中间结果用 float64 计算，分块大小限制临时数组的内存占用
+
+一对多比较（新因子对所有已处理因子）使用预先标准化的截面：
+每个因子只按自身有效股票做一次 z-score，之后对任意因子组合用共同有效股票上的
+一阶、二阶矩（n、Σx、Σy、Σxy、Σx²、Σy²）还原出与逐对计算相同的相关系数；
+本地因子矩阵的行列是全局坐标轴的前缀，形状不同的因子按共同前缀分组后批量计算
+"""
+import numpy as np
+from typing import List, Optional, Tuple
+
+# 每块最多处理的元素数（行数 × 股票数），float64 临时数组约 2MB，能留在 CPU 缓存里
+CORRELATION_BLOCK_ELEMENTS = 1 << 18
+# 一对多比较时每块最多处理的元素数（因子数 × 行数 × 股票数），float32 堆叠数组约 4MB
+BATCH_BLOCK_ELEMENTS = 1 << 20
+# 共同有效股票上的方差小于 Σz² 的该比例时视为常数截面（对应逐对计算中方差为 0 的跳过规则），
+# 用于吸收 float32 累加的舍入误差
+ZERO_VARIANCE_RTOL = 1e-5
+
+
+def _row_dot(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", left, right)
+
+
+def _masked_float64(values: np.ndarray, mask: np.ndarray, bits: np.ndarray) -> np.ndarray:
+    """
+    缺失位置置 0 并升为 float64
+
+    float32 用按位与清零（0 的位模式全为 0），比 np.where 在随机分布的掩码上快一倍以上；
+    其他类型回退到 np.where
+    """
+    if values.dtype == np.float32:
+        return np.bitwise_and(values.view(np.uint32), bits).view(np.float32).astype(np.float64)
+    return np.where(mask, values, np.float64(0))
+
+
+def rowwise_correlation_sums(
+    left_values: np.ndarray,
+    right_values: np.ndarray,
+    block_elements: int = CORRELATION_BLOCK_ELEMENTS,
+) -> "tuple[float, int]":
+    """
+    逐日截面相关性的 (总和, 有效天数)
+
+    有效股票数 ≤ 1 或任一方截面方差为 0 的交易日跳过，与逐行实现的规则相同
+    """
+    row_count = left_values.shape[0]
+    column_count = left_values.shape[1] if left_values.ndim == 2 else 1
+    block_rows = max(1, block_elements // max(column_count, 1))
+
+    total_corr = 0.0
+    valid_days = 0
+    for start in range(0, row_count, block_rows):
+        left = left_values[start:start + block_rows]
+        right = right_values[start:start + block_rows]
+        mask = np.isfinite(left)
+        mask &= np.isfinite(right)
+        counts = np.count_nonzero(mask, axis=1)
+
+        # 有效位置全 1、缺失位置全 0 的位掩码；升为 float64 的副本后续原地计算
+        bits = mask.astype(np.uint32)
+        bits *= np.uint32(0xFFFFFFFF)
+        left = _masked_float64(left, mask, bits)
+        right = _masked_float64(right, mask, bits)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            left -= (left.sum(axis=1) / counts)[:, None]
+            right -= (right.sum(axis=1) / counts)[:, None]
+        # 中心化后把缺失位置重新置 0，不参与点积
+        left *= mask
+        right *= mask
+
+        numerator = _row_dot(left, right)
+        denominator = np.sqrt(_row_dot(left, left)) * np.sqrt(_row_dot(right, right))
+        valid = (counts > 1) & (denominator > 0)
+        if valid.any():
+            total_corr += float((numerator[valid] / denominator[valid]).sum())
+            valid_days += int(valid.sum())
+
+    return total_corr, valid_days
+
+
+def mean_rowwise_correlation(
+    left_values: np.ndarray,
+    right_values: np.ndarray,
+    block_elements: int = CORRELATION_BLOCK_ELEMENTS,
+) -> Optional[float]:
+    """
+    两个日期对齐的因子矩阵（行为交易日、列为股票）的平均截面相关性
+
+    Returns:
+        所有有效交易日相关系数的均值；没有有效交易日时返回 None
+    """
+    total_corr, valid_days = rowwise_correlation_sums(left_values, right_values, block_elements)
+    if valid_days == 0:
+        return None
+    return total_corr / valid_days
+
+
+def standardize_cross_sections(
+    values: np.ndarray,
+    block_elements: int = CORRELATION_BLOCK_ELEMENTS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按交易日把截面标准化为 z-score
+
+    Returns:
+        (standardized, valid)：float32 的 z-score（缺失位置为 0，常数截面整行为 0）和有效值掩码
+    """
+    row_count, column_count = values.shape
+    block_rows = max(1, block_elements // max(column_count, 1))
+    standardized = np.empty((row_count, column_count), dtype=np.float32)
+    valid = np.empty((row_count, column_count), dtype=bool)
+
+    for start in range(0, row_count, block_rows):
+        block = values[start:start + block_rows]
+        mask = np.isfinite(block, out=valid[start:start + block_rows])
+        counts = np.count_nonzero(mask, axis=1)
+        bits = mask.astype(np.uint32)
+        bits *= np.uint32(0xFFFFFFFF)
+        centered = _masked_float64(block, mask, bits)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            centered -= (centered.sum(axis=1) / counts)[:, None]
+            centered *= mask
+            std = np.sqrt(_row_dot(centered, centered) / counts)
+            scale = np.where(std > 0, 1.0 / std, 0.0)
+        np.multiply(centered, scale[:, None], out=standardized[start:start + block_rows], casting="same_kind")
+
+    return standardized, valid
+
+
+def _stack_dot(row_values: np.ndarray, stacked_values: np.ndarray) -> np.ndarray:
+    """(行, 股票) 与 (因子, 行, 股票) 逐行点积，结果为 (因子, 行) 的 float64"""
+    return np.einsum("ds,kds->kd", row_values, stacked_values).astype(np.float64)
+
+
+def batched_mean_correlations(
+    standardized: np.ndarray,
+    valid: np.ndarray,
+    prior_standardized: List[np.ndarray],
+    prior_valid: List[np.ndarray],
+    block_elements: int = BATCH_BLOCK_ELEMENTS,
+) -> np.ndarray:
+    """
+    一个因子与一组因子（日期索引相同）的平均截面相关性
+
+    输入均来自 standardize_cross_sections。结果与逐对调用 mean_rowwise_correlation 一致
+    （差异在 1e-7 量级），跳过规则相同；没有有效交易日的位置为 NaN
+    """
+    prior_count = len(prior_standardized)
+    totals = np.zeros(prior_count, dtype=np.float64)
+    valid_days = np.zeros(prior_count, dtype=np.int64)
+    if prior_count == 0:
+        return totals
+
+    row_count, column_count = standardized.shape
+    chunk_size = max(1, min(prior_count, block_elements // max(column_count, 1)))
+    block_rows = max(1, block_elements // (chunk_size * max(column_count, 1)))
+
+    for chunk_start in range(0, prior_count, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, prior_count)
+        chunk_count = chunk_stop - chunk_start
+        for start in range(0, row_count, block_rows):
+            stop = min(start + block_rows, row_count)
+            x = standardized[start:stop]
+            x_valid = valid[start:stop].astype(np.float32)
+            x_squared = x * x
+
+            y = np.empty((chunk_count, stop - start, column_count), dtype=np.float32)
+            y_valid = np.empty_like(y)
+            for offset in range(chunk_count):
+                y[offset] = prior_standardized[chunk_start + offset][start:stop]
+                y_valid[offset] = prior_valid[chunk_start + offset][start:stop]
+
+            n = _stack_dot(x_valid, y_valid)
+            sum_x = _stack_dot(x, y_valid)
+            sum_xx = _stack_dot(x_squared, y_valid)
+            sum_y = _stack_dot(x_valid, y)
+            sum_xy = _stack_dot(x, y)
+            y *= y
+            sum_yy = _stack_dot(x_valid, y)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                covariance = sum_xy - sum_x * sum_y / n
+                variance_x = sum_xx - sum_x * sum_x / n
+                variance_y = sum_yy - sum_y * sum_y / n
+                usable = (
+                    (n > 1)
+                    & (variance_x > ZERO_VARIANCE_RTOL * sum_xx)
+                    & (variance_y > ZERO_VARIANCE_RTOL * sum_yy)
+                )
+                corr = np.divide(
+                    covariance,
+                    np.sqrt(variance_x * variance_y),
+                    out=np.zeros_like(covariance),
+                    where=usable,
+                )
+            totals[chunk_start:chunk_stop] += corr.sum(axis=1)
+            valid_days[chunk_start:chunk_stop] += np.count_nonzero(usable, axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid_days > 0, totals / valid_days, np.nan)
+
+
+def prefix_mean_correlations(
+    standardized: np.ndarray,
+    valid: np.ndarray,
+    prior_standardized: List[np.ndarray],
+    prior_valid: List[np.ndarray],
+    block_elements: int = BATCH_BLOCK_ELEMENTS,
+) -> np.ndarray:
+    """
+    一个因子与一组因子的平均截面相关性，各矩阵的行、列是同一组坐标轴的前缀（形状可以不同）
+
+    超出较短一方的行、列在较短一方中全部缺失，不会进入共同有效股票，
+    因此每对因子截取到两者共同的前缀后计算，结果不变；共同前缀相同的因子合并为一批
+    """
+    results = np.full(len(prior_standardized), np.nan, dtype=np.float64)
+    groups = {}
+    for position, prior in enumerate(prior_standardized):
+        shape = (
+            min(standardized.shape[0], prior.shape[0]),
+            min(standardized.shape[1], prior.shape[1]),
+        )
+        groups.setdefault(shape, []).append(position)
+
+    for (rows, cols), positions in groups.items():
+        results[positions] = batched_mean_correlations(
+            standardized[:rows, :cols],
+            valid[:rows, :cols],
+            [prior_standardized[position][:rows, :cols] for position in positions],
+            [prior_valid[position][:rows, :cols] for position in positions],
+            block_elements,
+        )
+    return results
@@ -2,17 +2,167 @@
 文件处理工具
 """
 import os
+import stat as stat_module
 import mimetypes
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 from datetime import datetime
 import logging
 
+from backend.utils.image_probe import probe_raster_dimensions, probe_svg_dimensions
+
 logger = logging.getLogger(__name__)
 
 # 支持的图片格式
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.tiff', '.ico'}
 
+
+class ScannedFile(NamedTuple):
+    """os.scandir 遍历得到的文件记录，stat 为 DirEntry 取得的元数据"""
+    path: str
+    relative_path: str
+    folder: str
+    name: str
+    extension: str
+    stat: os.stat_result
+
+    @property
+    def is_image(self) -> bool:
+        return self.extension in IMAGE_EXTENSIONS
+
+
+def get_extension(name: str) -> str:
+    """按文件名取小写扩展名，规则与 Path.suffix 一致（'.bashrc' 没有扩展名）"""
+    index = name.rfind('.')
+    return name[index:].lower() if 0 < index < len(name) - 1 else ''
+
+
+@lru_cache(maxsize=256)
+def guess_mime_type(extension: str) -> Optional[str]:
+    """按扩展名推断 MIME 类型，同一扩展名只查一次表"""
+    mime_type, _ = mimetypes.guess_type(f"file{extension}")
+    return mime_type
+
+
+def scan_directory(
+    abs_dir: Union[str, Path],
+    rel_dir: str = '',
+    images_only: bool = True,
+) -> Tuple[List[ScannedFile], List[str]]:
+    """
+    列出单个目录的文件和直接子目录
+
+    先按文件名过滤扩展名，再对保留下来的条目取 stat；文件类型优先使用 readdir 返回的 d_type，
+    不额外调用 exists()/is_file()
+
+    Args:
+        abs_dir: 目录绝对路径
+        rel_dir: 目录相对根目录的路径（POSIX 风格，根目录为空字符串）
+        images_only: 是否只返回图片文件
+
+    Returns:
+        (文件记录列表, 子目录名列表)
+    """
+    files: List[ScannedFile] = []
+    subdirs: List[str] = []
+    with os.scandir(abs_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            try:
+                if entry.is_dir():
+                    subdirs.append(name)
+                    continue
+
+                extension = get_extension(name)
+                if images_only and extension not in IMAGE_EXTENSIONS:
+                    continue
+
+                entry_stat = entry.stat()
+                if not stat_module.S_ISREG(entry_stat.st_mode):
+                    continue
+            except OSError as e:
+                logger.debug(f"读取文件元数据失败 {entry.path}: {e}")
+                continue
+
+            files.append(
+                ScannedFile(
+                    entry.path,
+                    f"{rel_dir}/{name}" if rel_dir else name,
+                    rel_dir,
+                    name,
+                    extension,
+                    entry_stat,
+                )
+            )
+    return files, subdirs
+
+
+def walk_files(
+    root: Union[str, Path],
+    base: Optional[Union[str, Path]] = None,
+    images_only: bool = True,
+) -> Iterator[ScannedFile]:
+    """
+    基于 os.scandir 单次遍历目录树，替代 rglob('*') + exists()/is_file()/stat()
+
+    Args:
+        root: 遍历起点
+        base: relative_path 的参照目录，默认为 root
+        images_only: 是否只返回图片文件
+
+    Yields:
+        ScannedFile 记录，relative_path 相对 base
+    """
+    root = Path(root)
+    base_path = Path(base) if base is not None else root
+    try:
+        rel_root = root.relative_to(base_path).as_posix()
+    except ValueError:
+        rel_root = root.as_posix()
+    if rel_root == '.':
+        rel_root = ''
+
+    stack = [(str(root), rel_root)]
+    while stack:
+        abs_dir, rel_dir = stack.pop()
+        try:
+            files, subdirs = scan_directory(abs_dir, rel_dir, images_only=images_only)
+        except OSError as e:
+            logger.debug(f"列举目录失败 {abs_dir}: {e}")
+            continue
+
+        yield from files
+        # 子目录按名称顺序遍历，结果顺序与目录索引一致
+        for name in sorted(subdirs, reverse=True):
+            stack.append(
+                (
+                    os.path.join(abs_dir, name),
+                    f"{rel_dir}/{name}" if rel_dir else name,
+                )
+            )
+
+
+def list_subdirectories(
+    folder_path: Union[str, Path], include_hidden: bool = False
+) -> List[os.DirEntry]:
+    """列出直接子目录，替代 iterdir() + is_dir()"""
+    subdirs = []
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if not include_hidden and entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry)
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.debug(f"列举子目录失败 {folder_path}: {e}")
+    return subdirs
+
+
 def get_file_info(file_path: Path) -> Optional[Dict]:
     """获取文件信息"""
     try:
@@ -49,16 +199,24 @@ def is_svg_file(file_path: Path) -> bool:
     return file_path.suffix.lower() == '.svg'
 
 def get_image_dimensions(image_path: Path) -> Optional[Tuple[int, int]]:
-    """获取图片尺寸"""
+    """获取图片尺寸（优先只读文件头，无法识别的格式再用 PIL 打开）"""
     try:
         if not is_image_file(image_path):
             return None
         
-        # 对于SVG文件，需要特殊处理
+        # 对于SVG文件，读到根元素即停止
         if is_svg_file(image_path):
-            return _get_svg_dimensions(image_path)
+            return probe_svg_dimensions(image_path)
         
-        # 对于其他图片格式，使用PIL
+        try:
+            dimensions = probe_raster_dimensions(image_path)
+            if dimensions:
+                return dimensions
+        except OSError as e:
+            logger.debug(f"读取图片文件头失败 {image_path}: {e}")
+            return None
+        
+        # 对于其他图片格式（TIFF、ICO 等），使用PIL
         try:
             from PIL import Image
             with Image.open(image_path) as img:
@@ -74,55 +232,6 @@ def get_image_dimensions(image_path: Path) -> Optional[Tuple[int, int]]:
         logger.error(f"获取图片尺寸失败 {image_path}: {e}")
         return None
 
-def _get_svg_dimensions(svg_path: Path) -> Optional[Tuple[int, int]]:
-    """获取SVG文件尺寸"""
-    try:
-        import xml.etree.ElementTree as ET
-        
-        tree = ET.parse(svg_path)
-        root = tree.getroot()
-        
-        # 尝试从width和height属性获取
-        width = root.get('width')
-        height = root.get('height')
-        
-        if width and height:
-            # 移除单位（如px, em等）
-            width = _parse_dimension(width)
-            height = _parse_dimension(height)
-            if width and height:
-                return (int(width), int(height))
-        
-        # 尝试从viewBox获取
-        viewbox = root.get('viewBox')
-        if viewbox:
-            parts = viewbox.split()
-            if len(parts) >= 4:
-                try:
-                    return (int(float(parts[2])), int(float(parts[3])))
-                except ValueError:
-                    pass
-        
-        return None
-        
-    except Exception as e:
-        logger.debug(f"解析SVG尺寸失败 {svg_path}: {e}")
-        return None
-
-def _parse_dimension(dim_str: str) -> Optional[float]:
-    """解析尺寸字符串，移除单位"""
-    try:
-        # 移除常见单位
-        dim_str = dim_str.lower()
-        for unit in ['px', 'pt', 'em', 'rem', '%', 'cm', 'mm', 'in']:
-            if dim_str.endswith(unit):
-                dim_str = dim_str[:-len(unit)]
-                break
-        
-        return float(dim_str)
-    except ValueError:
-        return None
-
 def format_file_size(size_bytes: int) -> str:
     """格式化文件大小"""
     if size_bytes == 0:
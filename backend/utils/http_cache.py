@@ -0,0 +1,115 @@
+"""
+HTTP 缓存工具
+图片与静态资源的 URL 带上文件版本（?v=<mtime>），版本与当前文件一致时按不可变资源长期缓存；
+不带版本或版本已过期时要求浏览器每次用 ETag / Last-Modified 重新验证，命中时只返回 304；
+开启文件发送卸载（config/settings.py 中的 FILE_OFFLOAD_MODE）时只返回 X-Accel-Redirect / X-Sendfile 响应头
+"""
+import mimetypes
+import os
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from flask import current_app, request, send_file
+
+from config.settings import (
+    CACHE_DIR,
+    FILE_OFFLOAD_CACHE_LOCATION,
+    FILE_OFFLOAD_IMAGES_LOCATION,
+    FILE_OFFLOAD_MODE,
+    IMAGES_ROOT,
+)
+
+# 带版本 URL 的缓存时间：一年
+IMMUTABLE_MAX_AGE = 31536000
+# x-accel-redirect 模式下磁盘目录 -> nginx internal location
+FILE_OFFLOAD_LOCATIONS: List[Tuple[str, str]] = [
+    (os.path.realpath(IMAGES_ROOT), FILE_OFFLOAD_IMAGES_LOCATION),
+    (os.path.realpath(CACHE_DIR), FILE_OFFLOAD_CACHE_LOCATION),
+]
+
+
+def file_version(mtime: float) -> str:
+    """文件版本号：修改时间的微秒数，与列表接口中的 mtime 取值一致"""
+    return str(int(round(mtime * 1e6)))
+
+
+def versioned_url(prefix: str, relative_path: str, mtime: float) -> str:
+    """生成带文件版本的 URL，如 /gallery/serve/a/%E5%9B%BE.png?v=1712000000000000"""
+    return f"{prefix}/{quote(relative_path)}?v={file_version(mtime)}"
+
+
+def is_current_version(path: str, version: Optional[str]) -> bool:
+    """请求中的版本号是否与文件当前的修改时间一致"""
+    if not version:
+        return False
+    try:
+        return version == file_version(os.stat(path).st_mtime)
+    except OSError:
+        return False
+
+
+def send_cached_file(path: str, immutable: bool = False):
+    """
+    发送文件并附带强校验器
+
+    ETag 由文件大小和 mtime_ns 组成，If-None-Match / If-Modified-Since 命中时返回 304，
+    Range 请求返回 206；immutable 为 True 时允许浏览器在一年内直接使用本地缓存
+
+    Args:
+        path: 已经过路径校验的文件完整路径
+        immutable: 请求 URL 中的版本号是否与文件当前版本一致
+    """
+    stat_result = os.stat(path)
+    etag = f"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"
+    offload_header = _get_offload_header(path)
+    if offload_header is not None:
+        response = _offload_file(path, stat_result, etag, offload_header)
+    else:
+        response = send_file(
+            path,
+            conditional=True,
+            etag=etag,
+            last_modified=stat_result.st_mtime,
+        )
+    apply_cache_policy(response, immutable)
+    return response
+
+
+def _get_offload_header(path: str) -> Optional[Tuple[str, str]]:
+    """卸载模式下返回交给前置服务器的 (响应头, 值)；未开启或文件不在映射目录内时返回 None"""
+    if FILE_OFFLOAD_MODE == "x-sendfile":
+        return "X-Sendfile", os.path.realpath(path)
+    if FILE_OFFLOAD_MODE == "x-accel-redirect":
+        real_path = os.path.realpath(path)
+        for root, location in FILE_OFFLOAD_LOCATIONS:
+            if real_path.startswith(root + os.sep):
+                relative_path = real_path[len(root) + 1:].replace(os.sep, "/")
+                return "X-Accel-Redirect", location.rstrip("/") + "/" + quote(relative_path)
+    return None
+
+
+def _offload_file(
+    path: str, stat_result: os.stat_result, etag: str, offload_header: Tuple[str, str]
+):
+    """只返回响应头，不在进程内读取文件；304 仍在这里判断，Range 由前置服务器处理"""
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    response = current_app.response_class(mimetype=mimetype)
+    response.headers[offload_header[0]] = offload_header[1]
+    response.content_length = stat_result.st_size
+    response.set_etag(etag)
+    response.last_modified = int(stat_result.st_mtime)
+    return response.make_conditional(request.environ)
+
+
+def apply_cache_policy(response, immutable: bool) -> None:
+    """按版本是否匹配设置 Cache-Control"""
+    cache_control = response.cache_control
+    if immutable:
+        cache_control.no_cache = None
+        cache_control.public = True
+        cache_control.max_age = IMMUTABLE_MAX_AGE
+        cache_control.immutable = True
+    else:
+        cache_control.public = None
+        cache_control.max_age = None
+        cache_control.no_cache = True
@@ -0,0 +1,163 @@
+"""
+图片尺寸探测
+只读取文件头获取尺寸：PNG（IHDR）、GIF（逻辑屏幕描述符）、WebP（VP8/VP8L/VP8X）、BMP（信息头）、
+JPEG（逐段跳过直到 SOF 段）；SVG 用 iterparse 增量解析，读到根元素即停止，不解析整份文档
+"""
+import struct
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# PNG/GIF/WebP/BMP 的尺寸都在前 32 字节内
+HEADER_BYTES = 32
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 带尺寸信息的 JPEG 帧起始段（SOF0-SOF15，除去 DHT/JPG/DAC）
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# 没有长度字段的 JPEG 段（TEM、RST0-RST7、SOI、EOI）
+JPEG_STANDALONE_MARKERS = frozenset([0x01, *range(0xD0, 0xDA)])
+SVG_LENGTH_UNITS = ("px", "pt", "em", "rem", "%", "cm", "mm", "in")
+
+
+def _probe_png(header: bytes) -> Optional[Tuple[int, int]]:
+    if len(header) >= 24 and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    return None
+
+
+def _probe_gif(header: bytes) -> Optional[Tuple[int, int]]:
+    if len(header) >= 10:
+        return struct.unpack("<HH", header[6:10])
+    return None
+
+
+def _probe_webp(header: bytes) -> Optional[Tuple[int, int]]:
+    chunk = header[12:16]
+    if chunk == b"VP8 " and len(header) >= 30:
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25:
+        b0, b1, b2, b3 = header[21:25]
+        width = 1 + (((b1 & 0x3F) << 8) | b0)
+        height = 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        return width, height
+    if chunk == b"VP8X" and len(header) >= 30:
+        width = 1 + int.from_bytes(header[24:27], "little")
+        height = 1 + int.from_bytes(header[27:30], "little")
+        return width, height
+    return None
+
+
+def _probe_bmp(header: bytes) -> Optional[Tuple[int, int]]:
+    if len(header) < 26:
+        return None
+    header_size = struct.unpack("<I", header[14:18])[0]
+    if header_size == 12:
+        # OS/2 BITMAPCOREHEADER：16 位宽高
+        return struct.unpack("<HH", header[18:22])
+    width, height = struct.unpack("<ii", header[18:26])
+    return width, abs(height)
+
+
+def _probe_jpeg(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    """从 SOI 之后逐段读取段头，遇到 SOF 段返回尺寸，其余段直接跳过"""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        # 段之间允许填充多个 0xFF
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code == 0x00 or code in JPEG_STANDALONE_MARKERS:
+            continue
+        if code == 0xD9 or code == 0xDA:
+            # 到达 EOI 或扫描数据仍未见 SOF
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if code in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        f.seek(length - 2, 1)
+
+
+def parse_svg_length(value: str) -> Optional[float]:
+    """解析 SVG 长度属性，去掉常见单位"""
+    try:
+        value = value.strip().lower()
+        for unit in SVG_LENGTH_UNITS:
+            if value.endswith(unit):
+                value = value[: -len(unit)]
+                break
+        return float(value)
+    except ValueError:
+        return None
+
+
+def probe_svg_dimensions(svg_path: Path) -> Optional[Tuple[int, int]]:
+    """读取 SVG 根元素的 width/height（其次 viewBox），解析到根元素的开始标签即停止"""
+    try:
+        with open(svg_path, "rb") as f:
+            root = None
+            for _, element in ET.iterparse(f, events=("start",)):
+                root = element
+                break
+        if root is None:
+            return None
+
+        width = root.get("width")
+        height = root.get("height")
+        if width and height:
+            width = parse_svg_length(width)
+            height = parse_svg_length(height)
+            if width and height:
+                return int(width), int(height)
+
+        viewbox = root.get("viewBox")
+        if viewbox:
+            parts = viewbox.replace(",", " ").split()
+            if len(parts) >= 4:
+                try:
+                    return int(float(parts[2])), int(float(parts[3]))
+                except ValueError:
+                    pass
+        return None
+    except Exception as e:
+        logger.debug(f"解析SVG尺寸失败 {svg_path}: {e}")
+        return None
+
+
+def probe_raster_dimensions(image_path: Path) -> Optional[Tuple[int, int]]:
+    """
+    按文件头识别格式并读取尺寸
+
+    Returns:
+        (宽, 高)；格式不在支持范围内或文件头损坏时返回 None，由调用方决定是否回退到 PIL
+    """
+    with open(image_path, "rb") as f:
+        header = f.read(HEADER_BYTES)
+        if header.startswith(PNG_SIGNATURE):
+            return _probe_png(header)
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return _probe_gif(header)
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return _probe_webp(header)
+        if header[:2] == b"BM":
+            return _probe_bmp(header)
+        if header[:2] == b"\xff\xd8":
+            return _probe_jpeg(f)
+    return None
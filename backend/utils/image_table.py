@@ -0,0 +1,244 @@
+"""
+列式图片表
+用 NumPy 数组保存排序需要的数值列，字符串列共享目录索引中的对象并对扩展名、因子版本做驻留，
+排序时向量化 argsort，只为返回的那一页构造字典
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (relative_path, name, extension, size, mtime, ctime)
+ImageRow = Tuple[str, str, str, int, float, float]
+
+SORT_MODES = ('neu_ret', 'date', 'size', 'name')
+
+
+def _string_order(values: Sequence[str]) -> np.ndarray:
+    """字符串按 Python 比较规则的稳定排序下标（对象数组上的 np.unique/argsort 比内置排序慢）"""
+    return np.fromiter(
+        sorted(range(len(values)), key=values.__getitem__),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def _factor_name(name: str) -> str:
+    """与 GalleryService._get_factor_name_from_image 相同的因子名规则"""
+    return name.rsplit('.', 1)[0] if '.' in name else name
+
+
+class ImageTableBuilder:
+    """按分组（因子版本）追加图片行，最后一次性转换成列式表"""
+
+    def __init__(self, with_neu_ret: bool = False):
+        self.with_neu_ret = with_neu_ret
+        self._rows: List[ImageRow] = []
+        self._group_codes: List[int] = []
+        self._groups: List[str] = []
+        self._neu_ret_values: List[object] = []
+
+    def add_group(
+        self,
+        rows: Iterable[ImageRow],
+        group: str = '',
+        neu_ret_data: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        追加一组图片
+
+        Args:
+            rows: 图片行
+            group: 分组名，收益率排序时作为 factor_version
+            neu_ret_data: 因子名 -> 收益率，缺失的因子记为 0
+        """
+        code = len(self._groups)
+        self._groups.append(group)
+        rows = list(rows)
+        self._rows.extend(rows)
+        self._group_codes.extend([code] * len(rows))
+        if self.with_neu_ret:
+            neu_ret_data = neu_ret_data or {}
+            self._neu_ret_values.extend(
+                neu_ret_data.get(_factor_name(row[1]), 0) for row in rows
+            )
+
+    def build(self) -> 'ImageTable':
+        return ImageTable(
+            self._rows,
+            np.array(self._group_codes, dtype=np.int32),
+            self._groups,
+            self._neu_ret_values if self.with_neu_ret else None,
+        )
+
+
+class ImageTable:
+    """列式图片表"""
+
+    def __init__(
+        self,
+        rows: List[ImageRow],
+        group_codes: np.ndarray,
+        groups: List[str],
+        neu_ret_values: Optional[List[object]] = None,
+    ):
+        count = len(rows)
+        self.groups = groups
+        self.group_codes = group_codes
+
+        self.relative_paths = np.empty(count, dtype=object)
+        self.names = np.empty(count, dtype=object)
+        for index, row in enumerate(rows):
+            self.relative_paths[index] = row[0]
+            self.names[index] = row[1]
+
+        # 扩展名种类很少，驻留成小整数编码
+        self.extensions: List[str] = []
+        extension_codes: Dict[str, int] = {}
+        codes = np.empty(count, dtype=np.int16)
+        for index, row in enumerate(rows):
+            code = extension_codes.get(row[2])
+            if code is None:
+                code = len(self.extensions)
+                extension_codes[row[2]] = code
+                self.extensions.append(row[2])
+            codes[index] = code
+        self.extension_codes = codes
+
+        self.sizes = np.fromiter((row[3] for row in rows), dtype=np.int64, count=count)
+        self.mtimes = np.fromiter((row[4] for row in rows), dtype=np.float64, count=count)
+        self.ctimes = np.fromiter((row[5] for row in rows), dtype=np.float64, count=count)
+
+        self.neu_ret_values: Optional[np.ndarray] = None
+        self.neu_ret_keys: Optional[np.ndarray] = None
+        if neu_ret_values is not None:
+            self.neu_ret_values = np.empty(count, dtype=object)
+            keys = np.empty(count, dtype=np.float64)
+            for index, value in enumerate(neu_ret_values):
+                self.neu_ret_values[index] = value
+                # 与 _get_neu_ret_sort_key 相同的数值化规则
+                try:
+                    keys[index] = float(value or 0)
+                except (TypeError, ValueError):
+                    keys[index] = 0.0
+            self.neu_ret_keys = keys
+
+        self._orders: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def has_neu_ret(self) -> bool:
+        return self.neu_ret_values is not None
+
+    def factor_name(self, index: int) -> str:
+        return _factor_name(self.names[index])
+
+    def group(self, index: int) -> str:
+        return self.groups[self.group_codes[index]]
+
+    def extension(self, index: int) -> str:
+        return self.extensions[self.extension_codes[index]]
+
+    def nbytes(self) -> int:
+        """数组本身占用的字节数（不含共享的字符串对象）"""
+        arrays = [
+            self.relative_paths,
+            self.names,
+            self.extension_codes,
+            self.sizes,
+            self.mtimes,
+            self.ctimes,
+            self.group_codes,
+        ]
+        if self.neu_ret_values is not None:
+            arrays.extend([self.neu_ret_values, self.neu_ret_keys])
+        return sum(array.nbytes for array in arrays)
+
+    def _primary_key(self, sort_by: str) -> np.ndarray:
+        """升序主键，降序字段取负"""
+        if sort_by == 'neu_ret':
+            return -self.neu_ret_keys
+        if sort_by == 'date':
+            # 列表中 date 是精确到微秒的 isoformat 字符串，按微秒取整后比较
+            return -np.round(self.mtimes * 1e6)
+        if sort_by == 'size':
+            return -self.sizes
+        raise ValueError(f"不支持的排序方式: {sort_by}")
+
+    def _group_ranks(self) -> np.ndarray:
+        # 分组名可能仅大小写不同，忽略大小写后相等的分组必须取相同排名
+        lowered = [group.lower() for group in self.groups]
+        distinct = sorted(set(lowered))
+        rank_by_name = {name: rank for rank, name in enumerate(distinct)}
+        group_ranks = np.array([rank_by_name[name] for name in lowered], dtype=np.int64)
+        return group_ranks[self.group_codes] if len(group_ranks) else group_ranks
+
+    def _sort_subset(self, sort_by: str, indices: np.ndarray) -> np.ndarray:
+        """对给定下标（升序）稳定排序，返回排好序的下标"""
+        if sort_by == 'name':
+            return indices[_string_order([name.lower() for name in self.names[indices]])]
+
+        primary = self._primary_key(sort_by)[indices]
+        if sort_by == 'neu_ret':
+            # 收益率降序，因子版本、因子名（忽略大小写）、相对路径升序打破并列；
+            # 因子名只在收益率和版本都相同的行之间比较，先按前两个键排序，再只对并列段排序
+            version_ranks = self._group_ranks()[indices]
+            positions = np.lexsort((version_ranks, primary))
+            ordered = indices[positions]
+            primary = primary[positions]
+            version_ranks = version_ranks[positions]
+            same = (primary[1:] == primary[:-1]) & (version_ranks[1:] == version_ranks[:-1])
+            if not same.any():
+                return ordered
+            tied = np.zeros(len(ordered), dtype=bool)
+            tied[1:] |= same
+            tied[:-1] |= same
+            run_ids = np.concatenate(([0], np.cumsum(~same))).tolist()
+            tied_positions = np.flatnonzero(tied).tolist()
+            names = self.names
+            relative_paths = self.relative_paths
+            resorted = sorted(
+                tied_positions,
+                key=lambda pos: (
+                    run_ids[pos],
+                    _factor_name(names[ordered[pos]]).lower(),
+                    relative_paths[ordered[pos]],
+                ),
+            )
+            ordered[tied_positions] = ordered[resorted]
+            return ordered
+        return indices[np.argsort(primary, kind='stable')]
+
+    def order(self, sort_by: str) -> np.ndarray:
+        """完整排序后的行下标，结果与对字典列表做稳定排序一致"""
+        if sort_by not in SORT_MODES:
+            sort_by = 'name'
+        cached = self._orders.get(sort_by)
+        if cached is None:
+            cached = self._sort_subset(sort_by, np.arange(len(self), dtype=np.int64))
+            self._orders[sort_by] = cached
+        return cached
+
+    def head_order(self, sort_by: str, count: int, max_ratio: float = 0.25) -> np.ndarray:
+        """
+        排序后前 count 行的下标
+
+        数值主键用 argpartition 找出第 count 名的主键值，把所有不大于它的行（包含边界上的全部并列行）
+        作为候选，只对候选做完整排序，因此并列顺序与完整排序一致
+        """
+        if sort_by not in SORT_MODES:
+            sort_by = 'name'
+        total = len(self)
+        if (
+            sort_by in self._orders
+            or sort_by == 'name'
+            or count <= 0
+            or count > total * max_ratio
+        ):
+            return self.order(sort_by)[:max(count, 0)]
+
+        primary = self._primary_key(sort_by)
+        kth_value = primary[np.argpartition(primary, count - 1)[count - 1]]
+        candidates = np.flatnonzero(primary <= kth_value)
+        return self._sort_subset(sort_by, candidates)[:count]
@@ -0,0 +1,104 @@
+"""
+JSON 序列化
+Flask 的 JSON provider 按 orjson > ujson > 标准库 json 的顺序选择可用实现；
+NumPy 数组和标量可以直接放进响应，不需要先 tolist()；
+快速实现无法处理的对象（超出 64 位的整数等）自动回退到标准库
+"""
+import json
+import logging
+import os
+from typing import Any, Callable, Optional
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# auto / orjson / ujson / json
+JSON_BACKEND = os.environ.get("GALLERY_JSON_BACKEND", "auto").lower()
+
+
+def _default(obj: Any) -> Any:
+    """NumPy 类型转换为内置类型，其余交给 Flask 默认规则（日期、UUID、dataclass 等）"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return DefaultJSONProvider.default(obj)
+
+
+def _resolve_backend(name: str) -> str:
+    if name in ("orjson", "auto") and orjson is not None:
+        return "orjson"
+    if name in ("ujson", "auto", "orjson") and ujson is not None:
+        return "ujson"
+    if name not in ("auto", "json"):
+        logger.warning(f"JSON 实现 {name} 不可用，使用标准库 json")
+    return "json"
+
+
+def _stdlib_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    separators = None if indent else (",", ":")
+    return json.dumps(obj, default=_default, ensure_ascii=False, indent=indent, separators=separators)
+
+
+def _orjson_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    option = (
+        orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS
+        # 日期仍按 Flask 的 HTTP 日期格式输出，与标准库实现一致
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=_default, option=option).decode("utf-8")
+
+
+def _ujson_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    return ujson.dumps(
+        obj, default=_default, ensure_ascii=False, escape_forward_slashes=False, indent=indent or 0
+    )
+
+
+_DUMPS: dict = {"orjson": _orjson_dumps, "ujson": _ujson_dumps, "json": _stdlib_dumps}
+
+
+def get_json_dumps(backend: str = JSON_BACKEND) -> Callable[..., str]:
+    """按名称取得序列化函数（auto 表示选择可用的最快实现）"""
+    return _DUMPS[_resolve_backend(backend)]
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify / request.get_json 使用的快速 JSON provider"""
+
+    # 不对键排序、直接输出 UTF-8，减少序列化耗时和响应体积
+    sort_keys = False
+    ensure_ascii = False
+
+    def __init__(self, app, backend: str = JSON_BACKEND):
+        super().__init__(app)
+        self.backend = _resolve_backend(backend)
+        self._dumps = _DUMPS[self.backend]
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        indent = kwargs.get("indent")
+        try:
+            return self._dumps(obj, indent=indent)
+        except (TypeError, ValueError, OverflowError):
+            # orjson 不支持超过 64 位的整数，ujson 对部分自定义对象的处理与标准库不同
+            return _stdlib_dumps(obj, indent=indent)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if self.backend == "orjson" and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
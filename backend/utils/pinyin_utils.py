@@ -0,0 +1,71 @@
+"""
+拼音检索工具
+为含汉字的文件名和描述生成全拼、首字母检索键，在建立索引时计算一次，查询时只做子串匹配
+"""
+import logging
+import re
+from functools import lru_cache
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypinyin import lazy_pinyin
+
+    PINYIN_AVAILABLE = True
+except ImportError:
+    logger.warning("pypinyin 未安装，搜索不支持拼音匹配")
+    PINYIN_AVAILABLE = False
+
+_HAN_PATTERN = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]+")
+# 检索文本各部分之间的分隔符：查询关键词按空白拆分，不会包含换行，因此不会跨部分匹配
+SEARCH_TEXT_SEPARATOR = "\n"
+
+
+@lru_cache(maxsize=65536)
+def _han_run_pinyin(run: str) -> Tuple[str, str]:
+    """连续汉字片段的 (全拼, 首字母)；因子名由少量词语反复组合而成，按片段缓存"""
+    syllables = lazy_pinyin(run)
+    return "".join(syllables).lower(), "".join(s[:1] for s in syllables).lower()
+
+
+def pinyin_keys(text: str) -> Tuple[str, str]:
+    """
+    生成文本的拼音检索键
+
+    Args:
+        text: 原文（文件名或描述）
+
+    Returns:
+        (全拼, 首字母)，均为小写，非汉字部分原样保留；不含汉字或未安装 pypinyin 时返回两个空字符串
+    """
+    if not PINYIN_AVAILABLE or not _HAN_PATTERN.search(text):
+        return "", ""
+
+    full_parts = []
+    initial_parts = []
+    position = 0
+    for match in _HAN_PATTERN.finditer(text):
+        other = text[position:match.start()].lower()
+        full, initials = _han_run_pinyin(match.group())
+        full_parts.extend((other, full))
+        initial_parts.extend((other, initials))
+        position = match.end()
+    other = text[position:].lower()
+    full_parts.append(other)
+    initial_parts.append(other)
+    return "".join(full_parts), "".join(initial_parts)
+
+
+@lru_cache(maxsize=65536)
+def build_search_text(text: str) -> str:
+    """
+    构建用于子串匹配的检索文本：小写原文，含汉字时再追加全拼和首字母（同名文件在各子文件夹中反复出现，结果按原文缓存）
+
+    例如 "动量因子_v2.svg" -> "动量因子_v2.svg\\ndongliangyinzi_v2.svg\\ndlyz_v2.svg"
+    """
+    text_lower = text.lower()
+    full, initials = pinyin_keys(text)
+    if not full:
+        return text_lower
+    return SEARCH_TEXT_SEPARATOR.join((text_lower, full, initials))
@@ -0,0 +1,202 @@
+"""
+文件名三元组倒排索引
+每个文件名的检索文本（默认为小写文件名，可附加拼音等别名）拆成长度为 3 的子串，倒排表保存包含该子串的文件编号；
+包含关键词通过倒排表求交集得到候选，排除关键词通过求差集去掉，最后逐个确认子串匹配
+"""
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TRIGRAM_SIZE = 3
+# 失效编号超过该数量且多于有效编号时整体重建倒排表
+COMPACT_MIN_DEAD = 10000
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """
+    文件名三元组倒排索引（非线程安全，由调用方加锁）
+
+    文件编号单调递增，倒排表按编号有序追加，可以直接用 np.intersect1d/np.setdiff1d；
+    删除只做标记，失效编号过多时再压缩
+    """
+
+    def __init__(self, text_func: Callable[[str], str] = str.lower):
+        """
+        Args:
+            text_func: 由文件名生成检索文本的函数，关键词在检索文本中做子串匹配
+        """
+        self._text_func = text_func
+        self._records: List[Optional[Dict]] = []
+        self._names: List[str] = []
+        self._postings: Dict[str, array] = {}
+        self._folder_ids: Dict[str, List[int]] = {}
+        self._folder_keys: Dict[str, Tuple[str, ...]] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._records) - self._dead
+
+    def _add(self, record: Dict) -> int:
+        file_id = len(self._records)
+        search_text = self._text_func(record["name"])
+        self._records.append(record)
+        self._names.append(search_text)
+        postings = self._postings
+        for trigram in _trigrams(search_text):
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array("i")
+            posting.append(file_id)
+        return file_id
+
+    def replace_folder(self, folder: str, records: Iterable[Dict]) -> None:
+        """用目录（不含子目录）的最新文件记录替换旧记录，记录顺序即结果中的顺序"""
+        self.remove_folder(folder)
+        ids = [self._add(record) for record in records]
+        if ids:
+            self._folder_ids[folder] = ids
+            self._folder_keys[folder] = tuple(folder.split("/")) if folder else ()
+        self._maybe_compact()
+
+    def remove_folder(self, folder: str) -> None:
+        ids = self._folder_ids.pop(folder, None)
+        self._folder_keys.pop(folder, None)
+        if not ids:
+            return
+        for file_id in ids:
+            self._records[file_id] = None
+        self._dead += len(ids)
+
+    def remove_subtree(self, folder: str) -> None:
+        """删除目录及其全部后代目录的记录"""
+        prefix = f"{folder}/"
+        for candidate in [
+            key for key in self._folder_ids if key == folder or not folder or key.startswith(prefix)
+        ]:
+            self.remove_folder(candidate)
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if self._dead < COMPACT_MIN_DEAD or self._dead <= len(self):
+            return
+        folders = [(folder, [self._records[i] for i in ids]) for folder, ids in self._folder_ids.items()]
+        self._records = []
+        self._names = []
+        self._postings = {}
+        self._folder_ids = {}
+        self._folder_keys = {}
+        self._dead = 0
+        for folder, records in folders:
+            self.replace_folder(folder, records)
+
+    def _posting(self, trigram: str) -> np.ndarray:
+        posting = self._postings.get(trigram)
+        if posting is None:
+            return np.empty(0, dtype=np.int32)
+        return np.frombuffer(posting, dtype=np.int32)
+
+    def _keyword_candidates(self, keyword: str) -> np.ndarray:
+        """包含关键词全部三元组的编号（超集，仍需确认子串）"""
+        postings = sorted((self._posting(t) for t in _trigrams(keyword)), key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+    def _scope_ids(self, scope: str) -> np.ndarray:
+        prefix = f"{scope}/"
+        ids: List[int] = []
+        for folder, folder_ids in self._folder_ids.items():
+            if not scope or folder == scope or folder.startswith(prefix):
+                ids.extend(folder_ids)
+        ids.sort()
+        return np.array(ids, dtype=np.int32)
+
+    def search(
+        self,
+        include: List[str],
+        exclude: List[str],
+        scope: str = "",
+        predicate: Optional[Callable[[Dict], bool]] = None,
+    ) -> List[Dict]:
+        """
+        查找检索文本包含全部 include 且小写文件名不包含任何 exclude 的记录
+
+        Args:
+            include: 小写包含关键词，在检索文本（含别名）中匹配
+            exclude: 小写排除关键词，只在小写文件名中匹配，不按别名扩大排除范围
+            scope: 只返回该目录（含子目录）下的记录，空字符串表示全部
+            predicate: 额外的记录过滤条件
+
+        Returns:
+            记录列表，按目录深度优先（子目录按名称排序）、目录内记录原顺序排列
+        """
+        long_keywords = [kw for kw in include if len(kw) >= TRIGRAM_SIZE]
+        if long_keywords:
+            candidates = None
+            for keyword in sorted(long_keywords, key=len, reverse=True):
+                matched = self._keyword_candidates(keyword)
+                candidates = (
+                    matched
+                    if candidates is None
+                    else np.intersect1d(candidates, matched, assume_unique=True)
+                )
+                if not len(candidates):
+                    return []
+        else:
+            candidates = self._scope_ids(scope)
+
+        names = self._names
+        records = self._records
+        for keyword in exclude:
+            if not len(candidates):
+                return []
+            if len(keyword) >= TRIGRAM_SIZE:
+                suspects = np.intersect1d(
+                    candidates, self._keyword_candidates(keyword), assume_unique=True
+                )
+            else:
+                suspects = candidates
+            excluded = [
+                i
+                for i in suspects.tolist()
+                if records[i] is not None and keyword in records[i]["name"].lower()
+            ]
+            if excluded:
+                candidates = np.setdiff1d(
+                    candidates, np.array(excluded, dtype=np.int32), assume_unique=True
+                )
+
+        prefix = f"{scope}/"
+        by_folder: Dict[str, List[Dict]] = {}
+        for file_id in candidates.tolist():
+            record = records[file_id]
+            if record is None:
+                continue
+            if include:
+                search_text = names[file_id]
+                if not all(keyword in search_text for keyword in include):
+                    continue
+            folder = record["folder"]
+            if scope and folder != scope and not folder.startswith(prefix):
+                continue
+            if predicate is not None and not predicate(record):
+                continue
+            folder_records = by_folder.get(folder)
+            if folder_records is None:
+                folder_records = by_folder[folder] = []
+            folder_records.append(record)
+
+        # 候选编号升序，目录内即原顺序；目录之间按路径分段比较，与深度优先遍历一致
+        return [
+            record
+            for folder in sorted(by_folder, key=self._folder_keys.__getitem__)
+            for record in by_folder[folder]
+        ]
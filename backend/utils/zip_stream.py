@@ -0,0 +1,87 @@
+"""
+流式 ZIP 打包
+用 zipfile 向一个只追加、不可 seek 的缓冲区写入（本地文件头之后以数据描述符补写 CRC 和大小），
+每写完一块就把缓冲区内容交给调用方，内存占用只与块大小有关，与压缩包总大小无关；
+图片本身已经压缩，条目一律以 STORED 方式存储，不做二次压缩
+"""
+import os
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# 每次从源文件读取并向外输出的块大小
+ZIP_STREAM_CHUNK_SIZE = 1024 * 1024
+
+# (压缩包内路径, 源文件路径或内存中的内容)
+ZipEntry = Tuple[str, Union[str, bytes]]
+
+
+class _StreamBuffer:
+    """只追加的输出缓冲区，zipfile 检测到不可 seek 后会改用数据描述符"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[ZipEntry], chunk_size: int = ZIP_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    逐块生成 ZIP 内容
+
+    Args:
+        entries: (压缩包内路径, 源文件路径或 bytes)；源文件在迭代到时才打开，读取失败的条目会被跳过
+        chunk_size: 读取源文件的块大小
+
+    Yields:
+        非空的 ZIP 字节块
+    """
+    for chunk in _iter_zip_chunks(entries, chunk_size):
+        if chunk:
+            yield chunk
+
+
+def _iter_zip_chunks(entries: Iterable[ZipEntry], chunk_size: int) -> Iterator[bytes]:
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for arcname, source in entries:
+            if isinstance(source, bytes):
+                info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                archive.writestr(info, source)
+                yield buffer.drain()
+                continue
+
+            try:
+                src = open(source, "rb")
+            except OSError:
+                continue
+            with src:
+                stat_result = os.fstat(src.fileno())
+                info = zipfile.ZipInfo(
+                    arcname,
+                    date_time=datetime.fromtimestamp(stat_result.st_mtime).timetuple()[:6],
+                )
+                info.compress_type = zipfile.ZIP_STORED
+                # 预先给出大小，超过 4GB 的条目由 zipfile 自动写 ZIP64 扩展字段
+                info.file_size = stat_result.st_size
+                with archive.open(info, mode="w") as dest:
+                    while True:
+                        block = src.read(chunk_size)
+                        if not block:
+                            break
+                        dest.write(block)
+                        yield buffer.drain()
+            yield buffer.drain()
+    # 中央目录在 ZipFile 关闭时写入
+    yield buffer.drain()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+截面相关性内核基准测试
+对比去重使用的两种平均截面相关性实现（float32 因子矩阵，含缺失值）：
+    1. 旧实现：逐个交易日取有效股票、中心化、点积
+    2. correlation_kernel：按日期分块的掩码向量化计算
+    3. 一对多批量计算：一个新因子对所有已处理因子（截面预先标准化，逐块 einsum）
+同时检查结果的最大差异（包含只有 1 只有效股票、截面方差为 0 的边界交易日）
+
+用法:
+    python benchmarks/bench_correlation_kernel.py
+    python benchmarks/bench_correlation_kernel.py --days 2500 --stocks 5000 --nan-ratio 0.1 --pairs 20
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.utils.correlation_kernel import (
+    batched_mean_correlations,
+    mean_rowwise_correlation,
+    standardize_cross_sections,
+)
+
+
+def legacy_mean_rowwise_correlation(left_values: np.ndarray, right_values: np.ndarray) -> Optional[float]:
+    """向量化之前 GalleryService._mean_rowwise_correlation 的逐行实现"""
+    total_corr = 0.0
+    valid_days = 0
+    for left_row, right_row in zip(left_values, right_values):
+        mask = np.isfinite(left_row) & np.isfinite(right_row)
+        if mask.sum() <= 1:
+            continue
+        valid_left = left_row[mask]
+        valid_right = right_row[mask]
+        centered_left = valid_left - valid_left.mean()
+        centered_right = valid_right - valid_right.mean()
+        denominator = np.linalg.norm(centered_left) * np.linalg.norm(centered_right)
+        if denominator <= 0:
+            continue
+        total_corr += float(np.dot(centered_left, centered_right) / denominator)
+        valid_days += 1
+    if valid_days == 0:
+        return None
+    return total_corr / valid_days
+
+
+def build_factor_pairs(days: int, stocks: int, nan_ratio: float, pairs: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """生成部分相关的 float32 因子对，并加入缺失值和边界交易日"""
+    rng = np.random.default_rng(42)
+    base = rng.standard_normal((days, stocks)).astype(np.float32)
+    result = []
+    for i in range(pairs):
+        weight = np.float32((i + 1) / (pairs + 1))
+        left = base + rng.standard_normal((days, stocks)).astype(np.float32) * (1 - weight)
+        right = base * weight + rng.standard_normal((days, stocks)).astype(np.float32)
+        left[rng.random((days, stocks)) < nan_ratio] = np.nan
+        right[rng.random((days, stocks)) < nan_ratio] = np.nan
+        # 边界交易日：全部缺失、只剩 1 只有效股票、截面为常数
+        left[0] = np.nan
+        left[1, 1:] = np.nan
+        right[2] = 1.0
+        result.append((left, right))
+    return result
+
+
+def time_pairs(func: Callable, pairs: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[float, List[Optional[float]]]:
+    started = time.perf_counter()
+    values = [func(left, right) for left, right in pairs]
+    return time.perf_counter() - started, values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="截面相关性内核基准测试")
+    parser.add_argument("--days", type=int, default=2500, help="交易日数")
+    parser.add_argument("--stocks", type=int, default=5000, help="股票数")
+    parser.add_argument("--nan-ratio", type=float, default=0.1, help="每个因子的缺失值比例")
+    parser.add_argument("--pairs", type=int, default=5, help="比较的因子对数量")
+    args = parser.parse_args()
+
+    pairs = build_factor_pairs(args.days, args.stocks, args.nan_ratio, args.pairs)
+    print(f"📊 {args.pairs} 对因子，{args.days} 交易日 × {args.stocks} 股票，缺失比例 {args.nan_ratio:.0%}")
+
+    legacy_elapsed, legacy_values = time_pairs(legacy_mean_rowwise_correlation, pairs)
+    kernel_elapsed, kernel_values = time_pairs(mean_rowwise_correlation, pairs)
+    max_diff = max(abs(a - b) for a, b in zip(legacy_values, kernel_values))
+
+    print(f"{'实现':<20}{'总耗时(s)':>12}{'每对(ms)':>12}")
+    for label, elapsed in [("逐行循环（旧）", legacy_elapsed), ("分块向量化", kernel_elapsed)]:
+        print(f"{label:<20}{elapsed:>12.3f}{elapsed / len(pairs) * 1000:>12.1f}")
+    print(f"加速比: {legacy_elapsed / kernel_elapsed:.2f}x，结果最大差异: {max_diff:.2e}")
+
+    # 一对多：第一对的左侧因子作为新因子，其余因子作为已处理因子
+    candidate = pairs[0][0]
+    priors = [right for _, right in pairs]
+    pairwise_elapsed, pairwise_values = time_pairs(
+        mean_rowwise_correlation, [(candidate, prior) for prior in priors]
+    )
+    started = time.perf_counter()
+    standardized = [standardize_cross_sections(values) for values in [candidate] + priors]
+    standardize_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    batch_values = batched_mean_correlations(
+        standardized[0][0],
+        standardized[0][1],
+        [item[0] for item in standardized[1:]],
+        [item[1] for item in standardized[1:]],
+    )
+    batch_elapsed = time.perf_counter() - started
+    batch_diff = max(abs(a - b) for a, b in zip(pairwise_values, batch_values))
+
+    print(f"\n== 一对多（1 个新因子 vs {len(priors)} 个已处理因子）==")
+    print(f"{'实现':<20}{'总耗时(s)':>12}")
+    print(f"{'逐对计算':<20}{pairwise_elapsed:>12.3f}")
+    print(f"{'截面标准化（每因子一次）':<20}{standardize_elapsed:>12.3f}")
+    print(f"{'批量计算':<20}{batch_elapsed:>12.3f}")
+    print(f"加速比（不含标准化）: {pairwise_elapsed / batch_elapsed:.2f}x，结果最大差异: {batch_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+去重模式基准测试
+在合成的因子文件夹上完整运行 _dedupe_images_by_correlation（含 SQLite 断点写入），对比：
+    1. full：每个因子与之前所有因子（含已隐藏的）比较
+    2. kept_only：只与已保留的因子比较，遇到第一个超过阈值的因子即停止
+因子按簇生成：同簇因子高度相关，保留数量约等于簇数，所有因子都会被处理
+
+用法:
+    python benchmarks/bench_dedupe_modes.py                         # 3000 个因子
+    python benchmarks/bench_dedupe_modes.py --factors 1000 --clusters 30 --days 120 --stocks 300
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import backend.services.gallery_service as gallery_service_module
+import backend.utils.correlation_utils as correlation_utils
+from backend.services.gallery_service import (
+    DEDUPE_MAX_KEPT_FACTORS,
+    DEDUPE_MODE_FULL,
+    DEDUPE_MODE_KEPT_ONLY,
+    GalleryService,
+)
+
+
+def build_factor_frames(factors: int, clusters: int, days: int, stocks: int) -> Dict[str, pd.DataFrame]:
+    """每个因子 = 所属簇的基准截面 + 小噪声，并带 10% 缺失值"""
+    rng = np.random.default_rng(5)
+    dates = pd.date_range("2020-01-01", periods=days, freq="B")
+    bases = rng.standard_normal((clusters, days, stocks)).astype(np.float32)
+    frames = {}
+    for i in range(factors):
+        values = bases[rng.integers(clusters)] + rng.standard_normal((days, stocks)).astype(np.float32) * 0.5
+        values[rng.random((days, stocks)) < 0.1] = np.nan
+        frames[f"factor_{i:05d}"] = pd.DataFrame(values, index=dates)
+    return frames
+
+
+def build_images(frames: Dict[str, pd.DataFrame]) -> List[Dict]:
+    rng = np.random.default_rng(9)
+    images = [
+        {
+            "name": f"{name}.png",
+            "relative_path": f"bench/{name}.png",
+            "factor_name": name,
+            "factor_version": "bench",
+            "neu_ret": float(rng.uniform(0, 1)),
+        }
+        for name in frames
+    ]
+    # 与列表接口相同：按收益率从高到低处理
+    images.sort(key=lambda image: -image["neu_ret"])
+    return images
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="去重模式基准测试")
+    parser.add_argument("--factors", type=int, default=3000, help="因子数量")
+    parser.add_argument("--clusters", type=int, default=40, help="因子簇数量（约等于保留数量）")
+    parser.add_argument("--days", type=int, default=60, help="交易日数")
+    parser.add_argument("--stocks", type=int, default=200, help="股票数")
+    parser.add_argument("--threshold", type=float, default=0.6, help="相关性阈值")
+    args = parser.parse_args()
+
+    frames = build_factor_frames(args.factors, args.clusters, args.days, args.stocks)
+    # 合成数据代替 parquet 读取
+    correlation_utils.load_and_process_factor = lambda version, name: frames.get(name)
+    print(
+        f"📊 {args.factors} 个因子（{args.clusters} 簇，{args.days} 交易日 × {args.stocks} 股票），"
+        f"阈值 {args.threshold}"
+    )
+
+    with tempfile.TemporaryDirectory(prefix="bench_dedupe_modes_") as temp_dir:
+        gallery_service_module.DEDUPE_PROGRESS_DB_FILE = Path(temp_dir) / "progress.db"
+        gallery_service_module.DEDUPE_CACHE_FILE = Path(temp_dir) / "cache.json"
+        service = GalleryService()
+
+        print(f"{'模式':<12}{'耗时(s)':>10}{'比较次数':>12}{'保留':>8}{'已处理':>8}")
+        kept_sets = {}
+        for mode in (DEDUPE_MODE_FULL, DEDUPE_MODE_KEPT_ONLY):
+            images = build_images(frames)
+            started = time.perf_counter()
+            kept_images, state = service._dedupe_images_by_correlation(
+                images,
+                threshold=args.threshold,
+                target_kept_limit=DEDUPE_MAX_KEPT_FACTORS,
+                dedupe_mode=mode,
+            )
+            elapsed = time.perf_counter() - started
+            comparisons = sum(int(image.get("dedupe_compared_count") or 0) for image in images)
+            kept_sets[mode] = {image["relative_path"] for image in kept_images}
+            print(
+                f"{mode:<12}{elapsed:>10.2f}{comparisons:>12}{len(kept_images):>8}"
+                f"{state.get('processed_factors', 0):>8}"
+            )
+
+        difference = kept_sets[DEDUPE_MODE_FULL] ^ kept_sets[DEDUPE_MODE_KEPT_ONLY]
+        print(f"两种模式保留结果不同的因子数: {len(difference)}")
+
+
+if __name__ == "__main__":
+    main()
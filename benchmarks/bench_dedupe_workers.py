@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+去重进程池基准测试
+在临时目录的因子矩阵存储上完整运行 full 模式的 _dedupe_images_by_correlation，对比不同工作进程数的总耗时：
+    workers=0：请求线程内批量计算
+    workers=N：每批 N × DEDUPE_CANDIDATES_PER_WORKER 个候选因子分给 N 个工作进程提前计算，
+               工作进程直接用内存映射打开因子矩阵旁边的截面标准化文件
+首次转换因子矩阵、保存截面标准化结果和进程池启动（spawn）的耗时不计入
+加速比受 CPU 核数限制，核数不超过工作进程数时没有加速
+
+用法:
+    python benchmarks/bench_dedupe_workers.py
+    python benchmarks/bench_dedupe_workers.py --factors 400 --days 1000 --stocks 3000 --workers 0,8,16,32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import backend.services.correlation_pool_service as correlation_pool_module
+import backend.services.factor_matrix_service as factor_matrix_module
+import backend.services.gallery_service as gallery_service_module
+import backend.utils.correlation_utils as correlation_utils
+from backend.services.correlation_pool_service import CorrelationPoolService
+from backend.services.factor_matrix_service import FactorMatrixService
+from backend.services.gallery_service import DEDUPE_MODE_FULL, GalleryService
+
+
+def build_factor_frames(factors: int, days: int, stocks: int, nan_ratio: float) -> Dict[str, pd.DataFrame]:
+    """与同一基准截面部分相关的因子，带缺失值"""
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2015-01-01", periods=days, freq="B")
+    columns = [f"{code:06d}" for code in range(stocks)]
+    base = rng.standard_normal((days, stocks)).astype(np.float32)
+    frames = {}
+    for i in range(factors):
+        values = base * np.float32(rng.random()) + rng.standard_normal((days, stocks)).astype(np.float32)
+        values[rng.random((days, stocks)) < nan_ratio] = np.nan
+        frames[f"factor_{i:04d}"] = pd.DataFrame(values, index=dates, columns=columns)
+    return frames
+
+
+def build_images(frames: Dict[str, pd.DataFrame]) -> List[Dict]:
+    return [
+        {
+            "name": f"{name}.png",
+            "relative_path": f"bench/{name}.png",
+            "factor_name": name,
+            "factor_version": "bench",
+            "neu_ret": 1.0 - i / len(frames),
+        }
+        for i, name in enumerate(frames)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="去重进程池基准测试")
+    parser.add_argument("--factors", type=int, default=120, help="因子数量")
+    parser.add_argument("--days", type=int, default=500, help="交易日数")
+    parser.add_argument("--stocks", type=int, default=2000, help="股票数")
+    parser.add_argument("--nan-ratio", type=float, default=0.1, help="缺失值比例")
+    parser.add_argument("--workers", type=str, default="0,2,4", help="逗号分隔的工作进程数")
+    args = parser.parse_args()
+
+    frames = build_factor_frames(args.factors, args.days, args.stocks, args.nan_ratio)
+    comparisons = args.factors * (args.factors - 1) // 2
+    print(
+        f"📊 {args.factors} 个因子（{args.days} 交易日 × {args.stocks} 股票），"
+        f"共 {comparisons} 次比较，CPU 核数 {os.cpu_count()}"
+    )
+
+    with tempfile.TemporaryDirectory(prefix="bench_dedupe_workers_") as temp_dir:
+        temp_path = Path(temp_dir)
+        # 因子矩阵存储以源文件的 (mtime, size) 判断是否需要重建，源文件内容不会被读取
+        source_dir = temp_path / "factor_data" / "bench"
+        source_dir.mkdir(parents=True)
+        for name in frames:
+            (source_dir / f"{name}.parquet").touch()
+        correlation_utils.FACTOR_DATA_ROOT = str(temp_path / "factor_data")
+        correlation_utils.load_and_process_factor = lambda version, name: frames.get(name)
+        factor_matrix_module._factor_matrix_service = FactorMatrixService(root_dir=temp_path / "store")
+        gallery_service_module.DEDUPE_CACHE_FILE = temp_path / "cache.json"
+        service = GalleryService()
+
+        def run_dedupe(workers: int, run_name: str):
+            pool = CorrelationPoolService(workers=workers)
+            correlation_pool_module._correlation_pool_service = pool
+            gallery_service_module.DEDUPE_PROGRESS_DB_FILE = temp_path / f"{run_name}.db"
+            service._dedupe_progress_db_initialized = False
+            if pool.enabled:
+                # 进程池按需启动工作进程，先让每个工作进程都启动完成
+                executor = pool._get_executor()
+                for future in [executor.submit(time.sleep, 0.5) for _ in range(workers)]:
+                    future.result()
+            images = build_images(frames)
+            started = time.perf_counter()
+            service._dedupe_images_by_correlation(
+                images, threshold=0.99, dedupe_mode=DEDUPE_MODE_FULL
+            )
+            elapsed = time.perf_counter() - started
+            if pool._executor is not None:
+                pool._executor.shutdown()
+            return elapsed, np.array(
+                [image.get("dedupe_max_corr") or 0.0 for image in images], dtype=np.float64
+            )
+
+        # 预热：转换因子矩阵并保存截面标准化结果
+        started = time.perf_counter()
+        run_dedupe(0, "warmup")
+        print(f"因子矩阵转换 + 截面标准化（首次运行）: {time.perf_counter() - started:.2f}s")
+
+        baseline = None
+        print(f"{'工作进程':>8}{'耗时(s)':>10}{'比较/秒':>10}{'加速比':>8}{'最大差异':>12}")
+        for run_index, workers in enumerate(int(value) for value in args.workers.split(",")):
+            elapsed, max_corrs = run_dedupe(workers, f"run_{run_index}")
+            if baseline is None:
+                baseline = (elapsed, max_corrs)
+            max_diff = float(np.max(np.abs(max_corrs - baseline[1]), initial=0.0))
+            print(
+                f"{workers:>8}{elapsed:>10.2f}{comparisons / elapsed:>10.0f}"
+                f"{baseline[0] / elapsed:>8.2f}{max_diff:>12.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+因子矩阵存储基准测试
+在临时目录生成合成的因子 parquet，对比去重加载一个因子的耗时：
+    1. parquet：每次 pd.read_parquet + 转 float32（_fold 因子另做 rank + 均值距离）
+    2. 首次转换：读取 parquet、处理并写入对齐到全局坐标轴的 .npy
+    3. 命中：np.load(mmap_mode="r")，数据留在页缓存中
+同时检查命中读取的数据与直接读取 parquet 的结果一致
+需要 pyarrow 或 fastparquet
+
+用法:
+    python benchmarks/bench_factor_matrix_store.py
+    python benchmarks/bench_factor_matrix_store.py --factors 20 --days 2500 --stocks 5000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import backend.utils.correlation_utils as correlation_utils
+from backend.services.factor_matrix_service import FactorMatrixService
+
+
+def write_factor_files(root: Path, factors: int, days: int, stocks: int) -> None:
+    """生成带 date 列的因子 parquet，与线上因子文件格式相同"""
+    rng = np.random.default_rng(11)
+    dates = pd.date_range("2015-01-01", periods=days, freq="B")
+    columns = [f"{code:06d}" for code in range(stocks)]
+    version_dir = root / "bench"
+    version_dir.mkdir(parents=True)
+    for i in range(factors):
+        values = rng.standard_normal((days, stocks))
+        values[rng.random((days, stocks)) < 0.1] = np.nan
+        df = pd.DataFrame(values, index=dates, columns=columns)
+        df.index.name = "date"
+        df.reset_index().to_parquet(version_dir / f"factor_{i:03d}.parquet")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="因子矩阵存储基准测试")
+    parser.add_argument("--factors", type=int, default=10, help="因子数量")
+    parser.add_argument("--days", type=int, default=1000, help="交易日数")
+    parser.add_argument("--stocks", type=int, default=3000, help="股票数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_factor_matrix_") as temp_dir:
+        source_root = Path(temp_dir) / "factor_data"
+        write_factor_files(source_root, args.factors, args.days, args.stocks)
+        correlation_utils.FACTOR_DATA_ROOT = str(source_root)
+        # 一半按原始值，一半按 _fold 处理
+        names = [
+            f"factor_{i:03d}" + ("_fold" if i % 2 else "") for i in range(args.factors)
+        ]
+        print(
+            f"📊 {args.factors} 个因子（{args.days} 交易日 × {args.stocks} 股票，"
+            f"其中 {args.factors // 2} 个 _fold）"
+        )
+
+        started = time.perf_counter()
+        direct = {
+            name: correlation_utils.load_and_process_factor("bench", name).to_numpy(dtype=np.float32)
+            for name in names
+        }
+        parquet_elapsed = time.perf_counter() - started
+
+        service = FactorMatrixService(root_dir=Path(temp_dir) / "store")
+        started = time.perf_counter()
+        for name in names:
+            service.load("bench", name)
+        convert_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        stored = {
+            name: service.load("bench", name).to_numpy(dtype=np.float32, copy=False)
+            for name in names
+        }
+        hit_elapsed = time.perf_counter() - started
+
+        max_diff = max(
+            float(np.nanmax(np.abs(direct[name] - stored[name]), initial=0.0)) for name in names
+        )
+        print(f"{'方式':<16}{'总耗时(s)':>12}{'每因子(ms)':>12}")
+        for label, elapsed in [
+            ("parquet", parquet_elapsed),
+            ("首次转换", convert_elapsed),
+            ("命中（mmap）", hit_elapsed),
+        ]:
+            print(f"{label:<16}{elapsed:>12.3f}{elapsed / len(names) * 1000:>12.1f}")
+        print(
+            f"加速比（命中 vs parquet）: {parquet_elapsed / hit_elapsed:.1f}x，"
+            f"转换次数 {service.conversions}，命中次数 {service.hits}，结果最大差异: {max_diff:.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
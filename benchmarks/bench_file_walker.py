@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+目录遍历基准测试
+对比旧实现（rglob + exists/is_file/stat + mimetypes）与 os.scandir 单次遍历的系统调用次数和耗时
+
+用法:
+    python benchmarks/bench_file_walker.py                 # 在临时目录生成 5 万个文件
+    python benchmarks/bench_file_walker.py --files 200000
+    python benchmarks/bench_file_walker.py --root /path/to/images
+"""
+import argparse
+import mimetypes
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.utils.file_utils import guess_mime_type, is_image_file, walk_files
+
+
+def build_synthetic_tree(root: Path, total_files: int) -> None:
+    """生成 因子版本/子文件夹/文件 三层结构，约 1/10 为非图片文件"""
+    versions = 20
+    subfolders_per_version = 25
+    per_folder = max(1, total_files // (versions * subfolders_per_version))
+    created = 0
+    for v in range(versions):
+        for s in range(subfolders_per_version):
+            folder = root / f"version_{v:02d}" / f"sub_{s:02d}"
+            folder.mkdir(parents=True, exist_ok=True)
+            for i in range(per_folder):
+                if created >= total_files:
+                    return
+                suffix = ".json" if i % 10 == 9 else (".svg" if i % 3 else ".png")
+                (folder / f"factor_{i:05d}{suffix}").write_bytes(b"x")
+                created += 1
+
+
+def legacy_collect(folder_path: Path, images_root: Path) -> List[Dict]:
+    """旧实现：rglob 枚举后逐个 exists()/is_file()/stat() 并调用 mimetypes"""
+    results = []
+    for item in folder_path.rglob("*"):
+        if not item.is_file():
+            continue
+        if not item.exists() or not item.is_file() or not is_image_file(item):
+            continue
+        stat = item.stat()
+        mime_type, _ = mimetypes.guess_type(str(item))
+        results.append(
+            {
+                "name": item.name,
+                "path": str(item),
+                "size": stat.st_size,
+                "mime_type": mime_type,
+                "extension": item.suffix.lower(),
+                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "relative_path": str(item.relative_to(images_root)),
+            }
+        )
+    return results
+
+
+def scandir_collect(folder_path: Path, images_root: Path) -> List[Dict]:
+    """新实现：walk_files 单次遍历，复用 DirEntry 的 stat 结果"""
+    return [
+        {
+            "name": scanned.name,
+            "path": scanned.path,
+            "size": scanned.stat.st_size,
+            "mime_type": guess_mime_type(scanned.extension),
+            "extension": scanned.extension,
+            "modified_at": datetime.fromtimestamp(scanned.stat.st_mtime).isoformat(),
+            "relative_path": scanned.relative_path,
+        }
+        for scanned in walk_files(folder_path, base=images_root)
+    ]
+
+
+class _CountingEntry:
+    """包装 DirEntry，统计需要访问文件系统的 stat() 调用"""
+
+    def __init__(self, entry, counts):
+        self._entry = entry
+        self._counts = counts
+        self.name = entry.name
+        self.path = entry.path
+
+    def stat(self, *args, **kwargs):
+        self._counts["stat"] += 1
+        return self._entry.stat(*args, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self._entry, item)
+
+    def __fspath__(self):
+        return self._entry.path
+
+
+class _CountingScandir:
+    def __init__(self, iterator, counts):
+        self._iterator = iterator
+        self._counts = counts
+
+    def __iter__(self):
+        for entry in self._iterator:
+            yield _CountingEntry(entry, self._counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._iterator.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+@contextmanager
+def count_syscalls():
+    """
+    统计 Python 层发出的 stat/lstat/scandir 调用
+
+    Linux 上 DirEntry.is_dir()/is_file() 使用 readdir 返回的 d_type，不产生系统调用；
+    DirEntry.stat() 与 os.stat() 各对应一次 stat 系统调用
+    """
+    counts = {"stat": 0, "lstat": 0, "scandir": 0}
+    original_stat, original_lstat, original_scandir = os.stat, os.lstat, os.scandir
+
+    def counting_stat(*args, **kwargs):
+        counts["stat"] += 1
+        return original_stat(*args, **kwargs)
+
+    def counting_lstat(*args, **kwargs):
+        counts["lstat"] += 1
+        return original_lstat(*args, **kwargs)
+
+    def counting_scandir(*args, **kwargs):
+        counts["scandir"] += 1
+        return _CountingScandir(original_scandir(*args, **kwargs), counts)
+
+    os.stat, os.lstat, os.scandir = counting_stat, counting_lstat, counting_scandir
+    try:
+        yield counts
+    finally:
+        os.stat, os.lstat, os.scandir = original_stat, original_lstat, original_scandir
+
+
+def time_best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="目录遍历基准测试")
+    parser.add_argument("--files", type=int, default=50000, help="合成目录树的文件数")
+    parser.add_argument("--root", type=Path, default=None, help="使用已有目录代替合成目录树")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数（取最优）")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.root is None:
+        temp_dir = Path(tempfile.mkdtemp(prefix="gallery_walker_bench_"))
+        print(f"📂 生成合成目录树: {args.files} 个文件 -> {temp_dir}")
+        build_synthetic_tree(temp_dir, args.files)
+        root = temp_dir
+    else:
+        root = args.root
+
+    try:
+        implementations = [
+            ("rglob + exists/is_file/stat", legacy_collect),
+            ("os.scandir walk_files", scandir_collect),
+        ]
+
+        reference = None
+        print(f"{'实现':<32}{'图片数':>10}{'stat':>10}{'scandir':>10}{'每图 syscall':>14}{'耗时(s)':>10}")
+        for label, collect in implementations:
+            with count_syscalls() as counts:
+                images = collect(root, root)
+            signature = sorted(item["relative_path"] for item in images)
+            if reference is None:
+                reference = signature
+            elif signature != reference:
+                print(f"❌ {label} 的结果与旧实现不一致")
+
+            elapsed = time_best_of(lambda: collect(root, root), args.repeat)
+            syscalls = counts["stat"] + counts["lstat"] + counts["scandir"]
+            per_image = syscalls / len(images) if images else 0.0
+            print(
+                f"{label:<32}{len(images):>10}{counts['stat'] + counts['lstat']:>10}"
+                f"{counts['scandir']:>10}{per_image:>14.2f}{elapsed:>10.3f}"
+            )
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
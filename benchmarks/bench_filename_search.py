@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+文件名搜索基准测试
+对比逐个文件做子串匹配的旧实现与三元组倒排索引的查询耗时（含 no: 屏蔽关键词和拼音查询）
+
+用法:
+    python benchmarks/bench_filename_search.py                 # 10 万个文件
+    python benchmarks/bench_filename_search.py --files 500000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.utils.pinyin_utils import build_search_text
+from backend.utils.trigram_index import TrigramIndex
+
+FACTOR_WORDS = [
+    "momentum", "reversal", "volume", "turnover", "skew", "vol", "corr", "beta",
+    "amihud", "spread", "intraday", "overnight", "close", "open", "high", "low",
+    "mean", "std", "rank", "zscore", "ewm", "lag", "diff", "ratio",
+    "动量", "反转", "成交量", "波动率", "换手率", "偏度",
+]
+
+QUERIES = [
+    "momentum",
+    "vol rank",
+    "corr no:lag",
+    "intraday close no:std no:ewm",
+    "ewm_5",
+    "xyzzy",
+    "no:vol",
+    "dongliang",
+    "hsl no:bdl",
+]
+
+
+def build_synthetic_records(total_files: int) -> Dict[str, List[Dict]]:
+    """按 父文件夹/因子版本 分组生成文件记录"""
+    rng = random.Random(7)
+    folders: Dict[str, List[Dict]] = {}
+    versions = 50
+    per_folder = max(1, total_files // versions)
+    for v in range(versions):
+        folder = f"parent_{v % 5}/version_{v:02d}"
+        records = []
+        for i in range(per_folder):
+            words = rng.sample(FACTOR_WORDS, rng.randint(2, 4))
+            name = "_".join(words) + f"_{rng.randint(1, 60)}_{i}" + (".svg" if i % 3 else ".png")
+            records.append({"name": name, "folder": folder, "relative_path": f"{folder}/{name}"})
+        folders[folder] = records
+    return folders
+
+
+def parse_query(query: str) -> Tuple[List[str], List[str]]:
+    include, exclude = [], []
+    for kw in query.split():
+        if kw.startswith("no:"):
+            if kw[3:]:
+                exclude.append(kw[3:].lower())
+        else:
+            include.append(kw.lower())
+    return include, exclude
+
+
+def build_search_texts(folders: Dict[str, List[Dict]]) -> List[Tuple[str, str, str]]:
+    """预先算好每个文件的检索文本（小写文件名，含汉字时附加全拼和首字母）和小写文件名"""
+    return [
+        (record["relative_path"], build_search_text(record["name"]), record["name"].lower())
+        for records in folders.values()
+        for record in records
+    ]
+
+
+def linear_search(search_texts: List[Tuple[str, str, str]], include: List[str], exclude: List[str]) -> List[str]:
+    """
+    旧实现：逐个文件做子串匹配（检索文本已预先算好，不计入查询耗时）
+
+    包含关键词匹配检索文本（含拼音），屏蔽关键词只匹配原始文件名
+    """
+    results = []
+    for relative_path, search_text, name_lower in search_texts:
+        include_match = not include or all(keyword in search_text for keyword in include)
+        exclude_match = not any(keyword in name_lower for keyword in exclude)
+        if include_match and exclude_match:
+            results.append(relative_path)
+    return results
+
+
+def time_best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文件名搜索基准测试")
+    parser.add_argument("--files", type=int, default=100000, help="文件数量")
+    parser.add_argument("--repeat", type=int, default=5, help="计时重复次数（取最优）")
+    args = parser.parse_args()
+
+    folders = build_synthetic_records(args.files)
+    total = sum(len(records) for records in folders.values())
+
+    started = time.perf_counter()
+    search_texts = build_search_texts(folders)
+    print(f"🔤 计算检索文本（含拼音）耗时 {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    index = TrigramIndex(text_func=build_search_text)
+    for folder, records in folders.items():
+        index.replace_folder(folder, records)
+    print(f"📚 {total} 个文件，建立索引耗时 {time.perf_counter() - started:.2f}s")
+
+    mismatches = 0
+    print(f"{'查询':<34}{'结果数':>8}{'逐个匹配(ms)':>16}{'倒排索引(ms)':>16}")
+    for query in QUERIES:
+        include, exclude = parse_query(query)
+        expected = sorted(linear_search(search_texts, include, exclude))
+        got = sorted(record["relative_path"] for record in index.search(include, exclude))
+        if got != expected:
+            print(f"❌ 查询 {query!r} 的结果与逐个匹配不一致")
+            mismatches += 1
+
+        linear_ms = time_best_of(lambda: linear_search(search_texts, include, exclude), args.repeat) * 1000
+        index_ms = time_best_of(lambda: index.search(include, exclude), args.repeat) * 1000
+        print(f"{query:<34}{len(expected):>8}{linear_ms:>16.2f}{index_ms:>16.2f}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
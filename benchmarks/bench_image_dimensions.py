@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+图片尺寸探测基准测试
+在一批大尺寸 SVG 图表上对比：
+    1. 旧实现：ElementTree.parse 解析整份文档后读取根元素属性
+    2. iterparse 读到根元素即停止
+    3. 持久化尺寸缓存：新进程首次访问（命中 SQLite）与进程内再次访问（命中内存）
+
+用法:
+    python benchmarks/bench_image_dimensions.py                       # 生成 200 个约 1MB 的 SVG
+    python benchmarks/bench_image_dimensions.py --files 500 --paths 20000
+    python benchmarks/bench_image_dimensions.py --dir /data/pngs/some_folder
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.services.image_dimension_service import ImageDimensionService
+from backend.utils.image_probe import parse_svg_length, probe_svg_dimensions
+
+
+def write_synthetic_charts(target_dir: Path, files: int, paths: int) -> List[Path]:
+    """生成 matplotlib 风格的 SVG 图表：XML 声明、DOCTYPE、大量折线 path"""
+    rng = random.Random(3)
+    svg_files = []
+    for i in range(files):
+        width, height = rng.choice([(1152, 648), (1440, 720), (2016, 1008)])
+        lines = [
+            '<?xml version="1.0" encoding="utf-8" standalone="no"?>',
+            '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" '
+            '"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">',
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * 0.75}pt" '
+            f'height="{height * 0.75}pt" viewBox="0 0 {width * 0.75} {height * 0.75}" version="1.1">',
+            "<g id=\"figure_1\">",
+        ]
+        for j in range(paths):
+            points = " L ".join(
+                f"{rng.uniform(0, width):.3f} {rng.uniform(0, height):.3f}" for _ in range(6)
+            )
+            lines.append(
+                f'<path d="M {points}" clip-path="url(#p{j % 7})" '
+                f'style="fill: none; stroke: #1f77b4; stroke-width: 1.5"/>'
+            )
+        lines.append("</g></svg>")
+        svg_file = target_dir / f"factor_{i:04d}.svg"
+        svg_file.write_text("\n".join(lines), encoding="utf-8")
+        svg_files.append(svg_file)
+    return svg_files
+
+
+def legacy_svg_dimensions(svg_path: Path) -> Optional[Tuple[int, int]]:
+    """旧实现：解析整份文档"""
+    try:
+        root = ET.parse(svg_path).getroot()
+        width = root.get("width")
+        height = root.get("height")
+        if width and height:
+            width = parse_svg_length(width)
+            height = parse_svg_length(height)
+            if width and height:
+                return int(width), int(height)
+        viewbox = root.get("viewBox")
+        if viewbox:
+            parts = viewbox.split()
+            if len(parts) >= 4:
+                return int(float(parts[2])), int(float(parts[3]))
+        return None
+    except Exception:
+        return None
+
+
+def time_all(func: Callable[[Path], object], svg_files: List[Path]) -> Tuple[float, List]:
+    started = time.perf_counter()
+    results = [func(svg_file) for svg_file in svg_files]
+    return time.perf_counter() - started, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="图片尺寸探测基准测试")
+    parser.add_argument("--files", type=int, default=200, help="生成的 SVG 数量")
+    parser.add_argument("--paths", type=int, default=5000, help="每个 SVG 中的 path 数量")
+    parser.add_argument("--dir", type=Path, default=None, help="使用已有目录中的 SVG，而不是生成")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_dims_") as temp_dir:
+        temp_path = Path(temp_dir)
+        if args.dir:
+            svg_files = sorted(args.dir.glob("*.svg"))
+        else:
+            svg_files = write_synthetic_charts(temp_path, args.files, args.paths)
+        if not svg_files:
+            print("❌ 没有找到 SVG 文件")
+            return
+
+        total_mb = sum(svg_file.stat().st_size for svg_file in svg_files) / 1024 / 1024
+        print(f"📊 {len(svg_files)} 个 SVG，共 {total_mb:.1f} MB")
+
+        legacy_seconds, expected = time_all(legacy_svg_dimensions, svg_files)
+        probe_seconds, probed = time_all(probe_svg_dimensions, svg_files)
+        if probed != expected:
+            print("❌ iterparse 结果与整份解析不一致")
+
+        db_file = temp_path / "image_dimensions.db"
+        time_all(ImageDimensionService(db_file=db_file).get_dimensions, svg_files)
+        service = ImageDimensionService(db_file=db_file)
+        db_seconds, cached = time_all(service.get_dimensions, svg_files)
+        memory_seconds, _ = time_all(service.get_dimensions, svg_files)
+        if cached != expected:
+            print("❌ 尺寸缓存结果与整份解析不一致")
+
+        per_file = lambda seconds: seconds / len(svg_files) * 1000
+        print(f"{'方式':<28}{'总耗时(ms)':>14}{'单个(ms)':>12}")
+        for label, seconds in [
+            ("ElementTree.parse 整份解析", legacy_seconds),
+            ("iterparse 读到根元素", probe_seconds),
+            ("尺寸缓存（SQLite 命中）", db_seconds),
+            ("尺寸缓存（内存命中）", memory_seconds),
+        ]:
+            print(f"{label:<28}{seconds * 1000:>14.2f}{per_file(seconds):>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
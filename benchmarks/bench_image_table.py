@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+列式图片表基准测试
+对比字典列表（每张图片一个完整信息字典，排序后切片）与 ImageTable（NumPy 列 + 向量化排序，只构造返回页）
+的内存占用和排序取页耗时
+
+用法:
+    python benchmarks/bench_image_table.py                 # 20 万张图片
+    python benchmarks/bench_image_table.py --images 500000 --per-page 50
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.utils.file_utils import IMAGE_EXTENSIONS, guess_mime_type
+from backend.utils.image_table import ImageTableBuilder
+
+IMAGES_ROOT = Path("/data/pngs")
+
+
+def build_synthetic_groups(total_images: int, versions: int) -> List[Tuple[str, List, Dict]]:
+    """生成 (因子版本, 图片行, 收益率) 分组，约 1/10 的因子没有收益率（按 0 并列）"""
+    rng = random.Random(42)
+    per_version = max(1, total_images // versions)
+    groups = []
+    for v in range(versions):
+        version = f"version_{v:02d}"
+        rows = []
+        neu_ret_data = {}
+        for i in range(per_version):
+            factor_name = f"factor_{rng.randrange(per_version * 2):07d}_{i}"
+            extension = ".svg" if i % 3 else ".png"
+            name = factor_name + extension
+            rows.append(
+                (
+                    f"parent/{version}/{name}",
+                    name,
+                    extension,
+                    rng.randrange(1000, 500000),
+                    1.7e9 + rng.random() * 1e7,
+                    1.7e9 + rng.random() * 1e7,
+                )
+            )
+            if rng.random() < 0.9:
+                neu_ret_data[factor_name] = rng.uniform(-0.1, 0.1)
+        groups.append((version, rows, neu_ret_data))
+    return groups
+
+
+def format_image_info(row: Tuple) -> Dict:
+    relative_path, name, extension, size, mtime, ctime = row
+    modified_at = datetime.fromtimestamp(mtime).isoformat()
+    return {
+        "name": name,
+        "path": str(IMAGES_ROOT / relative_path),
+        "size": size,
+        "mime_type": guess_mime_type(extension),
+        "extension": extension,
+        "created_at": datetime.fromtimestamp(ctime).isoformat(),
+        "modified_at": modified_at,
+        "date": modified_at,
+        "is_image": extension in IMAGE_EXTENSIONS,
+        "is_svg": extension == ".svg",
+        "relative_path": relative_path,
+    }
+
+
+def build_dict_list(groups) -> List[Dict]:
+    """旧实现：为每张图片构造完整信息字典"""
+    images = []
+    for version, rows, neu_ret_data in groups:
+        for row in rows:
+            image_info = format_image_info(row)
+            factor_name = row[1].rsplit(".", 1)[0]
+            image_info["subfolder"] = version
+            image_info["factor_name"] = factor_name
+            image_info["factor_version"] = version
+            image_info["dedupe_group"] = "parent"
+            image_info["neu_ret"] = neu_ret_data.get(factor_name, 0)
+            images.append(image_info)
+    return images
+
+
+def build_table(groups):
+    builder = ImageTableBuilder(with_neu_ret=True)
+    for version, rows, neu_ret_data in groups:
+        builder.add_group(rows, version, neu_ret_data)
+    return builder.build()
+
+
+DICT_SORT_KEYS = {
+    "neu_ret": (
+        lambda x: (
+            -float(x.get("neu_ret", 0) or 0),
+            x["factor_version"].lower(),
+            x["factor_name"].lower(),
+        ),
+        False,
+    ),
+    "date": (lambda x: x.get("date", ""), True),
+    "size": (lambda x: x.get("size", 0), True),
+    "name": (lambda x: x["name"].lower(), False),
+}
+
+
+def dict_page(images: List[Dict], sort_by: str, page: int, per_page: int) -> List[str]:
+    key, reverse = DICT_SORT_KEYS[sort_by]
+    ordered = sorted(images, key=key, reverse=reverse)
+    start = (page - 1) * per_page
+    return [image["relative_path"] for image in ordered[start:start + per_page]]
+
+
+def table_page(table, sort_by: str, page: int, per_page: int) -> List[str]:
+    start = (page - 1) * per_page
+    rows = table.order(sort_by)[start:start + per_page].tolist()
+    return [format_image_info(
+        (
+            table.relative_paths[row],
+            table.names[row],
+            table.extension(row),
+            int(table.sizes[row]),
+            float(table.mtimes[row]),
+            float(table.ctimes[row]),
+        )
+    )["relative_path"] for row in rows]
+
+
+def measure_memory(build, groups) -> Tuple[object, int]:
+    """tracemalloc 统计构建过程中新分配且仍存活的字节数（不含输入分组本身）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build(groups)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def time_best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列式图片表基准测试")
+    parser.add_argument("--images", type=int, default=200000, help="图片数量")
+    parser.add_argument("--versions", type=int, default=40, help="因子版本（子文件夹）数量")
+    parser.add_argument("--per-page", type=int, default=50, help="每页数量")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数（取最优）")
+    args = parser.parse_args()
+
+    print(f"📦 生成 {args.images} 张图片，{args.versions} 个因子版本")
+    groups = build_synthetic_groups(args.images, args.versions)
+
+    images, dict_bytes = measure_memory(build_dict_list, groups)
+    table, table_bytes = measure_memory(build_table, groups)
+    build_dict_s = time_best_of(lambda: build_dict_list(groups), 1)
+    build_table_s = time_best_of(lambda: build_table(groups), 1)
+
+    print(f"{'实现':<16}{'内存(MB)':>12}{'每图(B)':>10}{'构建(s)':>10}")
+    for label, used, elapsed in (
+        ("字典列表", dict_bytes, build_dict_s),
+        ("ImageTable", table_bytes, build_table_s),
+    ):
+        print(f"{label:<16}{used / 1024 / 1024:>12.1f}{used / len(images):>10.0f}{elapsed:>10.3f}")
+
+    print(f"\n{'排序':<10}{'页':>6}{'字典列表(ms)':>16}{'ImageTable(ms)':>18}{'首页部分排序(ms)':>20}")
+    for sort_by in ("neu_ret", "date", "size", "name"):
+        for page in (1, 100):
+            expected = dict_page(images, sort_by, page, args.per_page)
+            if table_page(table, sort_by, page, args.per_page) != expected:
+                print(f"❌ {sort_by} 第 {page} 页结果不一致")
+
+            dict_ms = time_best_of(
+                lambda: dict_page(images, sort_by, page, args.per_page), args.repeat
+            ) * 1000
+            # 每次计时使用新表，避免命中表内缓存的排序结果
+            fresh_tables = [build_table(groups) for _ in range(args.repeat)]
+            table_ms = min(
+                time_best_of(lambda: table_page(fresh, sort_by, page, args.per_page), 1)
+                for fresh in fresh_tables
+            ) * 1000
+            head_count = page * args.per_page
+            head_ms = min(
+                time_best_of(lambda: fresh.head_order(sort_by, head_count), 1)
+                for fresh in (build_table(groups) for _ in range(args.repeat))
+            ) * 1000
+            print(f"{sort_by:<10}{page:>6}{dict_ms:>16.1f}{table_ms:>18.1f}{head_ms:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+JSON 响应基准测试
+对三类典型响应（图片列表页、去重进度、相关性矩阵）比较：
+    1. 序列化耗时：旧 jsonify（标准库，sort_keys + ensure_ascii）与 json / ujson / orjson
+    2. 传输字节数：原始、gzip、brotli（已安装时）及压缩耗时
+
+用法:
+    python benchmarks/bench_json_response.py
+    python benchmarks/bench_json_response.py --images 500 --matrix 800 --repeat 20
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# 添加路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.utils.compression import BROTLI_AVAILABLE, compress_body
+from backend.utils.json_provider import get_json_dumps, orjson, ujson
+
+
+def build_image_page(count: int) -> Dict:
+    """与列表接口结构相同的图片信息（约 20 个字段）"""
+    rng = random.Random(7)
+    base = datetime(2025, 1, 1)
+    images = []
+    for i in range(count):
+        version = f"因子版本_{i % 12:02d}"
+        name = f"momentum_{rng.randint(1, 99999):05d}_动量.png"
+        relative_path = f"研究/{version}/{name}"
+        modified_at = (base + timedelta(minutes=i)).isoformat()
+        images.append(
+            {
+                "name": name,
+                "path": f"/data/pngs/{relative_path}",
+                "size": rng.randint(50_000, 3_000_000),
+                "mime_type": "image/png",
+                "extension": ".png",
+                "created_at": modified_at,
+                "modified_at": modified_at,
+                "date": modified_at,
+                "is_image": True,
+                "is_svg": False,
+                "relative_path": relative_path,
+                "url": f"/gallery/serve/{relative_path}?v=1735689600000000",
+                "thumbnail_url": f"/gallery/thumb/preview/{relative_path}?v=1735689600000000",
+                "factor_name": name.rsplit(".", 1)[0],
+                "factor_version": version,
+                "dedupe_group": version,
+                "neu_ret": rng.uniform(-0.2, 0.8),
+                "width": 1440,
+                "height": 720,
+                "description": "日频动量因子，过去 20 日收益率去除行业均值" if i % 3 == 0 else None,
+                "has_description": i % 3 == 0,
+            }
+        )
+    return {"success": True, "data": {"images": images, "total": count * 40, "page": 1}}
+
+
+def build_dedupe_progress(count: int) -> Dict:
+    rng = random.Random(11)
+    return {
+        "success": True,
+        "data": {
+            "status": "running",
+            "processed": count,
+            "kept": [f"研究/因子版本_01/factor_{i}.png" for i in range(count // 2)],
+            "annotations": {
+                f"研究/因子版本_01/factor_{i}.png": {
+                    "max_correlation": rng.uniform(0, 1),
+                    "similar_to": f"factor_{rng.randint(0, count)}",
+                }
+                for i in range(count)
+            },
+        },
+    }
+
+
+def build_correlation(size: int, as_array: bool) -> Dict:
+    rng = np.random.default_rng(3)
+    matrix = rng.uniform(-1, 1, size=(size, size))
+    return {
+        "success": True,
+        "factor_names": [f"factor_{i}" for i in range(size)],
+        "correlation_matrix": matrix if as_array else matrix.tolist(),
+    }
+
+
+def legacy_jsonify_dumps(obj) -> str:
+    """Flask 默认 provider 的参数"""
+    return json.dumps(obj, sort_keys=True, ensure_ascii=True, separators=(",", ":"))
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON 响应基准测试")
+    parser.add_argument("--images", type=int, default=100, help="图片列表页的图片数")
+    parser.add_argument("--progress", type=int, default=3000, help="去重进度中的图片数")
+    parser.add_argument("--matrix", type=int, default=300, help="相关性矩阵边长")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    backends: List[str] = ["json"] + (["ujson"] if ujson else []) + (["orjson"] if orjson else [])
+    payloads = [
+        ("图片列表页", build_image_page(args.images), None),
+        ("去重进度", build_dedupe_progress(args.progress), None),
+        ("相关性矩阵", build_correlation(args.matrix, False), build_correlation(args.matrix, True)),
+    ]
+
+    print("== 序列化耗时（ms，越小越好）==")
+    print(f"{'响应':<12}{'旧 jsonify':>12}" + "".join(f"{name:>12}" for name in backends) + f"{'orjson+ndarray':>16}")
+    for label, payload, array_payload in payloads:
+        row = f"{label:<12}{best_of(lambda: legacy_jsonify_dumps(payload), args.repeat):>12.2f}"
+        for name in backends:
+            dumps = get_json_dumps(name)
+            row += f"{best_of(lambda: dumps(payload), args.repeat):>12.2f}"
+        if array_payload is not None and orjson:
+            dumps = get_json_dumps("orjson")
+            row += f"{best_of(lambda: dumps(array_payload), args.repeat):>16.2f}"
+        print(row)
+
+    encodings = ["gzip"] + (["br"] if BROTLI_AVAILABLE else [])
+    print("\n== 传输字节数（KB）与压缩耗时（ms）==")
+    print(f"{'响应':<12}{'旧 jsonify':>12}{'新序列化':>12}" + "".join(f"{e:>10}{e + ' ms':>10}" for e in encodings))
+    fast_dumps = get_json_dumps("auto")
+    for label, payload, _ in payloads:
+        legacy = legacy_jsonify_dumps(payload).encode("utf-8")
+        body = fast_dumps(payload).encode("utf-8")
+        row = f"{label:<12}{len(legacy) / 1024:>12.1f}{len(body) / 1024:>12.1f}"
+        for encoding in encodings:
+            compressed = compress_body(body, encoding)
+            elapsed = best_of(lambda: compress_body(body, encoding), max(1, args.repeat // 2))
+            row += f"{len(compressed) / 1024:>10.1f}{elapsed:>10.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,14 @@ CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
 THUMBNAIL_SIZE = (200, 200)
 PREVIEW_SIZE = (800, 600)
 
+# 文件发送卸载配置：图片/缩略图接口只做路径校验，文件内容由前置 Web 服务器发送
+# off：Flask 进程内发送；x-accel-redirect：nginx；x-sendfile：Apache mod_xsendfile / lighttpd
+FILE_OFFLOAD_MODE = os.environ.get('GALLERY_FILE_OFFLOAD_MODE', 'off').lower()
+# x-accel-redirect 模式下图片根目录、缓存目录对应的 nginx internal location，例如
+#   location /_protected/images/ { internal; alias /path/to/images/; }
+FILE_OFFLOAD_IMAGES_LOCATION = os.environ.get('GALLERY_FILE_OFFLOAD_IMAGES_LOCATION', '/_protected/images/')
+FILE_OFFLOAD_CACHE_LOCATION = os.environ.get('GALLERY_FILE_OFFLOAD_CACHE_LOCATION', '/_protected/cache/')
+
 # 数据库配置（如果需要的话）
 DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///gallery.db')
 
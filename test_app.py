@@ -66,6 +66,234 @@ def test_basic_functionality():
         traceback.print_exc()
         return False
 
+def test_file_offload():
+    """测试文件发送卸载：只返回内部跳转响应头，不在进程内读取文件"""
+    import builtins
+    import tempfile
+    from unittest import mock
+
+    print("\n🔍 测试文件发送卸载...")
+
+    from backend.app import create_app
+    from backend.api import gallery_routes
+    from backend.utils import http_cache
+
+    app, socketio = create_app()
+    client = app.test_client()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        images_root = Path(temp_dir).resolve()
+        image_file = images_root / "因子" / "chart.png"
+        image_file.parent.mkdir()
+        image_file.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 1024)
+
+        real_open = builtins.open
+        opened_files = []
+
+        def tracking_open(file, *args, **kwargs):
+            opened_files.append(str(file))
+            return real_open(file, *args, **kwargs)
+
+        def forbidden_send_file(*args, **kwargs):
+            raise AssertionError("卸载模式下不应调用 send_file")
+
+        with mock.patch.object(gallery_routes.gallery_service, "images_root", images_root), \
+                mock.patch.object(http_cache, "FILE_OFFLOAD_LOCATIONS", [(str(images_root), "/_protected/images/")]), \
+                mock.patch.object(http_cache, "send_file", forbidden_send_file), \
+                mock.patch("builtins.open", tracking_open):
+            with mock.patch.object(http_cache, "FILE_OFFLOAD_MODE", "x-accel-redirect"):
+                response = client.get("/gallery/serve/因子/chart.png")
+                assert response.status_code == 200
+                assert response.headers["X-Accel-Redirect"] == "/_protected/images/%E5%9B%A0%E5%AD%90/chart.png"
+                assert response.headers["Content-Type"] == "image/png"
+                assert response.headers["ETag"]
+                assert response.data == b""
+
+                not_modified = client.get(
+                    "/gallery/serve/因子/chart.png",
+                    headers={"If-None-Match": response.headers["ETag"]},
+                )
+                assert not_modified.status_code == 304
+
+                assert client.get("/gallery/serve/../outside.png").status_code == 404
+
+            with mock.patch.object(http_cache, "FILE_OFFLOAD_MODE", "x-sendfile"):
+                response = client.get("/gallery/serve/因子/chart.png")
+                assert response.status_code == 200
+                assert response.headers["X-Sendfile"] == str(image_file)
+                assert response.data == b""
+
+        assert str(image_file) not in opened_files
+    print("✅ 文件发送卸载测试通过")
+    return True
+
+def test_description_search_after_first_write():
+    """测试目录中第一次写入的描述立即可以搜索，不需要等待目录索引的刷新间隔"""
+    import tempfile
+
+    print("\n🔍 测试描述写入后立即可搜索...")
+
+    from backend.services.gallery_service import GalleryService
+    from backend.services.image_catalog_service import ImageCatalogService
+    from backend.services.description_index_service import DescriptionIndexService
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        images_root = Path(temp_dir).resolve() / "images"
+        image_dir = images_root / "parentB" / "v3" / "nested"
+        folder_dir = images_root / "parentB" / "v1" / "nested"
+        image_dir.mkdir(parents=True)
+        folder_dir.mkdir(parents=True)
+        (image_dir / "deep_factor.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+        (folder_dir / "chart.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+        catalog = ImageCatalogService(images_root, db_file=Path(temp_dir) / "catalog.db")
+        catalog.refresh(force=True)
+        gallery_service = GalleryService()
+        gallery_service.images_root = images_root
+        gallery_service.catalog = catalog
+        gallery_service.description_index = DescriptionIndexService(catalog)
+        assert gallery_service.description_index.search(images_root, ["llama"], []) == []
+
+        assert gallery_service.set_image_description("parentB/v3/nested", "deep_factor.png", "llama 因子")
+        assert gallery_service.set_folder_description("parentB/v1/nested", "okapi 文件夹")
+
+        hits = gallery_service.description_index.search(images_root, ["llama"], [])
+        assert [(hit["folder"], hit["filename"]) for hit in hits] == [("parentB/v3/nested", "deep_factor.png")]
+        hits = gallery_service.description_index.search(images_root, ["okapi"], [])
+        assert [(hit["folder"], hit["filename"]) for hit in hits] == [("parentB/v1/nested", "")]
+    print("✅ 描述写入后立即可搜索测试通过")
+    return True
+
+def test_exclude_keywords_match_original_text():
+    """测试屏蔽关键词 no:xxx 只匹配原文，不按全拼、首字母扩大排除范围"""
+    import json
+    import tempfile
+
+    print("\n🔍 测试屏蔽关键词只匹配原文...")
+
+    from backend.utils.trigram_index import TrigramIndex
+    from backend.utils.pinyin_utils import build_search_text
+    from backend.services.image_catalog_service import ImageCatalogService
+    from backend.services.description_index_service import DescriptionIndexService
+
+    index = TrigramIndex(text_func=build_search_text)
+    index.replace_folder("v1", [
+        {"name": "因子_factor.png", "folder": "v1"},
+        {"name": "yz_factor.png", "folder": "v1"},
+    ])
+    assert [record["name"] for record in index.search(["factor"], ["yz"])] == ["因子_factor.png"]
+    assert [record["name"] for record in index.search(["yinzi"], [])] == ["因子_factor.png"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        images_root = Path(temp_dir).resolve() / "images"
+        folder = images_root / "v1"
+        folder.mkdir(parents=True)
+        for name in ("a.png", "b.png"):
+            (folder / name).write_bytes(b"\x89PNG\r\n\x1a\n")
+        (folder / ".descriptions.json").write_text(
+            json.dumps({"a.png": "动量因子 chart", "b.png": "yinzi chart"}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        catalog = ImageCatalogService(images_root, db_file=Path(temp_dir) / "catalog.db")
+        catalog.refresh(force=True)
+        description_index = DescriptionIndexService(catalog)
+        for fts_enabled in (True, False):
+            description_index.fts_enabled = fts_enabled
+            hits = description_index.search(images_root, ["chart"], ["yinzi"])
+            assert [hit["filename"] for hit in hits] == ["a.png"]
+            hits = description_index.search(images_root, ["chart"], ["因子"])
+            assert [hit["filename"] for hit in hits] == ["b.png"]
+    print("✅ 屏蔽关键词只匹配原文测试通过")
+    return True
+
+def test_correlation_kernel_matches_row_loop():
+    """测试截面相关性内核与逐日循环的旧实现结果一致（含全缺失、单只有效股票、常数截面）"""
+    import numpy as np
+
+    print("\n📈 测试截面相关性内核...")
+
+    from backend.utils.correlation_kernel import (
+        batched_mean_correlations,
+        mean_rowwise_correlation,
+        prefix_mean_correlations,
+        rowwise_correlation_sums,
+        standardize_cross_sections,
+    )
+
+    def row_loop(left_values, right_values):
+        # 旧实现：逐日取共同有效股票计算 Pearson 相关，有效股票 ≤ 1 或方差为 0 的交易日跳过；
+        # 内核中间结果用 float64，参考值也按 float64 计算
+        left_values = np.asarray(left_values, dtype=np.float64)
+        right_values = np.asarray(right_values, dtype=np.float64)
+        total_corr = 0.0
+        valid_days = 0
+        for left_row, right_row in zip(left_values, right_values):
+            mask = np.isfinite(left_row) & np.isfinite(right_row)
+            if mask.sum() <= 1:
+                continue
+            centered_left = left_row[mask] - left_row[mask].mean()
+            centered_right = right_row[mask] - right_row[mask].mean()
+            denominator = np.linalg.norm(centered_left) * np.linalg.norm(centered_right)
+            if denominator <= 0:
+                continue
+            total_corr += float(np.dot(centered_left, centered_right) / denominator)
+            valid_days += 1
+        return total_corr, valid_days
+
+    def row_loop_mean(left_values, right_values):
+        total_corr, valid_days = row_loop(left_values, right_values)
+        return total_corr / valid_days if valid_days else None
+
+    rng = np.random.default_rng(3)
+    days, stocks = 12, 40
+    left = rng.standard_normal((days, stocks)).astype(np.float32)
+    left[rng.random((days, stocks)) < 0.15] = np.nan
+    left[0] = np.nan                 # 全部缺失
+    left[1, 1:] = np.nan             # 只有一只有效股票
+    left[5] = 4.0                    # 常数截面
+    left[6, 30:] = np.nan            # 共同有效股票上右侧为常数
+    rights = []
+    for i in range(4):
+        right = (left * np.float32(i - 1.5) + rng.standard_normal((days, stocks))).astype(np.float32)
+        right[rng.random((days, stocks)) < 0.15] = np.nan
+        right[2] = 1.0               # 常数截面
+        right[3, :] = np.nan         # 全部缺失
+        right[6, :30] = 0.3
+        right[6, 30:] = rng.standard_normal(stocks - 30) * 100
+        rights.append(right)
+    all_missing = np.full((days, stocks), np.nan, dtype=np.float32)
+    rights.append(all_missing)
+
+    expected = [row_loop_mean(left, right) for right in rights]
+    assert expected[-1] is None
+    for right, value in zip(rights, expected):
+        assert rowwise_correlation_sums(left, right)[1] == row_loop(left, right)[1]
+        got = mean_rowwise_correlation(left, right)
+        assert (got is None) == (value is None)
+        if value is not None:
+            assert abs(got - value) < 1e-9, (got, value)
+
+    standardized, valid = standardize_cross_sections(left)
+    prior = [standardize_cross_sections(right) for right in rights]
+    batched = batched_mean_correlations(
+        standardized, valid, [item[0] for item in prior], [item[1] for item in prior]
+    )
+    for got, value in zip(batched, expected):
+        assert np.isnan(got) == (value is None)
+        if value is not None:
+            assert abs(got - value) < 1e-6, (got, value)
+
+    # 本地因子矩阵按坐标轴前缀存储：较短的矩阵只覆盖前几行、前几列
+    short_right = rights[0][: days - 2, : stocks - 3]
+    short_prior = standardize_cross_sections(short_right)
+    prefixed = prefix_mean_correlations(
+        standardized, valid, [short_prior[0], prior[1][0]], [short_prior[1], prior[1][1]]
+    )
+    assert abs(prefixed[0] - row_loop_mean(left[: days - 2, : stocks - 3], short_right)) < 1e-6
+    assert abs(prefixed[1] - expected[1]) < 1e-6
+    print("✅ 截面相关性内核测试通过")
+    return True
+
 if __name__ == '__main__':
     print("=== Gallery App 重构版本测试 ===")
     
@@ -73,6 +301,10 @@ if __name__ == '__main__':
     
     success &= test_imports()
     success &= test_basic_functionality()
+    success &= test_file_offload()
+    success &= test_description_search_after_first_write()
+    success &= test_exclude_keywords_match_original_text()
+    success &= test_correlation_kernel_matches_row_loop()
     
     if success:
         print("\n🎉 所有测试通过！应用可以正常启动")